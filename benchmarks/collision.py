@@ -0,0 +1,71 @@
+"""
+Compare per-frame platform collision cost of a linear scan over the platform
+SpriteList with the uniform grid index used by PhysicsEnginePlatformer, and
+of per-tile collisions with merged collision rectangles.
+
+Run it from the repository root with::
+
+    $ python benchmarks/collision.py [n_tiles]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+# Run from a source checkout without installing the package
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import arcade
+from fgarcade.assets import get_tile
+from fgarcade.collision import SpatialGrid
+from fgarcade.enums import Role
+from fgarcade.tilemap import TileMap, PlatformIndex
+
+
+def build_level(n_tiles, width=500):
+    """
+    Create a level with n_tiles ground tiles laid in rows of the given width.
+    """
+    platforms = arcade.SpriteList()
+    for n in range(n_tiles):
+        i, j = n % width, n // width
+        position = (i * 64 + 32, j * 64 + 32)
+        platforms.append(get_tile('g', position=position))
+    return platforms
+
+
+def main(n_tiles=50_000, repeat=5):
+    platforms = build_level(n_tiles)
+    index = SpatialGrid.from_objects(platforms)
+    player = get_tile('g', position=(2000, 96))
+
+    scan = lambda: arcade.check_for_collision_with_list(player, platforms)
+    grid = lambda: index.collide(player)
+    assert scan() == grid()
+
+    number = 10
+    t_scan = min(timeit.repeat(scan, number=number, repeat=repeat)) / number
+    number = 10_000
+    t_grid = min(timeit.repeat(grid, number=number, repeat=repeat)) / number
+
+    print(f'tiles: {n_tiles}')
+    print(f'linear scan:  {t_scan * 1e6:10.1f} us/query')
+    print(f'grid index:   {t_grid * 1e6:10.1f} us/query')
+    print(f'speedup:      {t_scan / t_grid:10.1f}x')
+
+    # Merged rectangles
+    tilemap = TileMap(64)
+    g = tilemap.tile_type('g', 'blue', 64, 64)
+    for n in range(n_tiles):
+        tilemap.set('platforms', n % 500, n // 500, g, Role.OBJECT)
+    tiles = PlatformIndex(tilemap)
+    merged = PlatformIndex(tilemap, merge=True)
+    for name, index in [('per tile', tiles), ('merged', merged)]:
+        query = lambda: index.collide(player)
+        n_hits = len(query())
+        t = min(timeit.repeat(query, number=number, repeat=repeat)) / number
+        print(f'{name + ":":13} {t * 1e6:10.1f} us/query, {n_hits} hits')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
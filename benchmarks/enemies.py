@@ -0,0 +1,53 @@
+"""
+Measure the cost of updating many enemies in the example game.
+
+The script spawns an increasing number of enemies of all kinds on the ground
+of the example game, inside the region updated around the viewport, and
+reports the average time of each update.
+
+Run it from the repository root with::
+
+    $ python benchmarks/enemies.py [n_steps]
+"""
+import sys
+import time
+from pathlib import Path
+
+# Run from a source checkout without installing the package
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / 'examples')]
+
+from fgarcade.enemies import ENEMIES
+from game_class import Game
+
+SIZES = [10, 100, 500, 1000]
+
+
+def measure(n_enemies, n_steps):
+    """
+    Return the average time (in seconds) of update_enemies() with the given
+    number of enemies.
+    """
+    game = Game(headless=True)
+    game.setup()
+    kinds = list(ENEMIES)
+    for k in range(n_enemies - len(game.enemy_manager)):
+        kind = kinds[k % len(kinds)]
+        game.create_enemy(kind, (2 + k % 14, 1 + k % 3))
+    game.update_enemies(1 / 60)
+
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        game.update_enemies(1 / 60)
+    return (time.perf_counter() - start) / n_steps
+
+
+def main(n_steps=100):
+    for n in SIZES:
+        elapsed = measure(n, n_steps)
+        print(f'{n:5} enemies: {1000 * elapsed:7.3f}ms/step, '
+              f'{1e6 * elapsed / n:6.2f}us/enemy')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
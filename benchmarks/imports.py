@@ -0,0 +1,59 @@
+"""
+Measure the cold import time of fgarcade modules.
+
+Each statement runs in a fresh interpreter, so nothing is cached in memory
+between measurements. The script also reports whether the statement
+imported arcade.
+
+Run it from the repository root with::
+
+    $ python benchmarks/imports.py [repeat]
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+# Statements run in the repository root, so fgarcade is imported from the
+# source checkout even if the package is not installed
+ROOT = Path(__file__).resolve().parents[1]
+
+STATEMENTS = [
+    'pass',
+    'import fgarcade.enums',
+    'import fgarcade.assets',
+    'import fgarcade',
+    'import fgarcade; fgarcade.Platformer',
+    'import arcade',
+]
+
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, 'arcade' in sys.modules)
+'''
+
+
+def measure(statement):
+    """
+    Return the time (in seconds) to run statement in a new interpreter and
+    whether it imported arcade.
+    """
+    script = SCRIPT.format(statement=statement)
+    out = subprocess.run([sys.executable, '-c', script], check=True,
+                         cwd=str(ROOT), stdout=subprocess.PIPE,
+                         universal_newlines=True)
+    elapsed, arcade = out.stdout.split()
+    return float(elapsed), arcade == 'True'
+
+
+def main(repeat=5):
+    for statement in STATEMENTS:
+        results = [measure(statement) for _ in range(repeat)]
+        best = min(elapsed for elapsed, _ in results)
+        arcade = 'yes' if results[0][1] else 'no'
+        print(f'{statement:40} {1000 * best:8.1f}ms  arcade: {arcade}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
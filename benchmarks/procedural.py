@@ -0,0 +1,73 @@
+"""
+Measure how fast endless levels are generated and loaded into a game.
+
+The script reports the time to generate batches of columns as tile arrays
+and the time to load them into a headless game, with and without chunks.
+It also reports the cost of a batch followed by a game step when walking
+enemies are present, since their physics must see the new platforms.
+At the maximum speed of the player, the camera scrolls about 8 pixels (an
+eighth of a tile) per step.
+
+Run it from the repository root with::
+
+    $ python benchmarks/procedural.py [n_batches]
+"""
+import sys
+import time
+from pathlib import Path
+
+# Run from a source checkout without installing the package
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import fgarcade as fg
+from fgarcade.procedural import LevelGenerator
+
+COLUMNS = 32
+
+
+class Runner(fg.HasProceduralLevelMixin, fg.Platformer):
+    level_seed = 0
+    generate_ahead = 0
+    n_walkers = 0
+
+    def init(self):
+        for k in range(self.n_walkers):
+            self.create_enemy('walking', (2 + k % 8, 2 + k // 8))
+
+
+def main(n_batches=50):
+    gen = LevelGenerator(seed=0)
+    start = time.perf_counter()
+    n_tiles = sum(len(gen.generate(COLUMNS)) for _ in range(n_batches))
+    elapsed = (time.perf_counter() - start) / n_batches
+    print(f'generate: {1000 * elapsed:6.2f}ms/batch of {COLUMNS} columns, '
+          f'{n_tiles // n_batches} tiles')
+
+    for chunk_size in [None, 16]:
+        game = Runner(headless=True)
+        game.chunk_size = chunk_size
+        game.setup()
+        start = time.perf_counter()
+        for _ in range(n_batches):
+            game.generate_level(COLUMNS)
+        elapsed = (time.perf_counter() - start) / n_batches
+        print(f'load (chunk_size={chunk_size}): {1000 * elapsed:6.2f}ms/batch')
+
+    for n_walkers in [8, 64]:
+        game = Runner(headless=True)
+        game.chunk_size = 16
+        game.n_walkers = n_walkers
+        game.setup()
+        game.simulate(1)
+        start = time.perf_counter()
+        for _ in range(n_batches):
+            game.generate_level(COLUMNS)
+            game.simulate(1)
+        elapsed = (time.perf_counter() - start) / n_batches
+        print(f'load + step ({n_walkers} walkers): '
+              f'{1000 * elapsed:6.2f}ms/batch')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
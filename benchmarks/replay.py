@@ -0,0 +1,57 @@
+"""
+Measure how fast recorded sessions are replayed in headless games.
+
+The script records a random session in the example game, checks that
+replaying it reproduces the final position of the player and reports the
+number of simulation steps per second.
+
+Run it from the repository root with::
+
+    $ python benchmarks/replay.py [n_sessions]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+# Run from a source checkout without installing the package
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / 'examples')]
+
+from fgarcade.enums import Command
+from game_class import Game
+
+COMMANDS = [Command.NONE, Command.RIGHT, Command.LEFT, Command.UP,
+            Command.RIGHT | Command.UP, Command.LEFT | Command.UP]
+
+
+def record(seed, n_runs=100):
+    """
+    Record a session with random commands held for random durations.
+    """
+    rng = random.Random(seed)
+    game = Game(headless=True, fixed_timestep=1 / 60)
+    game.setup()
+    game.start_recording()
+    for _ in range(n_runs):
+        game.simulate(rng.randint(1, 60), commands=rng.choice(COMMANDS))
+    return game.stop_recording(), tuple(game.player.position)
+
+
+def main(n_sessions=10):
+    sessions = [record(seed) for seed in range(n_sessions)]
+    n_frames = sum(len(rec) for rec, _ in sessions)
+    n_bytes = sum(len(rec.to_bytes()) for rec, _ in sessions)
+    print(f'{n_sessions} sessions, {n_frames} frames, {n_bytes} bytes')
+
+    start = time.perf_counter()
+    for rec, position in sessions:
+        game = Game(headless=True, fixed_timestep=rec.dt)
+        game.replay(rec)
+        assert tuple(game.player.position) == position
+    elapsed = time.perf_counter() - start
+    print(f'replay: {elapsed:.2f}s, {n_frames / elapsed:.0f} steps/s')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
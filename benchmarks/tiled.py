@@ -0,0 +1,133 @@
+"""
+Measure the time to import a large Tiled map into a platformer world.
+
+The script writes a 500x100 map in the TMX and JSON formats to a temporary
+directory, using the theme tiles as a tileset, and loads it into headless
+worlds with and without chunk streaming.
+
+Run it from the repository root with::
+
+    $ python benchmarks/tiled.py [width height]
+"""
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+# Run from a source checkout without installing the package
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+import fgarcade as ge
+from fgarcade.assets import theme_dir
+from fgarcade.tiled import read_tiled
+
+KINDS = ['g', 'e1', 'gl', 'gr', 'p', 'pl', 'pr']
+
+
+def make_gids(width, height, fill=0.5, seed=0):
+    """
+    Create a (height, width) array of gids with solid ground on the bottom
+    rows and random platforms above it.
+    """
+    rng = np.random.RandomState(seed)
+    gids = np.zeros((height, width), dtype=np.uint32)
+    ground = int(height * fill)
+    gids[height - ground:] = 2
+    gids[height - ground] = 1
+    platforms = rng.rand(height - ground, width) < 0.05
+    gids[:height - ground][platforms] = 5
+    return gids
+
+
+def tileset_tiles(directory):
+    color_dir = theme_dir / 'tile' / 'blue'
+    return [(idx, os.path.relpath(str(color_dir / f'{kind}.png'), directory))
+            for idx, kind in enumerate(KINDS)]
+
+
+def write_tmx(path, gids):
+    height, width = gids.shape
+    tiles = '\n'.join(
+        f'  <tile id="{idx}"><image width="64" height="64" source="{src}"/></tile>'
+        for idx, src in tileset_tiles(os.path.dirname(path)))
+    csv = ',\n'.join(','.join(map(str, row)) for row in gids.tolist())
+    with open(path, 'w') as fd:
+        fd.write(f'''<?xml version="1.0" encoding="UTF-8"?>
+<map version="1.2" orientation="orthogonal" renderorder="right-down"
+     width="{width}" height="{height}" tilewidth="64" tileheight="64" infinite="0">
+ <tileset firstgid="1" name="tiles" tilewidth="64" tileheight="64" tilecount="{len(KINDS)}" columns="0">
+{tiles}
+ </tileset>
+ <layer id="1" name="platforms" width="{width}" height="{height}">
+  <data encoding="csv">
+{csv}
+  </data>
+ </layer>
+</map>
+''')
+
+
+def write_json(path, gids):
+    height, width = gids.shape
+    data = base64.b64encode(zlib.compress(gids.astype('<u4').tobytes()))
+    tiles = [{'id': idx, 'image': src, 'imagewidth': 64, 'imageheight': 64}
+             for idx, src in tileset_tiles(os.path.dirname(path))]
+    with open(path, 'w') as fd:
+        json.dump({
+            'width': width, 'height': height,
+            'tilewidth': 64, 'tileheight': 64, 'infinite': False,
+            'tilesets': [{'firstgid': 1, 'tilewidth': 64, 'tileheight': 64,
+                          'tiles': tiles}],
+            'layers': [{'type': 'tilelayer', 'name': 'platforms',
+                        'width': width, 'height': height,
+                        'encoding': 'base64', 'compression': 'zlib',
+                        'data': data.decode('ascii')}],
+        }, fd)
+
+
+def load_world(path, chunk_size):
+    class World(ge.Platformer):
+        def init(self):
+            self.load_tiled(path)
+
+    world = World(headless=True, chunk_size=chunk_size)
+    world.setup()
+    return world
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(width=500, height=100):
+    gids = make_gids(width, height)
+    n_tiles = int(np.count_nonzero(gids))
+    print(f'Map with {width}x{height} cells and {n_tiles} tiles')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, write in [('map.tmx', write_tmx), ('map.json', write_json)]:
+            path = os.path.join(tmp, name)
+            write(path, gids)
+            t_read, _ = timed(read_tiled, path)
+            print(f'{name}: parse {1000 * t_read:.1f}ms')
+            for chunk_size in [None, 32]:
+                t_load, world = timed(load_world, path, chunk_size)
+                assert len(world.tilemap) == n_tiles
+                print(f'    world (chunk_size={chunk_size}): '
+                      f'{1000 * t_load:.1f}ms, {len(world.platforms)} sprites')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -40,10 +40,15 @@ class Game(ge.Platformer):
         self.create_foreground('other/plant/blue-5', (9, 2))
 
     def init_enemies(self):
-        pass
+        self.create_enemy('walking', (11, 1))
+        self.create_enemy('spikey', (22, 7), direction=1)
+        self.create_enemy('flying', (13, 6))
+        self.create_enemy('floating', (30, 4))
 
     def init_items(self):
-        pass
+        for i in range(2, 4):
+            self.create_item('yellowGem', (i, 1))
+        self.create_item('keyRed', (23, 13))
 
 
     def init(self):
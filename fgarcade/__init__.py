@@ -1,11 +1,53 @@
 """
 FGA + Arcade: A simple abstraction on top of the Arcade library to easily create
 platformers and other kinds of games.
+
+Game classes are imported on first access, so tools that only need light
+modules such as fgarcade.enums do not pay for importing arcade and pyglet.
 """
-from .fix import fix_all as _fix_all
-from .game import *
-from .physics import PhysicsEnginePlatformer
+from importlib import import_module
+
 from .utils import run, create_platformer, hex_to_color
 
 __version__ = '0.1.1'
-_fix_all()
+
+#: Map from public names to the modules that define them
+_LAZY_ATTRIBUTES = {
+    'GameWindow': '.game',
+    'HasScrollingCameraMixin': '.game',
+    'Platformer': '.game',
+    'HasBackgroundMixin': '.game',
+    'Player': '.game',
+    'HasPlayerMixin': '.game',
+    'HasEnemiesMixin': '.game',
+    'HasProceduralLevelMixin': '.game',
+    'EnemyManager': '.enemies',
+    'BatchPhysicsEngine': '.batch',
+    'PhysicsEnginePlatformer': '.physics',
+}
+
+#: Submodules that are imported when accessed as attributes
+_SUBMODULES = {
+    'animation', 'assets', 'atlas', 'batch', 'camera', 'chunks', 'collision',
+    'culling', 'enemies', 'enums', 'fix', 'game', 'geometry', 'items',
+    'level', 'parallax', 'physics', 'procedural', 'profiler', 'replay',
+    'sprites', 'tiled', 'tilemap',
+}
+
+__all__ = ['run', 'create_platformer', 'hex_to_color', *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return import_module(f'.{name}', __name__)
+    try:
+        module = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY_ATTRIBUTES, *_SUBMODULES})
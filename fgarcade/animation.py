@@ -0,0 +1,356 @@
+"""
+Data-driven sprite animations.
+
+Animations are defined by specs that list the frames of each movement state.
+The textures of each (spec, template, scale) combination are loaded only
+once and shared by all sprites. An :class:`Animator` advances the animation
+of many sprites in a single vectorized pass.
+"""
+import numpy as np
+
+from .assets import get_texture
+
+#: Movement states. Sprites moving down, up, left and right, in this order of
+#: priority, use the clip of the corresponding state.
+STATES = ('right', 'left', 'up', 'down')
+RIGHT, LEFT, UP, DOWN = range(4)
+KEEP = -1
+
+#: Minimum speed that changes the state of a sprite
+SPEED_TOLERANCE = 1.0
+
+#: Animation specs. Each state maps to a dictionary with:
+#:
+#: frames:
+#:     List of frame names that are cycled while the sprite is in the state.
+#: entry:
+#:     Frame shown when the sprite enters the state. Defaults to the first
+#:     frame.
+#: step:
+#:     Distance (in pixels) traveled between frames.
+#: frame_time:
+#:     Duration of each frame (in seconds), for animations that do not
+#:     depend on movement.
+#: mirrored:
+#:     If True, mirror all frames horizontally.
+#:
+#: Missing states reuse the clip of the 'right' state.
+ANIMATIONS = {
+    'walking': {
+        'right': {'frames': ['walk2', 'walk3', 'walk2', 'walk1'],
+                  'entry': 'walk1', 'step': 20},
+        'left': {'frames': ['walk2', 'walk3', 'walk2', 'walk1'],
+                 'entry': 'walk1', 'step': 20, 'mirrored': True},
+        'up': {'frames': ['up2'], 'step': 20},
+        'down': {'frames': ['fall'], 'step': 20},
+    },
+}
+
+_cache = {}
+
+
+class Clip:
+    """
+    Sequence of frames shown while a sprite is in some state.
+
+    Args:
+        frames:
+            List of textures.
+        entry:
+            Texture shown when the sprite enters the state. Defaults to the
+            first frame.
+        step (float):
+            Distance traveled between frames.
+        frame_time (float):
+            Duration of each frame, in seconds.
+    """
+
+    def __init__(self, frames, entry=None, step=0.0, frame_time=0.0):
+        self.frames = tuple(frames)
+        self.entry = self.frames[0] if entry is None else entry
+        self.step = step or 0.0
+        self.frame_time = frame_time or 0.0
+        if not self.frames:
+            raise ValueError('clips must have at least one frame')
+
+
+class Animation:
+    """
+    Clips for each movement state of a sprite. Animations are immutable and
+    can be shared by any number of sprites.
+
+    Args:
+        right, left, up, down (Clip):
+            Clip for each state. Only the right clip is required.
+    """
+
+    def __init__(self, right, left=None, up=None, down=None):
+        self.clips = (right, left or right, up or right, down or right)
+
+        #: All textures used by the animation
+        self.frames = []
+
+        #: Index of the entry frame, of the first frame of each cycle and
+        #: the number of frames in each cycle, for each state
+        self.entry = []
+        self.offset = []
+        self.length = []
+        for clip in self.clips:
+            self.entry.append(self._frame_index(clip.entry))
+            self.offset.append(len(self.frames))
+            self.length.append(len(clip.frames))
+            self.frames.extend(clip.frames)
+        self.step = [clip.step for clip in self.clips]
+        self.frame_time = [clip.frame_time for clip in self.clips]
+
+    def _frame_index(self, texture):
+        self.frames.append(texture)
+        return len(self.frames) - 1
+
+    @property
+    def initial_texture(self):
+        """
+        Texture of a sprite standing in the initial (right) state.
+        """
+        return self.frames[self.entry[RIGHT]]
+
+    @classmethod
+    def from_spec(cls, spec, template='{}', scale=1.0):
+        """
+        Load animation from a spec.
+
+        Args:
+            spec (dict):
+                Map from states to clip specs. See :data:`ANIMATIONS`.
+            template (str):
+                Template that converts frame names to sprite names.
+            scale (float):
+                Scale of textures.
+        """
+        clips = {}
+        for state, clip in spec.items():
+            mirrored = clip.get('mirrored', False)
+            load = lambda x: get_texture(template.format(x), scale, mirrored)
+            entry = clip.get('entry')
+            clips[state] = Clip(
+                [load(x) for x in clip['frames']],
+                entry=None if entry is None else load(entry),
+                step=clip.get('step'),
+                frame_time=clip.get('frame_time'),
+            )
+        return cls(**clips)
+
+
+def get_animation(name, template='{}', scale=1.0):
+    """
+    Return the shared animation for the spec with the given name in
+    :data:`ANIMATIONS`. Textures are loaded on the first call.
+
+    >>> walk = get_animation('walking', 'player/red/{}')
+    >>> walk is get_animation('walking', 'player/red/{}')
+    True
+    """
+    key = (name, template, scale)
+    try:
+        return _cache[key]
+    except KeyError:
+        animation = Animation.from_spec(ANIMATIONS[name], template, scale)
+        _cache[key] = animation
+        return animation
+
+
+def animation_textures(name, template='{}'):
+    """
+    Return a list of (sprite name, mirrored) pairs used by the animation
+    spec with the given name.
+    """
+    names = []
+    for clip in ANIMATIONS[name].values():
+        mirrored = clip.get('mirrored', False)
+        frames = list(clip['frames'])
+        if 'entry' in clip:
+            frames.append(clip['entry'])
+        for frame in frames:
+            item = (template.format(frame), mirrored)
+            if item not in names:
+                names.append(item)
+    return names
+
+
+class Animator:
+    """
+    Advance the animations of many sprites at once.
+
+    Sprites change state according to their velocity, and then cycle the
+    frames of the clip of their state after moving a given distance or after
+    some time. The state of all sprites is stored in arrays and updated in
+    a single vectorized pass. Only sprites that actually change frames have
+    their textures updated, and each sprite list is refreshed only once per
+    update.
+
+    Sprites must have an ``animation`` attribute with an :class:`Animation`.
+    """
+
+    def __init__(self):
+        self.sprites = []
+        self.frames = []
+        self._animations = {}
+        self._slots = {}
+        self._tables = np.zeros((0, 4, 5))
+        self._state = np.zeros(0, dtype=int)
+        self._index = np.zeros(0, dtype=int)
+        self._frame = np.zeros(0, dtype=int)
+        self._last = np.zeros((0, 3))
+        self.time = 0.0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def __contains__(self, sprite):
+        return id(sprite) in self._slots
+
+    def _table(self, animation):
+        # Rows: entry frame, cycle offset, cycle length, step, frame_time
+        try:
+            return self._animations[id(animation)][1]
+        except KeyError:
+            pass
+        base = len(self.frames)
+        self.frames.extend(animation.frames)
+        table = np.array([
+            [base + e for e in animation.entry],
+            [base + o for o in animation.offset],
+            animation.length,
+            animation.step,
+            animation.frame_time,
+        ], dtype=float).T
+        self._animations[id(animation)] = (animation, table)
+        return table
+
+    def add(self, sprite, animation=None):
+        """
+        Start animating sprite. The sprite enters the right state and shows
+        its entry frame.
+        """
+        if id(sprite) in self._slots:
+            return
+        if animation is not None:
+            sprite.animation = animation
+        table = self._table(sprite.animation)
+        self._slots[id(sprite)] = len(self.sprites)
+        self.sprites.append(sprite)
+        sprite.animator = self
+
+        entry = int(table[RIGHT, 0])
+        self._tables = np.concatenate([self._tables, table[None]])
+        self._state = np.append(self._state, RIGHT)
+        self._index = np.append(self._index, 0)
+        self._frame = np.append(self._frame, entry)
+        last = [[sprite.center_x, sprite.center_y, self.time]]
+        self._last = np.concatenate([self._last, last])
+        set_textures([(sprite, self.frames[entry])])
+
+    def remove(self, sprite):
+        """
+        Stop animating sprite.
+
+        The last sprite takes the place of the removed one, so removal takes
+        constant time, but does not preserve order.
+        """
+        idx = self._slots.pop(id(sprite))
+        last = len(self.sprites) - 1
+        if idx != last:
+            moved = self.sprites[last]
+            self.sprites[idx] = moved
+            self._slots[id(moved)] = idx
+            for arr in (self._tables, self._state, self._index,
+                        self._frame, self._last):
+                arr[idx] = arr[last]
+        self.sprites.pop()
+        self._tables = self._tables[:last]
+        self._state = self._state[:last]
+        self._index = self._index[:last]
+        self._frame = self._frame[:last]
+        self._last = self._last[:last]
+        sprite.animator = None
+
+    def update(self, dt=0.0):
+        """
+        Advance all animations by dt seconds.
+        """
+        self.time += dt
+        sprites = self.sprites
+        if not sprites:
+            return
+        data = np.array([(s.center_x, s.center_y, s.change_x, s.change_y)
+                         for s in sprites])
+        x, y, vx, vy = data.T
+        tol = SPEED_TOLERANCE
+        state = self._state
+        tables = self._tables
+        rows = np.arange(len(sprites))
+
+        # Choose new states. Slow sprites keep their state, unless they were
+        # falling.
+        new = np.full(len(sprites), KEEP)
+        new[(vx >= tol)] = RIGHT
+        new[(vx <= -tol)] = LEFT
+        new[(vy >= tol)] = UP
+        new[(vy <= -tol)] = DOWN
+        new[(new == KEEP) & (abs(vx) < tol) & (state == DOWN)] = RIGHT
+        entering = (new != KEEP) & (new != state)
+
+        # Advance frames of sprites that remain in the same state
+        table = tables[rows, state]
+        step, frame_time = table[:, 3], table[:, 4]
+        timed = frame_time > 0
+        staying = (new == state) | ((new == KEEP) & timed)
+        last = self._last
+        moved = np.where(state >= UP, y - last[:, 1], x - last[:, 0])
+        advance = staying & np.where(
+            timed, self.time - last[:, 2] >= frame_time,
+            (step > 0) & (abs(moved) >= step))
+        index = self._index + advance
+        last[advance] = np.stack([x, y, np.full(len(x), self.time)],
+                                 axis=1)[advance]
+        cycle = (table[:, 1] + index % table[:, 2]).astype(int)
+        frame = np.where(staying, cycle, self._frame)
+
+        # Enter new states
+        if entering.any():
+            state[entering] = new[entering]
+            index[entering] = 0
+            last[entering] = np.stack([x, y, np.full(len(x), self.time)],
+                                      axis=1)[entering]
+            frame[entering] = tables[rows, state][entering, 0]
+        self._index = index
+
+        changed = np.flatnonzero(frame != self._frame)
+        self._frame = frame
+        if len(changed):
+            frames = self.frames
+            set_textures([(sprites[i], frames[frame[i]])
+                          for i in changed.tolist()])
+
+
+def set_textures(changes):
+    """
+    Set the textures of many sprites, given as (sprite, texture) pairs.
+
+    Sprite lists rebuild their buffers when any texture changes, so this
+    function refreshes each affected sprite list only once.
+    """
+    lists = {}
+    for sprite, texture in changes:
+        if texture is sprite._texture:
+            continue
+        sprite.clear_spatial_hashes()
+        sprite._point_list_cache = None
+        sprite._texture = texture
+        sprite._width = texture.width * texture.scale
+        sprite._height = texture.height * texture.scale
+        sprite.add_spatial_hashes()
+        for sprite_list in sprite.sprite_lists:
+            lists[id(sprite_list)] = sprite_list
+    for sprite_list in lists.values():
+        sprite_list.update_texture(None)
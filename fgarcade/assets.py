@@ -1,9 +1,8 @@
 import os
+from collections import OrderedDict, namedtuple
 from functools import lru_cache
 from pathlib import Path
 
-import arcade
-
 #
 # PATHS
 #
@@ -22,6 +21,10 @@ local_images_dir = Path('.') / 'images'
 #
 EXTENSIONS = ('png', 'jpeg', 'svg')
 IMAGE_SEARCH_PATHS = [local_images_dir, images_dir, theme_dir]
+ATLAS_NAME = 'complete'
+TEXTURE_CACHE_BYTES = 64 * 2 ** 20
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions entries bytes max_bytes')
 
 
 def get_tile(kind, color='blue', **kwargs):
@@ -35,7 +38,13 @@ def get_sprite(name, scale=1.0, role=None, position=None, **kwargs):
     """
     Return sprite for image with the given name.
     """
-    sprite = arcade.Sprite(get_sprite_path(name), scale=scale, **kwargs)
+    if any(k.startswith('image_') for k in kwargs):
+        import arcade
+
+        sprite = arcade.Sprite(get_sprite_path(name), scale=scale, **kwargs)
+    else:
+        texture = get_texture(name, scale=scale)
+        sprite = sprite_from_texture(texture, **kwargs)
     if role is not None:
         sprite.role = role
     if position is not None:
@@ -44,19 +53,323 @@ def get_sprite(name, scale=1.0, role=None, position=None, **kwargs):
     return sprite
 
 
-@lru_cache(maxsize=256)
+def get_texture(name, scale=1.0, mirrored=False):
+    """
+    Return texture for image with the given name.
+
+    Textures are shared through the :data:`texture_cache`, hence each image
+    is decoded only once, no matter how many sprites use it.
+    """
+    return texture_cache.get(name, scale, mirrored)
+
+
+def load_texture(name, scale=1.0, mirrored=False):
+    """
+    Create a new texture for image with the given name, bypassing the cache.
+
+    Images from the bundled theme are cut from the theme's texture atlas, so
+    all of them share a single decoded image. Images that override the theme
+    or that are not present in the atlas are loaded from their own files.
+    """
+    import PIL.Image
+    import PIL.ImageOps
+    import arcade
+
+    path = get_sprite_path(name)
+    atlas = get_atlas()
+    if atlas is not None and theme_dir in path.parents and name in atlas:
+        return atlas.get_texture(name, scale, mirrored)
+
+    # We do not use arcade.load_texture since it keeps its own unbounded cache
+    image = PIL.Image.open(str(path))
+    image.load()
+    if mirrored:
+        image = PIL.ImageOps.mirror(image)
+    texture = arcade.Texture(f'{path}{mirrored}', image)
+    texture.scale = scale
+    return texture
+
+
+class TextureCache:
+    """
+    A LRU cache of textures keyed by (name, scale, mirrored).
+
+    The cache keeps track of the memory used by the decoded images and
+    evicts the least recently used textures when it exceeds the budget.
+    Evicted textures remain valid for sprites that still hold them.
+
+    Args:
+        max_bytes (int):
+            Memory budget. The most recently used texture is always kept, even
+            if it alone exceeds the budget.
+        loader (callable):
+            Function that receives (name, scale, mirrored) and creates a new
+            texture. Defaults to :func:`load_texture`.
+    """
+
+    def __init__(self, max_bytes=TEXTURE_CACHE_BYTES, loader=None):
+        self.max_bytes = max_bytes
+        self.loader = loader or load_texture
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, name, scale=1.0, mirrored=False):
+        """
+        Return texture, loading it if necessary.
+        """
+        key = (name, scale, mirrored)
+        data = self._data
+        try:
+            texture, _ = data[key]
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            data.move_to_end(key)
+            return texture
+
+        texture = self.loader(name, scale, mirrored)
+        self.put(texture, name, scale, mirrored)
+        return texture
+
+    def put(self, texture, name, scale=1.0, mirrored=False):
+        """
+        Insert a texture created elsewhere into the cache.
+        """
+        key = (name, scale, mirrored)
+        data = self._data
+        if key in data:
+            self.bytes -= data.pop(key)[1]
+        size = texture_size(texture)
+        data[key] = (texture, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(data) > 1:
+            _, (_, evicted) = data.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def info(self):
+        """
+        Return a named tuple with cache statistics.
+        """
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         len(self._data), self.bytes, self.max_bytes)
+
+    def clear(self):
+        """
+        Remove all textures from cache and reset statistics.
+        """
+        self._data.clear()
+        self.hits = self.misses = self.evictions = self.bytes = 0
+
+
+def preload_textures(names, scale=1.0, callback=None, max_workers=None):
+    """
+    Decode images for the given sprite names in parallel and store their
+    textures in the :data:`texture_cache`.
+
+    Images are decoded by a pool of threads, while textures are registered
+    in the cache by the calling thread. Textures are sent to the GPU the
+    first time they are drawn, hence also in the main thread.
+
+    Args:
+        names:
+            Sprite names or (name, mirrored) pairs. Textures that are already
+            cached are skipped.
+        scale (float):
+            Scale of textures.
+        callback:
+            If given, it is called as callback(done, total) each time a
+            texture is loaded. Useful to drive loading screens.
+        max_workers (int):
+            Number of threads. Uses the ThreadPoolExecutor default if not
+            given.
+
+    Returns:
+        The number of loaded textures.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    keys = []
+    for item in names:
+        name, mirrored = (item, False) if isinstance(item, str) else item
+        key = (name, scale, mirrored)
+        if key not in texture_cache and key not in keys:
+            keys.append(key)
+    if not keys:
+        return 0
+
+    # Resolve paths and parse the atlas index before starting the workers,
+    # so they only decode images.
+    for name, _, _ in keys:
+        get_sprite_path(name)
+    get_atlas()
+
+    total = len(keys)
+    with ThreadPoolExecutor(max_workers) as pool:
+        futures = {pool.submit(load_texture, *key): key for key in keys}
+        for done, future in enumerate(as_completed(futures), 1):
+            texture_cache.put(future.result(), *futures[future])
+            if callback is not None:
+                callback(done, total)
+    return total
+
+
+def texture_size(texture):
+    """
+    Return the number of bytes used by the decoded image of a texture.
+    """
+    image = texture.image
+    return image.width * image.height * len(image.getbands())
+
+
+#: Global texture cache used by get_texture, get_sprite and get_tile
+texture_cache = TextureCache()
+
+
+def sprite_from_texture(texture, **kwargs):
+    """
+    Create a sprite that uses the given texture. The sprite has the same
+    scale as the texture.
+    """
+    import arcade
+
+    sprite = arcade.Sprite(scale=texture.scale, **kwargs)
+    sprite.textures = [texture]
+    sprite.texture = texture
+    return sprite
+
+
+@lru_cache(maxsize=1)
+def get_atlas():
+    """
+    Return the texture atlas for the default theme or None, if the theme does
+    not ship an atlas.
+    """
+    from .atlas import TextureAtlas
+
+    if not (theme_dir / 'spritesheet' / f'{ATLAS_NAME}.xml').exists():
+        return None
+    return TextureAtlas.from_theme(theme_dir, ATLAS_NAME)
+
+
+class AssetIndex:
+    """
+    Map image names to files in a list of search paths.
+
+    Directories are walked only once, when the index is first used, so
+    name resolution is a single dictionary lookup. Files in the first search
+    paths take precedence over the following ones and, in the same path,
+    extensions are tried in the given order.
+
+    Call :meth:`refresh` if files are added or removed from the search
+    paths.
+
+    Args:
+        search_paths:
+            List of directories with images.
+        extensions:
+            Accepted file extensions, in order of precedence.
+    """
+
+    def __init__(self, search_paths=IMAGE_SEARCH_PATHS, extensions=EXTENSIONS):
+        self.search_paths = search_paths
+        self.extensions = tuple(extensions)
+        self._paths = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, name):
+        return name in self.paths
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    @property
+    def paths(self):
+        """
+        Dictionary from names to paths.
+        """
+        if self._paths is None:
+            self.refresh()
+        return self._paths
+
+    def refresh(self):
+        """
+        Walk search paths and rebuild index.
+        """
+        ranks = {ext: idx for idx, ext in enumerate(self.extensions)}
+        paths = {}
+        best = {}
+        for root_idx, root in enumerate(self.search_paths):
+            root = Path(root)
+            for dirpath, _, filenames in os.walk(str(root)):
+                prefix = os.path.relpath(dirpath, str(root))
+                prefix = '' if prefix == '.' else prefix.replace(os.sep, '/') + '/'
+                for filename in filenames:
+                    stem, _, ext = filename.rpartition('.')
+                    if not stem or ext not in ranks:
+                        continue
+                    name = prefix + stem
+                    rank = (root_idx, ranks[ext])
+                    if name not in best or rank < best[name]:
+                        best[name] = rank
+                        paths[name] = root / (prefix + filename)
+        self._paths = paths
+
+    def find(self, name):
+        """
+        Return path for the image with the given name.
+        """
+        try:
+            return self.paths[name]
+        except KeyError:
+            raise FileNotFoundError(f'no image found for {name}')
+
+
+#: Global index used by get_sprite_path
+asset_index = AssetIndex()
+
+# Indexes for non-default extensions, created on demand by get_sprite_path
+_extension_indexes = {}
+
+
 def get_sprite_path(name, extensions=EXTENSIONS):
     """
     Return file path for a given sprite name.
 
-    >>> get_sprite_path('player/blue/up1')
-    PosixPath('.../player/blue/up1.png')
-    """
-    name = os.path.sep.join(name.split('/'))
-    file_names = [f'{name}.{ext}' for ext in extensions]
-    for path in IMAGE_SEARCH_PATHS:
-        for filename in file_names:
-            full_path = path / filename
-            if full_path.exists():
-                return full_path
-    raise FileNotFoundError(f'no image found for {name}')
+    >>> get_sprite_path('player/blue/up1').name
+    'up1.png'
+    """
+    extensions = tuple(extensions)
+    if extensions == asset_index.extensions:
+        return asset_index.find(name)
+    try:
+        index = _extension_indexes[extensions]
+    except KeyError:
+        index = AssetIndex(asset_index.search_paths, extensions)
+        _extension_indexes[extensions] = index
+    return index.find(name)
+
+
+def refresh_assets():
+    """
+    Rescan the image directories and discard cached textures.
+
+    Call this function after adding, removing or changing images while the
+    game is running.
+    """
+    asset_index.refresh()
+    _extension_indexes.clear()
+    texture_cache.clear()
+    get_atlas.cache_clear()
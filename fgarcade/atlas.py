@@ -0,0 +1,114 @@
+"""
+Texture atlases described by the XML spritesheets bundled with themes.
+"""
+from pathlib import Path
+from threading import Lock
+from xml.etree import ElementTree
+
+import PIL.Image
+import PIL.ImageOps
+
+import arcade
+
+
+class TextureAtlas:
+    """
+    A single image that packs many sub-images.
+
+    Regions are read from an XML file in the Starling/ShoeBox format (a
+    <TextureAtlas> root with many <SubTexture> children). The image is decoded
+    only once and shared by all textures handed out by the atlas.
+
+    Args:
+        path:
+            Path to the XML descriptor. The image is the PNG file with the same
+            name.
+        aliases (dict):
+            Optional mapping from external names to region names.
+    """
+
+    def __init__(self, path, aliases=None):
+        self.path = Path(path)
+        self.image_path = self.path.with_suffix('.png')
+        self.aliases = dict(aliases or {})
+        self.regions = {}
+        self._image = None
+        self._lock = Lock()
+
+        root = ElementTree.parse(str(self.path)).getroot()
+        for node in root.iter('SubTexture'):
+            x, y, width, height = (int(node.get(attr)) for attr in
+                                   ('x', 'y', 'width', 'height'))
+
+            # Rotated regions store the frame size transposed. We do not
+            # support them and let those images be loaded from files.
+            if int(node.get('frameWidth', width)) != width:
+                continue
+            name = node.get('name').rsplit('.', 1)[0]
+            self.regions[name] = (x, y, width, height)
+
+    def __contains__(self, name):
+        return self.aliases.get(name, name) in self.regions
+
+    def __len__(self):
+        return len(self.regions)
+
+    @classmethod
+    def from_theme(cls, theme_dir, sheet='complete'):
+        """
+        Load atlas from a theme directory, including the aliases file that
+        maps sprite names to regions, if present.
+        """
+        sheet_dir = Path(theme_dir) / 'spritesheet'
+        aliases = {}
+        aliases_path = sheet_dir / 'aliases.txt'
+        if aliases_path.exists():
+            with open(str(aliases_path)) as fd:
+                for line in fd:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        name, region = line.split()
+                        aliases[name] = region
+        return cls(sheet_dir / f'{sheet}.xml', aliases)
+
+    @property
+    def image(self):
+        """
+        Atlas image. Decoded on first access.
+        """
+        if self._image is None:
+            # Textures may be loaded by many threads at once. See
+            # fgarcade.assets.preload_textures.
+            with self._lock:
+                if self._image is None:
+                    image = PIL.Image.open(str(self.image_path))
+                    image.load()
+                    self._image = image
+        return self._image
+
+    def region(self, name):
+        """
+        Return the (x, y, width, height) region for the given sprite name.
+        """
+        try:
+            return self.regions[self.aliases.get(name, name)]
+        except KeyError:
+            raise KeyError(f'{name!r} is not in atlas')
+
+    def get_texture(self, name, scale=1.0, mirrored=False):
+        """
+        Create a texture for the sprite with the given name.
+
+        The atlas does not cache textures. Use :func:`fgarcade.assets.get_texture`
+        to share textures between sprites.
+        """
+        x, y, width, height = region = self.region(name)
+        image = self.image.crop((x, y, x + width, y + height))
+        if mirrored:
+            image = PIL.ImageOps.mirror(image)
+
+        # Arcade identifies images in a SpriteList by texture name
+        texture_name = f'{self.image_path}{region}{mirrored}'
+        texture = arcade.Texture(texture_name, image)
+        texture.scale = scale
+        return texture
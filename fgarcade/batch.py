@@ -0,0 +1,338 @@
+"""
+Vectorized physics for many independent bodies sharing the same static level.
+"""
+import numpy as np
+
+from fgarcade.collision import arcade_edge
+from fgarcade.enums import Role
+
+
+class BatchPhysicsEngine:
+    """
+    Simulate N independent bodies against a static set of platforms.
+
+    The engine implements the same rules as
+    :class:`fgarcade.physics.PhysicsEnginePlatformer` (gravity, speed clamp,
+    ramps, one-way platforms and the partial recovery pushout), but keeps the
+    state of all bodies in numpy arrays and advances all of them with array
+    operations. Bodies do not interact with each other.
+
+    Args:
+        platforms:
+            Sequence of static platforms. Platforms must expose the left,
+            right, bottom, top, center_x and center_y attributes and may
+            define a role.
+        size (int):
+            Number of bodies.
+        width, height (float):
+            Initial dimensions of all bodies.
+        gravity_constant (float):
+            Gravity acceleration per step.
+        cell_size (float):
+            Size of grid cells used to index platforms.
+
+    Attributes:
+        center_x, center_y, change_x, change_y, width, height:
+            Arrays with the state of each body.
+    """
+
+    #: Maximum speed of any body
+    max_speed = 10
+
+    #: Fraction of penetration recovered each step
+    recover = 0.666
+
+    def __init__(self, platforms, size=0, width=0.0, height=0.0,
+                 gravity_constant=0.5, cell_size=64):
+        self.gravity_constant = gravity_constant
+        self.cell_size = cell_size
+        self.center_x = np.zeros(size)
+        self.center_y = np.zeros(size)
+        self.change_x = np.zeros(size)
+        self.change_y = np.zeros(size)
+        self.width = np.full(size, float(width))
+        self.height = np.full(size, float(height))
+        self._build_grid(list(platforms))
+
+    def __len__(self):
+        return len(self.center_x)
+
+    @classmethod
+    def from_world(cls, world, size=0, **kwargs):
+        """
+        Create engine for the platforms of the given world.
+
+        Bodies are initialized with the dimensions of the world's player.
+        """
+        index = getattr(world, 'platform_index', None)
+        platforms = world.platforms if index is None else index.boxes()
+        player = world.player
+        kwargs.setdefault('width', player.width)
+        kwargs.setdefault('height', player.height)
+        kwargs.setdefault('gravity_constant',
+                          getattr(world, 'gravity_constant', 0.5))
+        kwargs.setdefault('cell_size', 64 * getattr(world, 'scaling', 1.0))
+        return cls(platforms, size, **kwargs)
+
+    def _build_grid(self, platforms):
+        # Tiles are stored in all cells they overlap, so wide platforms, like
+        # merged collision rectangles, do not enlarge the region visited by
+        # each query.
+        n = len(platforms)
+        cell = self.cell_size
+        self.tile_left = np.array([x.left for x in platforms], dtype=float)
+        self.tile_right = np.array([x.right for x in platforms], dtype=float)
+        self.tile_bottom = np.array([x.bottom for x in platforms], dtype=float)
+        self.tile_top = np.array([x.top for x in platforms], dtype=float)
+        self.tile_center_x = np.array([x.center_x for x in platforms],
+                                      dtype=float)
+        self.tile_center_y = np.array([x.center_y for x in platforms],
+                                      dtype=float)
+        self.tile_role = np.array([getattr(x, 'role', Role.OBJECT)
+                                   for x in platforms], dtype=np.int8)
+
+        if n == 0:
+            self._cells = np.full((1, 1, 1), -1, dtype=np.int32)
+            self._origin = (0, 0)
+            return
+
+        # Same cell ranges of SpatialGrid.cell_range()
+        i_min = np.floor(self.tile_left / cell).astype(np.int64)
+        j_min = np.floor(self.tile_bottom / cell).astype(np.int64)
+        i_max = np.maximum(np.ceil(self.tile_right / cell).astype(np.int64)
+                           - 1, i_min)
+        j_max = np.maximum(np.ceil(self.tile_top / cell).astype(np.int64)
+                           - 1, j_min)
+        i0, j0 = i_min.min(), j_min.min()
+        nx, ny = i_max.max() - i0 + 1, j_max.max() - j0 + 1
+
+        # Expand each tile into one (tile, cell) pair per cell
+        span_x = i_max - i_min + 1
+        counts = span_x * (j_max - j_min + 1)
+        tile = np.repeat(np.arange(n), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                     counts)
+        i = i_min[tile] + offset % span_x[tile] - i0
+        j = j_min[tile] + offset // span_x[tile] - j0
+
+        flat = j * nx + i
+        order = np.argsort(flat, kind='stable')
+        counts = np.bincount(flat, minlength=nx * ny)
+        depth = counts.max()
+        start = np.cumsum(counts) - counts
+        slot = np.arange(len(flat)) - start[flat[order]]
+        cells = np.full((ny * nx, depth), -1, dtype=np.int32)
+        cells[flat[order], slot] = tile[order]
+        self._cells = cells.reshape(ny, nx, depth)
+        self._origin = (i0, j0)
+
+    def _candidates(self, left, bottom, right, top):
+        """
+        Return an (N, k) array of indexes of tiles overlapping each box,
+        sorted in the order platforms were given. Empty slots are filled
+        with -1.
+        """
+        cells = self._cells
+        ny, nx, depth = cells.shape
+        cell = self.cell_size
+        i0, j0 = self._origin
+        n = len(left)
+
+        i_min = np.floor(left / cell).astype(np.int64) - i0
+        j_min = np.floor(bottom / cell).astype(np.int64) - j0
+        i_max = np.floor(right / cell).astype(np.int64) - i0
+        j_max = np.floor(top / cell).astype(np.int64) - j0
+        span_x = max(int((i_max - i_min).max(initial=0)) + 1, 1)
+        span_y = max(int((j_max - j_min).max(initial=0)) + 1, 1)
+
+        di, dj = np.meshgrid(np.arange(span_x), np.arange(span_y))
+        ii = i_min[:, None] + di.ravel()[None, :]
+        jj = j_min[:, None] + dj.ravel()[None, :]
+        inside = ((ii >= 0) & (ii < nx) & (jj >= 0) & (jj < ny)
+                  & (ii <= i_max[:, None]) & (jj <= j_max[:, None]))
+        found = cells[np.where(inside, jj, 0), np.where(inside, ii, 0)]
+        found[~inside] = -1
+        found = found.reshape(n, -1)
+
+        # Keep only tiles that really overlap each box. Tiles that span many
+        # cells are found more than once.
+        idx = np.maximum(found, 0)
+        hit = ((found >= 0)
+               & (self.tile_left[idx] < right[:, None])
+               & (self.tile_right[idx] > left[:, None])
+               & (self.tile_bottom[idx] < top[:, None])
+               & (self.tile_top[idx] > bottom[:, None]))
+        big = np.iinfo(np.int32).max
+        found = np.sort(np.where(hit, found, big), axis=1)
+        repeated = found[:, 1:] == found[:, :-1]
+        if repeated.any():
+            found[:, 1:][repeated] = big
+            found.sort(axis=1)
+        k = int((found != big).sum(axis=1).max(initial=0))
+        found = found[:, :k]
+        found[found == big] = -1
+        return found
+
+    def _edges(self):
+        left, right = arcade_edge(self.center_x, self.width / 2)
+        bottom, top = arcade_edge(self.center_y, self.height / 2)
+        return left, right, bottom, top
+
+    def can_jump(self):
+        """
+        Return a boolean array telling which bodies stand on a floor.
+        """
+        left, right, bottom, top = self._edges()
+        bottom = bottom - 2
+        top = top - 2
+        hits = self._candidates(left, bottom, right, top)
+        idx = np.maximum(hits, 0)
+        ok = ((hits >= 0)
+              & (bottom[:, None] < self.tile_top[idx])
+              & (top[:, None] > self.tile_center_y[idx]))
+        return ok.any(axis=1)
+
+    def has_floor_ahead(self, direction, depth=8):
+        """
+        Return a boolean array telling which bodies have a floor just in
+        front of them.
+
+        Args:
+            direction:
+                Array with the direction of each body: positive values look
+                to the right of the body and negative values to its left.
+            depth (float):
+                Maximum distance below the body where floors are searched.
+        """
+        left, right, bottom, _ = self._edges()
+        ahead = np.where(direction > 0, right + 1, left - 1)
+        floor = self._candidates(ahead - 1, bottom - depth, ahead + 1,
+                                 bottom - 1)
+        return (floor >= 0).any(axis=1)
+
+    def update(self):
+        """
+        Move all bodies by a single step and resolve collisions.
+        """
+        cx, cy = self.center_x, self.center_y
+        vx, vy = self.change_x, self.change_y
+
+        # Add gravity and move
+        vy -= self.gravity_constant
+        speed = np.sqrt(vx ** 2 + vy ** 2)
+        fast = speed > self.max_speed
+        if fast.any():
+            ratio = self.max_speed / speed[fast]
+            vx[fast] *= ratio
+            vy[fast] *= ratio
+        cy += vy
+        cx += vx
+
+        # Check for wall hits. Tiles are processed in the same order as the
+        # scalar engine, one slot for all bodies at a time.
+        left, right, bottom, top = self._edges()
+        hits = self._candidates(left, bottom, right, top)
+        recover = self.recover
+        min_shadow_x = 12
+        min_shadow_y = 6
+        OBJECT, RAMP_UP, RAMP_DOWN = Role.OBJECT, Role.RAMP_UP, Role.RAMP_DOWN
+
+        for k in range(hits.shape[1]):
+            active = hits[:, k] >= 0
+            idx = np.maximum(hits[:, k], 0)
+            h_left = self.tile_left[idx]
+            h_right = self.tile_right[idx]
+            h_bottom = self.tile_bottom[idx]
+            h_top = self.tile_top[idx]
+            h_center_x = self.tile_center_x[idx]
+            role = self.tile_role[idx]
+            left, right, bottom, top = self._edges()
+
+            shadow_x = np.minimum(right, h_right) - np.maximum(left, h_left)
+            shadow_y = np.minimum(top, h_top) - np.maximum(bottom, h_bottom)
+            shift_y = np.where(role == RAMP_DOWN, cx - h_left,
+                               np.where(role == RAMP_UP,
+                                        np.maximum(cx - h_left, 0) - 64, 0))
+
+            # Falling down...
+            floor = h_top + shift_y
+            falling = (active & (vy < 0)
+                       & (bottom < floor) & (floor < cy)
+                       & (shadow_x > min_shadow_x)
+                       & (shadow_y < 24 + np.abs(shift_y)))
+            if falling.any():
+                b = bottom[falling]
+                amount = b + np.maximum(recover * (floor[falling] - b), 0.5)
+                cy[falling] -= b - amount
+                vy[falling] = 0
+
+            # Going up...
+            rising = (active & ~falling & (vy > 0)
+                      & (role == OBJECT)
+                      & (top > h_bottom) & (h_bottom > cy)
+                      & (shadow_x > min_shadow_x)
+                      & (shadow_y < 24))
+            if rising.any():
+                t = top[rising]
+                amount = t - np.maximum(recover * (t - h_bottom[rising]), 0.5)
+                cy[rising] -= t - amount
+                vy[rising] = 0
+
+            # Going right...
+            going_right = (active & (vx > 0)
+                           & ((role == OBJECT) | (role == RAMP_UP))
+                           & (right > h_left) & (cx < h_center_x)
+                           & (shadow_y > min_shadow_y)
+                           & (shadow_x < 24))
+            if going_right.any():
+                ramp = going_right & (role == RAMP_UP)
+                vx[ramp] /= 2
+                vy[ramp] += 4 * vy[ramp]
+                cy[ramp] += 64 + shift_y[ramp]
+
+                wall = going_right & ~ramp
+                r = right[wall]
+                amount = r - np.maximum(recover * (r - h_left[wall]), 0.5)
+                cx[wall] -= r - amount
+                vx[wall] = 0
+
+            # Going left...
+            going_left = (active & ~going_right & (vx < 0)
+                          & (role == OBJECT)
+                          & (left < h_right) & (cx > h_center_x)
+                          & (shadow_y > min_shadow_y)
+                          & (shadow_x < 24))
+            if going_left.any():
+                lf = left[going_left]
+                amount = lf + np.maximum(recover * (h_right[going_left] - lf),
+                                         0.5)
+                cx[going_left] += amount - lf
+                vx[going_left] = 0
+
+    #
+    # Synchronization with sprites
+    #
+    def load_sprites(self, sprites):
+        """
+        Copy position, velocity and dimensions from a sequence of sprites.
+
+        The number of bodies is adjusted to the number of sprites.
+        """
+        sprites = list(sprites)
+        self.center_x = np.array([s.center_x for s in sprites], dtype=float)
+        self.center_y = np.array([s.center_y for s in sprites], dtype=float)
+        self.change_x = np.array([s.change_x for s in sprites], dtype=float)
+        self.change_y = np.array([s.change_y for s in sprites], dtype=float)
+        self.width = np.array([s.width for s in sprites], dtype=float)
+        self.height = np.array([s.height for s in sprites], dtype=float)
+
+    def store_sprites(self, sprites):
+        """
+        Write positions and velocities of bodies back to sprites.
+        """
+        data = zip(sprites, self.center_x.tolist(), self.center_y.tolist(),
+                   self.change_x.tolist(), self.change_y.tolist())
+        for sprite, x, y, vx, vy in data:
+            sprite.position = (x, y)
+            sprite.change_x = vx
+            sprite.change_y = vy
@@ -0,0 +1,155 @@
+"""
+A camera that follows a region of the world.
+"""
+
+
+class Camera:
+    """
+    Compute the position of the viewport that follows a focus region.
+
+    The camera keeps a target position that moves only when the focus
+    region leaves the dead-zone, i.e., the viewport minus the margins. The
+    viewport then follows the target using a critically damped spring, so it
+    never overshoots. The focus may be displaced by its velocity to look
+    ahead in the direction of movement, and both the target and the viewport
+    are clamped to the scene bounds.
+
+    The camera does not depend on the window, so paths can be computed
+    without opening any windows.
+
+    >>> camera = Camera(800, 600, margin_x=200, smoothing=0.1)
+    >>> path = camera.track([(x, 100, x + 50, 150)
+    ...                      for x in range(600, 900, 30)], dt=1/60)
+    >>> [round(x) for x, _ in path]
+    [2, 9, 19, 33, 50, 70, 92, 115, 140, 167]
+
+    Args:
+        width, height:
+            Size of the viewport.
+        margin_x, margin_y:
+            Distance from the viewport edges to the dead-zone, in pixels.
+        smoothing (float):
+            Approximate time in seconds the camera takes to reach its target.
+            Zero snaps the viewport to the target.
+        look_ahead (float):
+            Horizontal displacement of the focus in seconds of the focus
+            velocity.
+        bounds:
+            The (left, bottom, right, top) limits of the scene, or None.
+    """
+
+    def __init__(self, width, height, margin_x=200, margin_y=120,
+                 smoothing=0.0, look_ahead=0.0, bounds=None, x=0, y=0):
+        self.width = width
+        self.height = height
+        self.margin_x = margin_x
+        self.margin_y = margin_y
+        self.smoothing = smoothing
+        self.look_ahead = look_ahead
+        self.bounds = bounds
+
+        #: Bottom left corner of the viewport
+        self.x, self.y = x, y
+
+        #: Position the viewport is moving to
+        self.target_x, self.target_y = x, y
+
+        #: Velocity of the viewport
+        self.vx = self.vy = 0.0
+
+        self._focus_x = None
+
+    def snap(self, x, y):
+        """
+        Move viewport and target to the given position and stop the camera.
+        """
+        self.x, self.y = self.target_x, self.target_y = self.clamp(x, y)
+        self.vx = self.vy = 0.0
+
+    def clamp(self, x, y):
+        """
+        Clamp viewport position to the scene bounds.
+
+        >>> camera = Camera(800, 600, bounds=(0, 0, 1000, 1000))
+        >>> camera.clamp(500, -100)
+        (200, 0)
+        """
+        if self.bounds is None:
+            return x, y
+        left, bottom, right, top = self.bounds
+        x = max(left, min(right - self.width, x))
+        y = max(bottom, min(top - self.height, y))
+        return x, y
+
+    def update(self, focus, dt):
+        """
+        Advance camera by dt seconds, following the given (x_min, y_min,
+        x_max, y_max) focus region.
+
+        Return True if the viewport moved.
+        """
+        xmin, ymin, xmax, ymax = focus
+
+        if self.look_ahead:
+            center = (xmin + xmax) / 2
+            if self._focus_x is not None and dt:
+                offset = (center - self._focus_x) / dt * self.look_ahead
+                xmin += offset
+                xmax += offset
+            self._focus_x = center
+
+        # Move target if focus leaves the dead-zone
+        x, y = self.target_x, self.target_y
+        dx, dy = self.margin_x, self.margin_y
+        if xmin < x + dx:
+            x = xmin - dx
+        elif xmax > x + self.width - dx:
+            x = xmax + dx - self.width
+        if ymin < y + dy:
+            y = ymin - dy
+        elif ymax > y + self.height - dy:
+            y = ymax + dy - self.height
+        x, y = self.target_x, self.target_y = self.clamp(x, y)
+
+        # Follow target
+        if self.smoothing and dt:
+            x, self.vx = smooth_damp(self.x, x, self.vx, self.smoothing, dt)
+            y, self.vy = smooth_damp(self.y, y, self.vy, self.smoothing, dt)
+            x, y = self.clamp(x, y)
+        if (x, y) == (self.x, self.y):
+            return False
+        self.x, self.y = x, y
+        return True
+
+    def track(self, focuses, dt):
+        """
+        Update camera with each focus region in sequence and return the list
+        of viewport positions.
+        """
+        path = []
+        for focus in focuses:
+            self.update(focus, dt)
+            path.append((self.x, self.y))
+        return path
+
+
+def smooth_damp(position, target, velocity, smoothing, dt):
+    """
+    Move position towards target using a critically damped spring.
+
+    Return the new (position, velocity) pair.
+
+    >>> x, v = smooth_damp(0.0, 100.0, 0.0, smoothing=0.5, dt=0.5)
+    >>> round(x, 2), round(v, 2)
+    (55.88, 117.65)
+    """
+    omega = 2 / smoothing
+    x = omega * dt
+    decay = 1 / (1 + x + 0.48 * x * x + 0.235 * x * x * x)
+    delta = position - target
+    tmp = (velocity + omega * delta) * dt
+    velocity = (velocity - omega * tmp) * decay
+    position = target + (delta + tmp) * decay
+    if abs(position - target) < 1e-3 and abs(velocity) < 1e-3:
+        return target, 0.0
+    return position, velocity
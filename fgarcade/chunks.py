@@ -0,0 +1,241 @@
+"""
+Split the static elements of a level into chunks that are loaded and unloaded
+as the camera moves.
+"""
+from math import floor
+
+from .assets import sprite_from_texture
+
+
+class Chunk:
+    """
+    A rectangular region of the level.
+
+    Unloaded chunks only keep a compact record of (layer, texture, x, y, role)
+    for each element. Sprites are recreated from those records when the chunk
+    is loaded again. Tiles are stored in a :class:`fgarcade.tilemap.TileMap`
+    and loaded chunks map the (layer, i, j) cell of each tile to its sprite.
+    """
+
+    __slots__ = ('key', 'records', 'sprites', 'tile_sprites')
+
+    def __init__(self, key):
+        self.key = key
+        self.records = []
+        self.sprites = None
+        self.tile_sprites = None
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'unloaded'
+        return f'<Chunk {self.key} {state}, {len(self.records)} elements>'
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def loaded(self):
+        return self.sprites is not None
+
+    def add(self, layer, sprite):
+        """
+        Register sprite in the given layer.
+        """
+        role = getattr(sprite, 'role', None)
+        x, y = sprite.position
+        self.records.append((layer, sprite.texture, x, y, role))
+        if self.sprites is not None:
+            self.sprites.append((layer, sprite))
+
+    def load(self):
+        """
+        Create sprites for all elements in chunk.
+        """
+        if self.sprites is not None:
+            return
+        self.tile_sprites = {}
+        sprites = []
+        for layer, texture, x, y, role in self.records:
+            sprite = sprite_from_texture(texture, center_x=x, center_y=y)
+            if role is not None:
+                sprite.role = role
+            sprites.append((layer, sprite))
+        self.sprites = sprites
+
+    def unload(self):
+        """
+        Release all sprites in chunk.
+        """
+        self.sprites = None
+        self.tile_sprites = None
+
+    def add_tile(self, layer, i, j, sprite):
+        """
+        Register sprite for the tile at cell (i, j) of a loaded chunk.
+
+        Return the sprite previously registered in the same cell, if any.
+        """
+        old = self.tile_sprites.pop((layer, i, j), None)
+        if old is not None:
+            self.sprites.remove((layer, old))
+        self.tile_sprites[(layer, i, j)] = sprite
+        self.sprites.append((layer, sprite))
+        return old
+
+    def remove_tile(self, layer, i, j):
+        """
+        Unregister the sprite of the tile at cell (i, j) and return it, if
+        any.
+        """
+        old = self.tile_sprites.pop((layer, i, j), None)
+        if old is not None:
+            self.sprites.remove((layer, old))
+        return old
+
+
+class ChunkGrid:
+    """
+    A grid of square chunks of the given size (in pixels).
+
+    Only chunks that touch the active region hold sprites. The region is
+    usually the viewport expanded by some margin.
+
+    Args:
+        size (float):
+            Side of each chunk.
+        tilemap (TileMap):
+            Optional tile map with the same chunk size. Tiles in a chunk are
+            created when the chunk is loaded.
+        tile_factory (callable):
+            Function that receives (i, j, kind, color, role) and return the
+            sprite for a tile. Required if a tilemap is given.
+    """
+
+    def __init__(self, size, tilemap=None, tile_factory=None):
+        self.size = size
+        self.tilemap = tilemap
+        self.tile_factory = tile_factory
+        self.chunks = {}
+        self.region = None
+        self.loaded = set()
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __iter__(self):
+        return iter(self.chunks.values())
+
+    def chunk_key(self, x, y):
+        """
+        Return the (i, j) key of the chunk that contains the given point.
+        """
+        return floor(x / self.size), floor(y / self.size)
+
+    def chunk_range(self, left, bottom, right, top):
+        """
+        Return the inclusive (i_min, j_min, i_max, j_max) range of chunks
+        that touch the given rectangle.
+        """
+        i0, j0 = self.chunk_key(left, bottom)
+        i1, j1 = self.chunk_key(right, top)
+        return i0, j0, i1, j1
+
+    def is_active(self, key):
+        """
+        Return True if chunk with the given key is inside the active region.
+        """
+        if self.region is None:
+            return False
+        i, j = key
+        i0, j0, i1, j1 = self.region
+        return i0 <= i <= i1 and j0 <= j <= j1
+
+    def get_chunk(self, key):
+        """
+        Return chunk with the given key, creating it if necessary.
+        """
+        try:
+            return self.chunks[key]
+        except KeyError:
+            chunk = self.chunks[key] = Chunk(key)
+            if self.is_active(key):
+                self.load_chunk(chunk)
+                self.loaded.add(key)
+            return chunk
+
+    def add(self, layer, sprite):
+        """
+        Add sprite to the chunk that contains its center.
+
+        Return True if sprite belongs to a loaded chunk and thus must be
+        displayed.
+        """
+        chunk = self.get_chunk(self.chunk_key(sprite.center_x, sprite.center_y))
+        chunk.add(layer, sprite)
+        return chunk.loaded
+
+    def load_chunk(self, chunk):
+        """
+        Create sprites for all elements and tiles in chunk.
+        """
+        chunk.load()
+        tilemap = self.tilemap
+        if tilemap is None:
+            return
+        make = self.tile_factory
+        for layer in list(tilemap.layers):
+            for i, j, kind, color, role in tilemap.tiles(layer, chunk.key):
+                chunk.add_tile(layer, i, j, make(i, j, kind, color, role))
+
+    def set_region(self, left, bottom, right, top):
+        """
+        Load all chunks that touch the given rectangle and unload the others.
+
+        Return True if any chunk was loaded or unloaded.
+        """
+        region = self.chunk_range(left, bottom, right, top)
+        if region == self.region:
+            return False
+        self.region = region
+
+        # Only visit chunks in the new region and the ones currently loaded,
+        # so the cost does not depend on the size of the level.
+        i0, j0, i1, j1 = region
+        chunks = self.chunks
+        active = {(i, j)
+                  for i in range(i0, i1 + 1)
+                  for j in range(j0, j1 + 1)
+                  if (i, j) in chunks}
+        unload = self.loaded - active
+        load = active - self.loaded
+        for key in unload:
+            chunks[key].unload()
+        for key in load:
+            self.load_chunk(chunks[key])
+        self.loaded = active
+        return bool(load or unload)
+
+    def reload(self):
+        """
+        Recreate sprites of all loaded chunks and register chunks for tiles
+        that were added in bulk to the tilemap.
+        """
+        if self.tilemap is not None:
+            size = self.tilemap.chunk_size * self.tilemap.tile_size
+            if size != self.size:
+                raise ValueError('tilemap and chunks must have the same size')
+            for layer in self.tilemap.layers:
+                for key in self.tilemap.chunk_keys(layer):
+                    self.get_chunk(key)
+        for key in self.loaded:
+            chunk = self.chunks[key]
+            chunk.unload()
+            self.load_chunk(chunk)
+
+    def sprites(self, layer):
+        """
+        Return a list with all loaded sprites in the given layer.
+        """
+        return [sprite
+                for key in sorted(self.loaded)
+                for name, sprite in (self.chunks[key].sprites or ())
+                if name == layer]
@@ -0,0 +1,372 @@
+"""
+Spatial indexes used to accelerate collision queries.
+"""
+from heapq import heapify, heappop, heappush
+from math import ceil, floor
+
+import numpy as np
+
+
+def arcade_edge(center, half):
+    """
+    Return the (low, high) edges of a sprite along one axis, given its center
+    and half of its size.
+
+    Reproduces the floating point rounding of arcade 2.0.9, which computes
+    the corners of a sprite as offsets from its center that are rotated,
+    moved back and rounded to 2 decimals. Colliders built from these edges
+    produce exactly the same collisions as the sprites. Accepts numbers or
+    numpy arrays.
+
+    >>> arcade_edge(32.0, 19.5)
+    (12.5, 51.5)
+    """
+    low = center - half - center + center
+    high = center + half - center + center
+    if isinstance(center, np.ndarray):
+        return np.round(low, 2), np.round(high, 2)
+    return round(low, 2), round(high, 2)
+
+
+class Box:
+    """
+    A light-weight axis-aligned bounding box with an optional role.
+
+    Boxes expose the same geometric attributes as arcade sprites and can be
+    used anywhere a static collider is expected.
+    """
+
+    __slots__ = ('left', 'bottom', 'right', 'top', 'role')
+
+    def __init__(self, left, bottom, right, top, role=None):
+        self.left = left
+        self.bottom = bottom
+        self.right = right
+        self.top = top
+        self.role = role
+
+    def __repr__(self):
+        args = self.left, self.bottom, self.right, self.top
+        if self.role is None:
+            return 'Box(%r, %r, %r, %r)' % args
+        return 'Box(%r, %r, %r, %r, role=%r)' % (*args, self.role)
+
+    @property
+    def center_x(self):
+        return (self.left + self.right) / 2
+
+    @property
+    def center_y(self):
+        return (self.bottom + self.top) / 2
+
+    @property
+    def width(self):
+        return self.right - self.left
+
+    @property
+    def height(self):
+        return self.top - self.bottom
+
+
+class SpatialGrid:
+    """
+    Uniform grid that indexes static objects by the cells touched by their
+    bounding boxes.
+
+    Queries only visit the cells that overlap the requested region, hence its
+    cost does not depend on the total number of indexed objects. Results are
+    returned in insertion order, which is the same order a linear scan over a
+    SpriteList would produce.
+
+    Objects must expose the ``left``, ``bottom``, ``right`` and ``top``
+    attributes. Objects are assumed to be static: remove and re-insert an
+    object if it moves.
+
+    >>> grid = SpatialGrid(64)
+    >>> ground, wall = Box(0, 0, 640, 64), Box(640, 0, 704, 640)
+    >>> grid.extend([ground, wall])
+    >>> grid.query(10, 32, 50, 96)
+    [Box(0, 0, 640, 64)]
+    >>> grid.query(600, 32, 660, 96)
+    [Box(0, 0, 640, 64), Box(640, 0, 704, 640)]
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._entries = {}
+        self._serial = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return (obj for _, obj in self.items())
+
+    def __contains__(self, obj):
+        return id(obj) in self._entries
+
+    def items(self):
+        """
+        Return a list of (serial, obj) pairs for all objects, sorted by
+        serial.
+        """
+        return sorted((serial, obj) for serial, obj, _ in self._entries.values())
+
+    @classmethod
+    def from_objects(cls, objects, cell_size=64):
+        """
+        Create grid and populate it with the given objects.
+        """
+        grid = cls(cell_size)
+        grid.extend(objects)
+        return grid
+
+    def cell_range(self, left, bottom, right, top):
+        """
+        Return the (i_min, j_min, i_max, j_max) range of cells touched by the
+        given rectangle. Limits are inclusive.
+        """
+        size = self.cell_size
+        i0, j0 = floor(left / size), floor(bottom / size)
+        i1, j1 = ceil(right / size) - 1, ceil(top / size) - 1
+        return i0, j0, max(i0, i1), max(j0, j1)
+
+    def add(self, obj, serial=None):
+        """
+        Insert object into the index.
+
+        Objects are ordered by serial number, which is assigned sequentially
+        unless given explicitly. Explicit serials allow sharing the same
+        ordering with other indexes.
+        """
+        if id(obj) in self._entries:
+            return
+        if serial is None:
+            serial = self._serial
+        self._serial = max(self._serial, serial) + 1
+        i0, j0, i1, j1 = self.cell_range(obj.left, obj.bottom,
+                                         obj.right, obj.top)
+        entry = (serial, obj)
+        cells = self._cells
+        keys = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                key = (i, j)
+                try:
+                    cells[key].append(entry)
+                except KeyError:
+                    cells[key] = [entry]
+                keys.append(key)
+        self._entries[id(obj)] = (serial, obj, keys)
+
+    def extend(self, objs):
+        """
+        Insert all objects in the given sequence.
+        """
+        for obj in objs:
+            self.add(obj)
+
+    def remove(self, obj):
+        """
+        Remove object from index.
+
+        Raise a ValueError if object is not present.
+        """
+        try:
+            serial, _, keys = self._entries.pop(id(obj))
+        except KeyError:
+            raise ValueError('object not in index')
+        cells = self._cells
+        for key in keys:
+            cell = cells[key]
+            cell[:] = [entry for entry in cell if entry[0] != serial]
+            if not cell:
+                del cells[key]
+
+    def clear(self):
+        """
+        Remove all objects from index.
+        """
+        self._cells.clear()
+        self._entries.clear()
+
+    def query(self, left, bottom, right, top):
+        """
+        Return a list with all objects that overlap the given rectangle.
+
+        Objects that only touch the boundaries of the rectangle are not
+        considered to be overlapping, which is the same criteria used by
+        arcade's collision functions for axis-aligned sprites.
+        """
+        return [obj for _, obj in self.entries(left, bottom, right, top)]
+
+    def entries(self, left, bottom, right, top):
+        """
+        Like query(), but return a list of (serial, obj) pairs.
+        """
+        i0, j0, i1, j1 = self.cell_range(left, bottom, right, top)
+        cells = self._cells
+        found = {}
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = cells.get((i, j))
+                if cell:
+                    for serial, obj in cell:
+                        found[serial] = obj
+
+        if len(found) > 1:
+            found = {k: found[k] for k in sorted(found)}
+        return [(serial, obj) for serial, obj in found.items()
+                if obj.left < right and obj.right > left
+                and obj.bottom < top and obj.top > bottom]
+
+    def collide(self, obj):
+        """
+        Return a list of objects that collide with the given object.
+        """
+        hits = self.query(obj.left, obj.bottom, obj.right, obj.top)
+        return [x for x in hits if x is not obj]
+
+
+class Extent:
+    """
+    Bounding box of a collection of boxes that changes over time.
+
+    Each edge is kept in a histogram of values and in a heap of the values
+    in the histogram. Values whose count drops to zero are discarded from
+    the heap lazily, when they reach its top. Adding or removing a box takes
+    O(log n) time, where n is the number of distinct values of an edge, and
+    so does recomputing the bounds after the last box at an edge is removed.
+
+    >>> extent = Extent()
+    >>> extent.add(0, 0, 640, 64)
+    >>> extent.add(640, 0, 704, 640)
+    >>> extent.bounds
+    (0, 0, 704, 640)
+    >>> extent.remove(640, 0, 704, 640)
+    >>> extent.bounds
+    (0, 0, 640, 64)
+    """
+
+    # Heaps of right and top edges store negated values
+    _signs = (1, 1, -1, -1)
+
+    def __init__(self):
+        self._edges = ({}, {}, {}, {})
+        self._heaps = ([], [], [], [])
+        self._bounds = None
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def bounds(self):
+        """
+        A (left, bottom, right, top) tuple or None, if extent is empty.
+        """
+        if self._bounds is None and self._count:
+            self._bounds = tuple(self._edge(i) for i in range(4))
+        return self._bounds
+
+    def _edge(self, i):
+        # Drop values that were removed from the histogram until the top of
+        # the heap is a valid edge
+        hist, heap, sign = self._edges[i], self._heaps[i], self._signs[i]
+        while sign * heap[0] not in hist:
+            heappop(heap)
+        return sign * heap[0]
+
+    def _compact(self, i):
+        # Rebuild heap if it holds too many removed values
+        hist, heap, sign = self._edges[i], self._heaps[i], self._signs[i]
+        if len(heap) > 2 * len(hist) + 16:
+            heap[:] = [sign * x for x in hist]
+            heapify(heap)
+
+    def add(self, left, bottom, right, top):
+        """
+        Include box with the given edges.
+        """
+        edges = (left, bottom, right, top)
+        for hist, heap, sign, x in zip(self._edges, self._heaps, self._signs,
+                                       edges):
+            n = hist.get(x, 0)
+            if not n:
+                heappush(heap, sign * x)
+            hist[x] = n + 1
+        self._count += 1
+        if self._bounds is not None:
+            l, b, r, t = self._bounds
+            self._bounds = (min(l, left), min(b, bottom),
+                            max(r, right), max(t, top))
+        elif self._count == 1:
+            self._bounds = edges
+
+    def remove(self, left, bottom, right, top):
+        """
+        Remove box with the given edges.
+
+        Raise a ValueError if no such box was added.
+        """
+        edges = (left, bottom, right, top)
+        for hist, x in zip(self._edges, edges):
+            if x not in hist:
+                raise ValueError('box not in extent')
+        for i, (hist, x) in enumerate(zip(self._edges, edges)):
+            n = hist[x] - 1
+            if n:
+                hist[x] = n
+            else:
+                del hist[x]
+                self._compact(i)
+        self._count -= 1
+
+        # Invalidate cache if an edge of the bounds is gone
+        bounds = self._bounds
+        if bounds is not None:
+            if any(x not in hist for hist, x in zip(self._edges, bounds)):
+                self._bounds = None
+
+    def update(self, left, bottom, right, top, sign=1):
+        """
+        Add (or remove, if sign is -1) many boxes at once. Arguments are
+        sequences with the edges of each box.
+        """
+        if not len(left):
+            return
+        edges = []
+        for i, values in enumerate((left, bottom, right, top)):
+            hist, heap = self._edges[i], self._heaps[i]
+            values, counts = np.unique(np.asarray(values, dtype=float),
+                                       return_counts=True)
+            edges.append((float(values[0]), float(values[-1])))
+            added = []
+            for x, n in zip(values.tolist(), counts.tolist()):
+                old = hist.get(x, 0)
+                n = old + sign * n
+                if n > 0:
+                    hist[x] = n
+                    if not old:
+                        added.append(self._signs[i] * x)
+                elif n == 0:
+                    del hist[x]
+                else:
+                    raise ValueError('box not in extent')
+            if len(added) > len(heap) // 8:
+                heap.extend(added)
+                heapify(heap)
+            else:
+                for x in added:
+                    heappush(heap, x)
+            self._compact(i)
+        self._count += sign * len(left)
+
+        bounds = self._bounds
+        if sign < 0 or bounds is None:
+            self._bounds = None
+        else:
+            (l, _), (b, _), (_, r), (_, t) = edges
+            self._bounds = (min(bounds[0], l), min(bounds[1], b),
+                            max(bounds[2], r), max(bounds[3], t))
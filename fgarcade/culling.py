@@ -0,0 +1,137 @@
+"""
+Draw only the static sprites that can be seen through the viewport.
+"""
+from math import ceil, floor
+
+import arcade
+from .fix import reset_sprite_list
+
+
+class CulledLayer:
+    """
+    Keep a spatial index of a sprite list and a second list with the subset
+    that overlaps the viewport.
+
+    Sprites are binned by the grid cell that contains their centers, which
+    is much cheaper than computing their edges. Queries are expanded by the
+    half-size of the largest sprite, so the visible list may contain a few
+    sprites just outside the viewport, but never misses one.
+
+    The visible subset is recomputed by :meth:`set_viewport` only when the
+    viewport enters a different range of grid cells. Sprites are considered
+    static: call :meth:`rebuild` if they move.
+
+    Args:
+        sprites (SpriteList):
+            List with all sprites in the layer.
+        cell_size (float):
+            Size of the grid cells. The visible list covers the viewport
+            rounded out to whole cells.
+    """
+
+    def __init__(self, sprites, cell_size=256):
+        self.sprites = sprites
+        self.cell_size = cell_size
+        self.visible = arcade.SpriteList()
+        self.cells = None
+        self._bins = {}
+        self._keys = {}
+        self._reach = 0
+        self._serial = 0
+        for sprite in sprites:
+            self._insert(sprite)
+
+    def __len__(self):
+        return len(self.visible)
+
+    def cell_range(self, left, bottom, right, top):
+        """
+        Return the inclusive (i_min, j_min, i_max, j_max) range of cells
+        touched by the given rectangle.
+        """
+        size = self.cell_size
+        i0, j0 = floor(left / size), floor(bottom / size)
+        i1, j1 = ceil(right / size) - 1, ceil(top / size) - 1
+        return i0, j0, max(i0, i1), max(j0, j1)
+
+    def _insert(self, sprite):
+        if id(sprite) in self._keys:
+            return None
+        size = self.cell_size
+        key = (floor(sprite.center_x / size), floor(sprite.center_y / size))
+        entry = (self._serial, sprite)
+        self._serial += 1
+        try:
+            self._bins[key].append(entry)
+        except KeyError:
+            self._bins[key] = [entry]
+        self._keys[id(sprite)] = (key, entry)
+
+        radius = max(sprite.width, sprite.height) / 2
+        if radius > self._reach * size:
+            self._reach = ceil(radius / size)
+        return key
+
+    def add(self, sprite):
+        """
+        Register a new sprite that was appended to the layer.
+        """
+        key = self._insert(sprite)
+        if key is not None and self.cells is not None:
+            i, j = key
+            i0, j0, i1, j1 = self.cells
+            reach = self._reach
+            if (i0 - reach <= i <= i1 + reach
+                    and j0 - reach <= j <= j1 + reach):
+                self.visible.append(sprite)
+
+    def remove(self, sprite):
+        """
+        Unregister sprite that was removed from the layer.
+        """
+        key, entry = self._keys.pop(id(sprite))
+        self._bins[key].remove(entry)
+        if sprite in self.visible.sprite_list:
+            self.visible.remove(sprite)
+
+    def rebuild(self):
+        """
+        Rebuild index from the sprite list and recompute visible sprites.
+        """
+        self._bins.clear()
+        self._keys.clear()
+        for sprite in self.sprites:
+            self._insert(sprite)
+        cells, self.cells = self.cells, None
+        if cells is not None:
+            self._update(cells)
+
+    def set_viewport(self, left, bottom, right, top):
+        """
+        Update visible sprites for the given viewport rectangle.
+
+        Return True if the visible list changed.
+        """
+        cells = self.cell_range(left, bottom, right, top)
+        if cells == self.cells:
+            return False
+        self._update(cells)
+        return True
+
+    def _update(self, cells):
+        self.cells = cells
+        i0, j0, i1, j1 = cells
+        reach = self._reach
+        bins = self._bins
+        visible = []
+        for i in range(i0 - reach, i1 + reach + 1):
+            for j in range(j0 - reach, j1 + reach + 1):
+                visible.extend(bins.get((i, j), ()))
+        visible.sort(key=lambda x: x[0])
+        reset_sprite_list(self.visible, [sprite for _, sprite in visible])
+
+    def draw(self):
+        """
+        Draw visible sprites.
+        """
+        self.visible.draw()
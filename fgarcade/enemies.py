@@ -0,0 +1,457 @@
+"""
+Enemies and other non-player characters.
+
+Enemies are pooled sprites whose state is stored in arrays, so crowds of
+enemies are moved, collided and animated in a few vectorized passes per
+frame.
+"""
+import numpy as np
+
+import arcade
+from .animation import ANIMATIONS, Animator, get_animation
+from .batch import BatchPhysicsEngine
+from .collision import SpatialGrid
+from .fix import swap_remove_sprite
+from .physics import Body, move_body, push_out
+from .sprites import AnimatedSprite
+
+#: Behaviours
+WALKER, FLYER, FLOATER = range(3)
+BEHAVIOURS = {'walker': WALKER, 'flyer': FLYER, 'floater': FLOATER}
+
+#: Enemy kinds. Each kind defines:
+#:
+#: behaviour:
+#:     'walker' enemies are subject to gravity, walk on platforms and turn
+#:     around at walls and ledges. 'flyer' enemies patrol horizontally in
+#:     the air and 'floater' enemies bob up and down.
+#: image:
+#:     Base name of the animation frames in the enemy/ folder.
+#: animation:
+#:     Name of the animation spec in fgarcade.animation.ANIMATIONS.
+#: speed:
+#:     Horizontal speed, in pixels per step.
+#: range:
+#:     Patrol distance of flyers and amplitude of floaters, in pixels.
+#: period:
+#:     Duration of the movement cycle of floaters, in seconds.
+ENEMIES = {
+    'walking': {'behaviour': 'walker', 'image': 'enemyWalking',
+                'animation': 'enemy-walking', 'speed': 1.5},
+    'spikey': {'behaviour': 'walker', 'image': 'enemySpikey',
+               'animation': 'enemy-walking', 'speed': 1.0},
+    'flying': {'behaviour': 'flyer', 'image': 'enemyFlying',
+               'animation': 'enemy-flying', 'speed': 2.0, 'range': 192},
+    'flying-alt': {'behaviour': 'flyer', 'image': 'enemyFlyingAlt',
+                   'animation': 'enemy-flying', 'speed': 2.5, 'range': 256},
+    'swimming': {'behaviour': 'flyer', 'image': 'enemySwimming',
+                 'animation': 'enemy-flying', 'speed': 1.0, 'range': 128},
+    'floating': {'behaviour': 'floater', 'image': 'enemyFloating',
+                 'animation': 'enemy-flying', 'range': 32, 'period': 2.0},
+}
+
+# Enemy images face left
+_FRAMES = ['1', '2', '3', '4']
+ANIMATIONS['enemy-walking'] = {
+    'right': {'frames': _FRAMES, 'step': 8, 'mirrored': True},
+    'left': {'frames': _FRAMES, 'step': 8},
+}
+ANIMATIONS['enemy-flying'] = {
+    'right': {'frames': _FRAMES, 'frame_time': 0.1, 'mirrored': True},
+    'left': {'frames': _FRAMES, 'frame_time': 0.1},
+}
+
+#: Names of the per-enemy state arrays
+FIELDS = ('x', 'y', 'vx', 'vy', 'width', 'height', 'direction', 'speed',
+          'home_x', 'home_y', 'range', 'period', 'phase')
+
+
+class Enemy(AnimatedSprite):
+    """
+    A pooled enemy sprite.
+
+    Enemies are created and recycled by an :class:`EnemyManager`. Use
+    :meth:`EnemyManager.spawn` instead of creating instances directly.
+    """
+
+    def __init__(self, kind, animation, slot, **kwargs):
+        super().__init__(animation, **kwargs)
+        self.kind = kind
+        self.slot = slot
+        self.active = False
+
+
+class EnemyManager:
+    """
+    Spawn, recycle and update enemies.
+
+    Sprites are never destroyed: despawned enemies return to a pool of their
+    kind and are reused by the next spawn. The pool only grows when all
+    enemies of a kind are in use.
+
+    Walkers follow the same rules as the player's physics engine and collide
+    with the platforms of the given index. A few walkers are simulated one by
+    one, querying the index directly. Larger crowds are simulated by a
+    :class:`fgarcade.batch.BatchPhysicsEngine` built from the platforms
+    around them, which is rebuilt when walkers leave that region or after
+    :meth:`invalidate` is called.
+
+    Args:
+        platforms:
+            Collision index with the query interface of
+            :class:`fgarcade.collision.SpatialGrid`, usually the
+            platform_index of a game.
+        scaling (float):
+            Scale of enemy textures.
+        gravity_constant (float):
+            Gravity acceleration of walkers per step.
+        animator (Animator):
+            Animator shared with other sprites. The owner of the animator is
+            responsible for updating it. If not given, the manager creates
+            and updates its own animator.
+    """
+
+    #: Walkers turn around at the edges of platforms
+    turn_at_ledges = True
+
+    #: Walkers are simulated in batch only if there are at least this many
+    #: of them in the updated region
+    batch_size = 32
+
+    #: Distance (in pixels) around walkers covered by the platforms of the
+    #: batch engine
+    engine_margin = 512
+
+    def __init__(self, platforms=None, scaling=1.0, gravity_constant=0.5,
+                 animator=None):
+        if platforms is None:
+            platforms = SpatialGrid(64 * scaling)
+        self.platforms = platforms
+        self.scaling = scaling
+        self.gravity_constant = gravity_constant
+        self.engine = None
+        self.sprites = arcade.SpriteList(use_spatial_hash=False)
+        self.animator = Animator() if animator is None else animator
+        self._own_animator = animator is None
+        self._engine_region = None
+        self.time = 0.0
+        self.slots = []
+        self.active = np.zeros(0, dtype=bool)
+        self.awake = np.zeros(0, dtype=bool)
+        self.behaviour = np.zeros(0, dtype=np.int8)
+        for field in FIELDS:
+            setattr(self, field, np.zeros(0))
+        self._pools = {}
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def __iter__(self):
+        return iter(self.sprites)
+
+    def _grow(self, n):
+        size = len(self.slots)
+        self.active = np.concatenate([self.active, np.zeros(n, dtype=bool)])
+        self.awake = np.concatenate([self.awake, np.zeros(n, dtype=bool)])
+        self.behaviour = np.concatenate([self.behaviour,
+                                         np.zeros(n, dtype=np.int8)])
+        for field in FIELDS:
+            arr = getattr(self, field)
+            setattr(self, field, np.concatenate([arr, np.zeros(n)]))
+        self.slots.extend([None] * n)
+        return range(size, size + n)
+
+    def reserve(self, kind, n):
+        """
+        Make sure the pool has at least n free enemies of the given kind.
+        """
+        pool = self._pools.setdefault(kind, [])
+        missing = n - len(pool)
+        if missing <= 0:
+            return
+        spec = ENEMIES[kind]
+        template = f'enemy/{spec["image"]}_{{}}'
+        animation = get_animation(spec['animation'], template, self.scaling)
+        for slot in self._grow(missing):
+            enemy = Enemy(kind, animation, slot)
+            self.slots[slot] = enemy
+            pool.append(enemy)
+
+    def spawn(self, kind, x, y, direction=-1, bottom=False):
+        """
+        Activate an enemy of the given kind centered at (x, y).
+
+        The enemy starts moving and animating in the next update inside the
+        simulated region.
+
+        Args:
+            kind (str):
+                Enemy kind in :data:`ENEMIES`.
+            x, y (float):
+                Initial position.
+            direction (int):
+                Initial direction: -1 for left and 1 for right.
+            bottom (bool):
+                If True, y is the bottom of the enemy instead of its center.
+        """
+        pool = self._pools.get(kind)
+        if not pool:
+            # Double the number of enemies of this kind
+            n = sum(1 for enemy in self.slots if enemy.kind == kind)
+            self.reserve(kind, max(n, 8))
+            pool = self._pools[kind]
+        enemy = pool.pop()
+        spec = ENEMIES[kind]
+        slot = enemy.slot
+        if bottom:
+            y += enemy.height / 2
+
+        enemy.active = True
+        enemy.position = (x, y)
+        enemy.change_x = enemy.change_y = 0
+        self.active[slot] = True
+        self.behaviour[slot] = BEHAVIOURS[spec['behaviour']]
+        self.x[slot], self.y[slot] = x, y
+        self.home_x[slot], self.home_y[slot] = x, y
+        self.vx[slot] = self.vy[slot] = 0.0
+        self.direction[slot] = 1 if direction > 0 else -1
+        self.speed[slot] = spec.get('speed', 0.0) * self.scaling
+        self.range[slot] = spec.get('range', 0.0) * self.scaling
+        self.period[slot] = spec.get('period', 1.0)
+        self.phase[slot] = -2 * np.pi * self.time / self.period[slot]
+        self.width[slot] = enemy.width
+        self.height[slot] = enemy.height
+
+        self.sprites.append(enemy)
+        return enemy
+
+    def despawn(self, enemy):
+        """
+        Deactivate enemy and return it to its pool.
+        """
+        if not enemy.active:
+            return
+        slot = enemy.slot
+        if self.awake[slot]:
+            self.animator.remove(enemy)
+        enemy.active = False
+        self.active[slot] = self.awake[slot] = False
+        swap_remove_sprite(self.sprites, enemy)
+        self._pools[enemy.kind].append(enemy)
+
+    def clear(self):
+        """
+        Despawn all enemies.
+        """
+        for enemy in list(self.sprites):
+            self.despawn(enemy)
+
+    #
+    # Simulation
+    #
+    def invalidate(self):
+        """
+        Discard the platforms cached by the batch engine of walkers.
+
+        Call this method after platforms are added or removed.
+        """
+        self.engine = None
+        self._engine_region = None
+
+    def update(self, dt, region=None):
+        """
+        Advance all active enemies by a single step of duration dt.
+
+        Args:
+            dt (float):
+                Duration of the step, in seconds.
+            region:
+                Optional (left, bottom, right, top) region. Enemies outside
+                the region are frozen and not animated until they are inside
+                it again.
+        """
+        self.time += dt
+        awake = self.active
+        if region is not None:
+            left, bottom, right, top = region
+            x, y = self.x, self.y
+            awake = (awake & (x >= left) & (x <= right)
+                     & (y >= bottom) & (y <= top))
+        self._set_awake(awake)
+
+        idx = np.flatnonzero(awake)
+        if not len(idx):
+            if self._own_animator:
+                self.animator.update(dt)
+            return
+        behaviour = self.behaviour[idx]
+        walkers = idx[behaviour == WALKER]
+        flyers = idx[behaviour == FLYER]
+        floaters = idx[behaviour == FLOATER]
+        if len(walkers) >= self.batch_size:
+            self._update_walkers(walkers)
+        elif len(walkers):
+            self._update_walker_list(walkers.tolist())
+        if len(flyers):
+            self._update_flyers(flyers)
+        if len(floaters):
+            self._update_floaters(floaters)
+
+        slots = self.slots
+        data = zip(idx.tolist(), self.x[idx].tolist(), self.y[idx].tolist(),
+                   self.vx[idx].tolist(), self.vy[idx].tolist())
+        for i, x, y, vx, vy in data:
+            enemy = slots[i]
+            enemy.position = (x, y)
+            enemy.change_x = vx
+            enemy.change_y = vy
+        if self._own_animator:
+            self.animator.update(dt)
+
+    def _set_awake(self, awake):
+        changed = np.flatnonzero(awake != self.awake)
+        if not len(changed):
+            return
+        animator, slots = self.animator, self.slots
+        for i in changed.tolist():
+            if awake[i]:
+                animator.add(slots[i])
+            else:
+                animator.remove(slots[i])
+        self.awake = awake.copy()
+
+    def _walker_engine(self, idx):
+        # Return a batch engine with all platforms that walkers can reach in
+        # the next step.
+        x, y = self.x[idx], self.y[idx]
+        width, height = self.width[idx], self.height[idx]
+        left, bottom = (x - width).min(), (y - height).min()
+        right, top = (x + width).max(), (y + height).max()
+        region = self._engine_region
+        if (region is None or left < region[0] or bottom < region[1]
+                or right > region[2] or top > region[3]):
+            margin = self.engine_margin
+            region = (left - margin, bottom - margin,
+                      right + margin, top + margin)
+            self.engine = BatchPhysicsEngine(
+                self.platforms.query(*region),
+                gravity_constant=self.gravity_constant,
+                cell_size=64 * self.scaling,
+            )
+            self._engine_region = region
+        return self.engine
+
+    def _update_walkers(self, idx):
+        engine = self._walker_engine(idx)
+        direction = self.direction[idx]
+        engine.center_x = self.x[idx]
+        engine.center_y = self.y[idx]
+        engine.change_x = direction * self.speed[idx]
+        engine.change_y = self.vy[idx]
+        engine.width = self.width[idx]
+        engine.height = self.height[idx]
+        engine.update()
+
+        # Turn around at walls and, optionally, at the edges of platforms
+        turn = engine.change_x == 0
+        if self.turn_at_ledges:
+            turn |= engine.can_jump() & ~engine.has_floor_ahead(direction)
+        direction[turn] *= -1
+
+        self.direction[idx] = direction
+        self.x[idx] = engine.center_x
+        self.y[idx] = engine.center_y
+        self.vx[idx] = direction * self.speed[idx]
+        self.vy[idx] = engine.change_y
+
+    def _update_walker_list(self, idx):
+        # Same rules of _update_walkers() applied to one walker at a time.
+        # Vectorized steps have a fixed cost that is much larger than the
+        # cost of simulating a few walkers in plain Python.
+        query = self.platforms.query
+        gravity = self.gravity_constant
+        max_speed = BatchPhysicsEngine.max_speed
+        recover = BatchPhysicsEngine.recover
+        arrays = (self.x, self.y, self.vy, self.width, self.height,
+                  self.direction, self.speed)
+
+        for i in idx:
+            cx, cy, vy, width, height, direction, speed = \
+                [arr.item(i) for arr in arrays]
+            body = Body(cx, cy, direction * speed, vy, width, height)
+            move_body(body, gravity, max_speed)
+            push_out(body, query(*body.edges()), recover)
+
+            # Turn around at walls and at the edges of the floor, only
+            # checked for walkers standing on it
+            turn = body.change_x == 0
+            if not turn and self.turn_at_ledges:
+                left, bottom, right, top = body.edges()
+                ahead = right + 1 if direction > 0 else left - 1
+                standing = has_floor = False
+                hits = query(min(left, ahead - 1), bottom - 8,
+                             max(right, ahead + 1), top - 2)
+                for hit in hits:
+                    standing = standing or (
+                        hit.left < right and hit.right > left
+                        and bottom - 2 < hit.top and top - 2 > hit.center_y)
+                    has_floor = has_floor or (
+                        hit.left < ahead + 1 and hit.right > ahead - 1
+                        and hit.bottom < bottom - 1 and hit.top > bottom - 8)
+                turn = standing and not has_floor
+            if turn:
+                direction = -direction
+
+            self.x[i], self.y[i] = body.center_x, body.center_y
+            self.direction[i] = direction
+            self.vx[i] = direction * speed
+            self.vy[i] = body.change_y
+
+    def _update_flyers(self, idx):
+        direction = self.direction[idx]
+        x = self.x[idx] + direction * self.speed[idx]
+        offset = (x - self.home_x[idx]) * direction
+        direction[offset >= self.range[idx]] *= -1
+        self.direction[idx] = direction
+        self.vx[idx] = x - self.x[idx]
+        self.vy[idx] = 0.0
+        self.x[idx] = x
+
+    def _update_floaters(self, idx):
+        angle = 2 * np.pi * self.time / self.period[idx] + self.phase[idx]
+        y = self.home_y[idx] + self.range[idx] * np.sin(angle)
+        self.vx[idx] = 0.0
+        self.vy[idx] = y - self.y[idx]
+        self.y[idx] = y
+
+    def collide(self, obj):
+        """
+        Return a list of active enemies that overlap the given object.
+        """
+        sprites = self.sprites
+        if len(sprites) < self.batch_size:
+            left, bottom, right, top = obj.left, obj.bottom, obj.right, obj.top
+            hits = []
+            for enemy in sprites:
+                i = enemy.slot
+                x, y = self.x.item(i), self.y.item(i)
+                half_w, half_h = self.width.item(i) / 2, self.height.item(i) / 2
+                if (x - half_w < right and x + half_w > left
+                        and y - half_h < top and y + half_h > bottom):
+                    hits.append(enemy)
+            return hits
+
+        idx = np.flatnonzero(self.active)
+        half_w = self.width[idx] / 2
+        half_h = self.height[idx] / 2
+        x, y = self.x[idx], self.y[idx]
+        hit = ((x - half_w < obj.right) & (x + half_w > obj.left)
+               & (y - half_h < obj.top) & (y + half_h > obj.bottom))
+        slots = self.slots
+        return [slots[i] for i in idx[hit].tolist()]
+
+    def draw(self):
+        """
+        Draw active enemies.
+        """
+        self.sprites.draw()
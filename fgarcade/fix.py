@@ -16,3 +16,50 @@ def fix_all():
     """
 
     SpriteList.extend = extend_sprite_list
+
+
+def reset_sprite_list(lst: SpriteList, iterable=()):
+    """
+    Replace all elements of a sprite list by the sprites in iterable.
+
+    This is much faster than removing sprites one by one, since
+    SpriteList.remove() rebuilds its index after each removal.
+    """
+    sprites = list(iterable)
+    for sprite in lst.sprite_list:
+        try:
+            sprite.sprite_lists.remove(lst)
+        except ValueError:
+            pass
+    lst.sprite_list = []
+    lst.sprite_idx = {}
+    lst.vao = None
+    if lst.use_spatial_hash:
+        lst.spatial_hash.reset()
+    for sprite in sprites:
+        lst.append(sprite)
+
+
+def swap_remove_sprite(lst: SpriteList, sprite):
+    """
+    Remove sprite from a sprite list in constant time.
+
+    The last sprite of the list takes the place of the removed one, so the
+    drawing order is not preserved. Unlike SpriteList.remove(), the index
+    and the buffers used for drawing are updated in place instead of being
+    rebuilt.
+    """
+    idx = lst.sprite_idx.pop(sprite)
+    last = len(lst.sprite_list) - 1
+    moved = lst.sprite_list.pop()
+    if idx != last:
+        lst.sprite_list[idx] = moved
+        lst.sprite_idx[moved] = idx
+        if lst.vao is not None:
+            lst.sprite_data[idx] = lst.sprite_data[last]
+    try:
+        sprite.sprite_lists.remove(lst)
+    except ValueError:
+        pass
+    if lst.use_spatial_hash:
+        lst.spatial_hash.remove_object(sprite)
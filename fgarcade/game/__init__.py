@@ -1,5 +1,29 @@
-from .base import GameWindow
-from .camera import HasScrollingCameraMixin
-from .platformer import Platformer
-from .background import HasBackgroundMixin
-from .player import Player, HasPlayerMixin
\ No newline at end of file
+from importlib import import_module
+
+#: Map from public names to the modules that define them
+_LAZY_ATTRIBUTES = {
+    'GameWindow': '.base',
+    'HasScrollingCameraMixin': '.camera',
+    'Platformer': '.platformer',
+    'HasBackgroundMixin': '.background',
+    'Player': '.player',
+    'HasPlayerMixin': '.player',
+    'HasEnemiesMixin': '.enemies',
+    'HasProceduralLevelMixin': '.procedural',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    try:
+        module = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
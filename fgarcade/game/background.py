@@ -1,10 +1,9 @@
-from math import ceil
-
 from sidekick import lazy
 
 import arcade
 from .base import GameWindow
 from ..assets import get_sprite_path
+from ..parallax import BakedLayer, ParallaxLayers
 from ..utils import hex_to_color
 
 BACKGROUND_COLOR_MAP = {
@@ -30,70 +29,46 @@ class HasBackgroundMixin(GameWindow):
     def background_theme(self):
         return getattr(self, 'world_color', 'blue')
 
-    #: Near/fixed background sprite lists.
+    #: Near/fixed background layers.
     #: Near background moves with parallax, while far background is fixed.
+    #: Each layer is baked into a single sprite that wraps around as the
+    #: camera moves.
     @lazy
     def background_near(self):
         path = f'background/{self.background_theme}/hills'
-        return repeat(get_sprite_path(path), self.width)
+        return BakedLayer(get_sprite_path(path), self.width, self.height,
+                          ratio=getattr(self, 'parallax_ratio', 0.1))
 
     @lazy
     def background_fixed(self):
         path = f'background/{self.background_theme}/tiles'
-        width = self.scene_horizontal_end * self.parallax_ratio
-        return repeat(get_sprite_path(path), width)
+        return BakedLayer(get_sprite_path(path), self.width, self.height)
+
+    #: Layers that scroll with their own parallax ratios. Register layers
+    #: with parallax_layers.add_image(), parallax_layers.add_sprites() or
+    #: parallax_layers.add(). The fixed and near background layers are the
+    #: first ones.
+    @lazy
+    def parallax_layers(self):
+        layers = ParallaxLayers(self.width, self.height)
+        layers.add(self.background_fixed)
+        layers.add(self.background_near)
+        return layers
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        arcade.set_background_color(self.background_color)
+        if not self.headless:
+            arcade.set_background_color(self.background_color)
 
     def on_viewport_changed(self):
-        """
-        Hook called when viewport changes. Update background using parallax.
-        """
-        # Adjust fixed background parallax
-        dx = self.background_fixed[0].left - \
-             self.viewport_horizontal_start
-        dy = self.background_fixed[0].bottom - \
-             self.viewport_vertical_start
-        self.background_fixed.move(round(-dx), round(-dy))
-
-        # Adjust hills parallax
-        dx = self.background_near[0].left - \
-             self.viewport_horizontal_start * (1 - self.parallax_ratio)
-        dy = self.background_near[0].bottom - \
-             self.viewport_vertical_start * (1 - self.parallax_ratio)
-        self.background_near.move(round(-dx), round(-dy))
-
-    def draw_background(self):
-        """
-        Draw background.
-        """
-        self.background_fixed.draw()
-        self.background_near.draw()
+        super().on_viewport_changed()
+        self.parallax_layers.update(self.viewport_horizontal_start,
+                                    self.viewport_vertical_start)
 
     def draw_background_elements(self):
-        super().draw_elements()
-        self.draw_background()
-
-
-#
-# Auxiliary functions
-#
-def repeat(img, total_width):
-    """
-    Repeat background tiles
-    """
-    lst = arcade.SpriteList(use_spatial_hash=False)
-    tile = arcade.Sprite(img)
-    width = tile.right - tile.left
-    repeat_n = int(ceil(total_width / width))
-    tile.left = tile.bottom = 0
-    lst.append(tile)
+        super().draw_background_elements()
+        self.parallax_layers.draw_background()
 
-    for n in range(1, repeat_n + 1):
-        tile = arcade.Sprite(img)
-        tile.bottom = 0
-        tile.left = n * width
-        lst.append(tile)
-    return lst
+    def draw_foreground_elements(self):
+        super().draw_foreground_elements()
+        self.parallax_layers.draw_foreground()
@@ -1,5 +1,9 @@
 import arcade
+from ..assets import preload_textures
 from ..enums import Command
+from ..fix import fix_all
+from ..profiler import FrameProfiler
+from ..replay import Recording, replay
 
 COMMAND_MAP = {
     arcade.key.LEFT: Command.LEFT,
@@ -14,6 +18,8 @@ COMMAND_MAP = {
     arcade.key.S: Command.ASDW_DOWN,
 }
 
+fix_all()
+
 
 class GameWindow(arcade.Window):
     """
@@ -35,16 +41,61 @@ class GameWindow(arcade.Window):
     #: Simulation time
     time = 0
 
+    #: Interval between consecutive calls to update(), in seconds. This is
+    #: also the rendering rate.
+    update_rate = 1 / 60
+
+    #: If given, update() advances the simulation in fixed steps of this
+    #: duration, regardless of the time elapsed between frames. Leftover time
+    #: is accumulated and consumed in the following frames.
+    fixed_timestep = None
+
+    #: Maximum number of fixed steps a single frame may run to catch up with
+    #: the accumulated time. Time beyond this limit is discarded, so the game
+    #: slows down instead of freezing when simulation cannot keep up.
+    max_substeps = 5
+
+    #: Fraction of a fixed step accumulated but not simulated yet. Renderers
+    #: may use it to blend positions between the two last simulation steps.
+    interpolation_alpha = 1.0
+    _time_accumulator = 0.0
+
+    #: Headless games do not open a window or create an OpenGL context.
+    #: Nothing is drawn and frames are advanced manually with simulate().
+    headless = False
+
     #: Initial command
     commands = Command.NONE
 
     #: Mapping between keys and commands
     command_map = COMMAND_MAP
 
+    #: Sprite names or (name, mirrored) pairs with textures that are decoded
+    #: in parallel by setup(), before calling init().
+    preloaded_textures = ()
+
+    #: Frame profiler, if enabled. See enable_profiler().
+    profiler = None
+
+    #: If True, draw the profiler report on screen
+    show_profiler = True
+
+    #: Recording that receives the commands of each step, if any. See
+    #: start_recording().
+    recording = None
+
     def __init__(self, width=None, height=None, title=None, **kwargs):
-        super().__init__(width or self.width,
-                         height or self.height,
-                         title or self.title)
+        self.headless = kwargs.pop('headless', self.headless)
+        if self.headless:
+            self.width = width or self.width
+            self.height = height or self.height
+            self.title = title or self.title
+        else:
+            super().__init__(width or self.width,
+                             height or self.height,
+                             title or self.title,
+                             update_rate=kwargs.get('update_rate',
+                                                    self.update_rate))
 
         for k, v in kwargs.items():
             if hasattr(self, k) and not k.startswith('_'):
@@ -64,6 +115,9 @@ class GameWindow(arcade.Window):
         self.draw_background_elements()
         self.draw_elements()
         self.draw_foreground_elements()
+        if self.profiler is not None and self.show_profiler:
+            left, _, _, top = arcade.get_viewport()
+            self.profiler.draw_overlay(left + 10, top - 10)
         arcade.finish_render()
 
     def draw_elements(self):
@@ -86,11 +140,48 @@ class GameWindow(arcade.Window):
     def update(self, dt):
         """
         Update simulation by interval dt.
+
+        If fixed_timestep is set, dt is added to an accumulator and the
+        simulation runs as many fixed steps as fit in it, up to max_substeps.
+        """
+        if self.profiler is not None:
+            self.profiler.tick()
+        step = self.fixed_timestep
+        if not step:
+            self.step(dt)
+            return
+
+        acc = self._time_accumulator + dt
+        n_steps = 0
+        while acc >= step and n_steps < self.max_substeps:
+            self.step(step)
+            acc -= step
+            n_steps += 1
+        if acc >= step:
+            acc %= step
+        self._time_accumulator = acc
+        self.interpolation_alpha = acc / step
+
+    def step(self, dt):
         """
+        Advance simulation by a single step of duration dt.
+        """
+        if self.recording is not None:
+            self.recording.append(self.commands)
         self.start_update(dt)
         self.update_elements(dt)
         self.finish_update(dt)
 
+    def interpolate(self, previous, current):
+        """
+        Blend two (x, y) positions from consecutive simulation steps using
+        the current interpolation_alpha.
+        """
+        alpha = self.interpolation_alpha
+        x0, y0 = previous
+        x1, y1 = current
+        return x0 + (x1 - x0) * alpha, y0 + (y1 - y0) * alpha
+
     def start_update(self, dt):
         """
         Updates the clock tick and performs any other work before updating
@@ -147,11 +238,126 @@ class GameWindow(arcade.Window):
         Used to initialize world.
         """
 
-    def run(self):
+    def setup(self):
         """
-        Run platformer.
+        Initialize world, if it was not initialized before.
         """
         if not self._has_init:
+            self.preload_assets()
             self.init()
             self._has_init = True
+
+    def get_preloaded_textures(self):
+        """
+        Return a list of sprite names or (name, mirrored) pairs that should
+        be loaded before init().
+
+        Subclasses may extend the list returned by super().
+        """
+        return list(self.preloaded_textures)
+
+    def preload_assets(self):
+        """
+        Decode textures returned by get_preloaded_textures() on a pool of
+        threads.
+        """
+        names = self.get_preloaded_textures()
+        preload_textures(names, scale=self.scaling,
+                         callback=self.on_preload_progress)
+
+    def on_preload_progress(self, done, total):
+        """
+        Hook called each time a texture is preloaded, with the number of
+        loaded textures and the total number of textures.
+        """
+
+    def run(self):
+        """
+        Run platformer.
+        """
+        if self.headless:
+            raise RuntimeError('headless games must be advanced with '
+                               'simulate()')
+        self.setup()
         arcade.run()
+
+    def simulate(self, frames=1, dt=None, commands=None):
+        """
+        Run the given number of simulation steps without rendering anything.
+
+        Args:
+            frames (int):
+                Number of simulation steps.
+            dt (float):
+                Duration of each step. Defaults to fixed_timestep or, if it is
+                not set, to update_rate.
+            commands (Command):
+                If given, set the active commands before running the first
+                step.
+        """
+        self.setup()
+        if commands is not None:
+            self.commands = commands
+        dt = dt or self.fixed_timestep or self.update_rate
+        step = self.step
+        profiler = self.profiler
+        if profiler is None:
+            for _ in range(frames):
+                step(dt)
+        else:
+            for _ in range(frames):
+                profiler.tick()
+                step(dt)
+
+    #
+    # Profiling
+    #
+    def enable_profiler(self, window=600):
+        """
+        Start timing each update and draw hook and return the profiler.
+
+        Args:
+            window (int):
+                Number of frames used to compute rolling percentiles.
+        """
+        if self.profiler is None:
+            FrameProfiler(window).attach(self)
+        return self.profiler
+
+    def disable_profiler(self):
+        """
+        Stop profiling and return the profiler with the collected data.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.detach()
+        return profiler
+
+    #
+    # Recording and replay
+    #
+    def start_recording(self):
+        """
+        Start recording the commands used in each simulation step.
+
+        Sessions are reproduced exactly only if all steps have the same
+        duration, hence games should be recorded with fixed_timestep set.
+        """
+        dt = self.fixed_timestep or self.update_rate
+        self.recording = Recording(dt=dt)
+        return self.recording
+
+    def stop_recording(self):
+        """
+        Stop recording and return the recorded session.
+        """
+        recording, self.recording = self.recording, None
+        return recording
+
+    def replay(self, recording, callback=None):
+        """
+        Run all steps of a recording as fast as possible, without rendering.
+
+        See :func:`fgarcade.replay.replay`.
+        """
+        return replay(self, recording, callback)
@@ -2,6 +2,7 @@ from sidekick import lazy
 
 import arcade
 from .base import GameWindow
+from ..camera import Camera
 
 
 class HasScrollingCameraMixin(GameWindow):
@@ -19,6 +20,14 @@ class HasScrollingCameraMixin(GameWindow):
     viewport_margin_horizontal = 200
     viewport_margin_vertical = 120
 
+    #: Approximate time in seconds the camera takes to catch up with the
+    #: reference point. Zero moves the camera immediately.
+    camera_smoothing = 0.0
+
+    #: Displace the reference point horizontally by its velocity times this
+    #: value, in seconds, so the camera shows more of what lies ahead.
+    camera_look_ahead = 0.0
+
     #: x, y coordinates for the start of viewport area
     viewport_horizontal_start = 0
     viewport_vertical_start = 0
@@ -38,6 +47,20 @@ class HasScrollingCameraMixin(GameWindow):
     scene_vertical_start = 0
     scene_vertical_end = lazy(lambda _: _.height)
 
+    #: Camera that computes the position of the viewport
+    camera = lazy(lambda _: Camera(
+        _.width, _.height,
+        margin_x=_.viewport_margin_horizontal,
+        margin_y=_.viewport_margin_vertical,
+        smoothing=_.camera_smoothing,
+        look_ahead=_.camera_look_ahead,
+        x=_.viewport_horizontal_start,
+        y=_.viewport_vertical_start,
+    ))
+
+    #: Rounded (left, right, bottom, top) viewport sent to OpenGL
+    _projection = None
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._viewport_focus = (
@@ -51,6 +74,10 @@ class HasScrollingCameraMixin(GameWindow):
         """
         Move object relative to viewport using paralax effect.
 
+        This moves every sprite in obj. Prefer registering a layer in
+        HasBackgroundMixin.parallax_layers, which only stores an offset per
+        layer.
+
         Args:
             obj:
                 Displaced object
@@ -95,49 +122,38 @@ class HasScrollingCameraMixin(GameWindow):
     #
     def update_elements(self, dt):
         super().update_elements(dt)
-        self.update_viewport()
+        self.update_viewport(dt)
 
-    def update_viewport(self):
+    def update_viewport(self, dt=None):
         """
         Update viewport to include the focused viewport area.
         """
-        xmin, ymin, xmax, ymax = self.get_viewport_focus()
-        changed = False
-
-        dx = self.viewport_margin_horizontal
-        dy = self.viewport_margin_vertical
-
-        v_xmin = self.viewport_horizontal_start
-        v_xmax = self.viewport_horizontal_end
-        v_ymin = self.viewport_vertical_start
-        v_ymax = self.viewport_vertical_end
-
-        # Check if player changed the viewport
-        if xmin < v_xmin + dx:
-            self.viewport_horizontal_start = \
-                max(self.scene_horizontal_start, xmin - dx)
-            changed = True
-
-        if xmax > v_xmax - dx:
-            self.viewport_horizontal_start = \
-                min(self.scene_horizontal_end - self.width,
-                    xmax + dx - self.width)
-            changed = True
-
-        if ymin < v_ymin + dy:
-            self.viewport_vertical_start = \
-                max(self.scene_vertical_start, ymin - dy)
-            changed = True
-
-        if ymax > v_ymax - dy:
-            self.viewport_vertical_start = \
-                min(self.scene_vertical_end - self.width,
-                    ymax + dy - self.height)
-            changed = True
-
-        if changed:
-            self.on_viewport_changed()
-            arcade.set_viewport(round(self.viewport_horizontal_start),
-                                round(self.viewport_horizontal_end),
-                                round(self.viewport_vertical_start),
-                                round(self.viewport_vertical_end))
+        camera = self.camera
+        camera.bounds = (self.scene_horizontal_start,
+                         self.scene_vertical_start,
+                         self.scene_horizontal_end,
+                         self.scene_vertical_end)
+        if not camera.update(self.get_viewport_focus(),
+                             dt or self.update_rate):
+            return
+
+        self.viewport_horizontal_start = camera.x
+        self.viewport_vertical_start = camera.y
+        self.on_viewport_changed()
+        if not self.headless:
+            self.apply_viewport()
+
+    def apply_viewport(self):
+        """
+        Set the OpenGL projection to the current viewport, rounded to whole
+        pixels.
+
+        The projection is only updated if the rounded viewport changed.
+        """
+        projection = (round(self.viewport_horizontal_start),
+                      round(self.viewport_horizontal_end),
+                      round(self.viewport_vertical_start),
+                      round(self.viewport_vertical_end))
+        if projection != self._projection:
+            self._projection = projection
+            arcade.set_viewport(*projection)
@@ -0,0 +1,119 @@
+from sidekick import lazy
+
+from .base import GameWindow
+from ..enemies import EnemyManager
+
+
+class HasEnemiesMixin(GameWindow):
+    """
+    Mixin that adds pooled enemies to the game.
+
+    Enemies are updated in batches by an :class:`fgarcade.enemies.EnemyManager`
+    and walkers collide with the platform_index, like the player. Enemies far
+    from the viewport are frozen until the camera gets close to them.
+
+    It must be combined with the platforms mixin, usually by subclassing
+    :class:`fgarcade.Platformer`.
+    """
+
+    #: Scaling for assets
+    scaling = 1.0
+
+    #: Gravity constant
+    gravity_constant = 0.5
+
+    #: Enemies are only updated inside the viewport extended by this
+    #: distance (in pixels)
+    enemy_margin = 256
+
+    #: Sprite list with active enemies
+    enemies = lazy(lambda _: _.enemy_manager.sprites)
+
+    #: Tilemap version seen by the physics of walkers
+    _enemy_physics_version = None
+
+    @lazy
+    def enemy_manager(self):
+        """
+        Manages the state of all enemies.
+        """
+        return EnemyManager(self.platform_index, self.scaling,
+                            self.gravity_constant,
+                            animator=getattr(self, 'animator', None))
+
+    def create_enemy(self, kind, coords=(0, 0), direction=-1):
+        """
+        Create enemy standing on the given tile.
+
+        Args:
+            kind (str):
+                Enemy kind in :data:`fgarcade.enemies.ENEMIES`.
+            coords:
+                Tile coordinates.
+            direction (int):
+                Initial direction: -1 for left and 1 for right.
+        """
+        i, j = coords
+        size = 64 * self.scaling
+        return self.enemy_manager.spawn(kind, size * (i + 0.5), size * j,
+                                        direction, bottom=True)
+
+    def remove_enemy(self, enemy):
+        """
+        Remove enemy from game. Its sprite is recycled by the next enemy of
+        the same kind.
+        """
+        self.enemy_manager.despawn(enemy)
+
+    def get_enemy_region(self):
+        """
+        Return the (left, bottom, right, top) region in which enemies are
+        updated.
+        """
+        left, bottom, right, top = self.get_viewport_region()
+        margin = self.enemy_margin
+        return left - margin, bottom - margin, right + margin, top + margin
+
+    #
+    # Base implementations for class hooks
+    #
+    def on_enemy_collision(self, enemy):
+        """
+        Hook called when the player touches an enemy.
+        """
+
+    #
+    # Hooks and methods overrides
+    #
+    def update_enemies(self, dt):
+        """
+        Update all enemies after a time increment of dt.
+        """
+        manager = self.enemy_manager
+        if not len(manager):
+            return
+        tilemap = self.__dict__.get('tilemap')
+        version = getattr(tilemap, 'version', None)
+        if version != self._enemy_physics_version:
+            manager.invalidate()
+            self._enemy_physics_version = version
+        manager.update(dt, self.get_enemy_region())
+
+        player = self.__dict__.get('player')
+        if player is not None:
+            for enemy in manager.collide(player):
+                self.on_enemy_collision(enemy)
+
+    def update_elements(self, dt):
+        super().update_elements(dt)
+        self.update_enemies(dt)
+
+    def draw_enemies(self):
+        """
+        Draw enemies on screen.
+        """
+        self.enemy_manager.draw()
+
+    def draw_elements(self):
+        super().draw_elements()
+        self.draw_enemies()
@@ -2,11 +2,13 @@ from fgarcade.game.physics import HasPhysicsMixin
 from .background import HasBackgroundMixin
 from .base import GameWindow
 from .camera import HasScrollingCameraMixin
+from .enemies import HasEnemiesMixin
 from .platforms import HasPlatformsMixin
 from .player import HasPlayerMixin
 
 
-class Platformer(HasPhysicsMixin,
+class Platformer(HasEnemiesMixin,
+                 HasPhysicsMixin,
                  HasBackgroundMixin,
                  HasPlatformsMixin,
                  HasPlayerMixin,
@@ -17,6 +19,4 @@ class Platformer(HasPhysicsMixin,
     """
 
     # Sprite lists
-    items = None
-    enemies = None
     animated = None
\ No newline at end of file
@@ -1,10 +1,17 @@
-from functools import partial
-
+import numpy as np
 from sidekick import lazy
 
 import arcade
-from fgarcade.assets import get_tile, get_sprite
+from fgarcade.assets import get_sprite, get_texture, sprite_from_texture
+from fgarcade.chunks import ChunkGrid
+from fgarcade.collision import Box
+from fgarcade.culling import CulledLayer
 from fgarcade.enums import Role
+from fgarcade.fix import reset_sprite_list
+from fgarcade.items import ItemLayer
+from fgarcade.level import LevelData
+from fgarcade.tiled import read_tiled
+from fgarcade.tilemap import TileMap, PlatformIndex
 from .base import GameWindow
 
 
@@ -23,33 +30,273 @@ class HasPlatformsMixin(GameWindow):
     #: Platform list
     platforms = lazy(lambda _: arcade.SpriteList())
 
+    #: Tiles created by create_platform, create_ground, create_ramp and
+    #: create_tower are stored in a compact tile map. Sprites are just the
+    #: visual representation of those tiles and are only created for the
+    #: chunks of the tile map near the viewport.
+    tilemap = lazy(lambda _: TileMap(64 * _.scaling, _.chunk_size or 32))
+
+    #: Sprites of the elements that are not tiles in each layer, if the level
+    #: is not split in chunks.
+    static_sprites = lazy(lambda _: {layer: [] for layer in LAYERS})
+
+    #: Textures for tile kinds that are not regular sprites, such as tiles
+    #: imported from Tiled maps. Maps (kind, color) to textures.
+    tile_textures = lazy(lambda _: {})
+
+    #: Maps serial numbers to (serial, layer, name, x, y, role) records of the
+    #: elements that are not tiles. Used to save levels.
+    level_objects = lazy(lambda _: {})
+
+    #: If True, the physics engine collides with rectangles that merge
+    #: adjacent solid tiles, instead of with each tile. Sprites are still
+    #: drawn per tile.
+    merge_collision_tiles = True
+
+    #: Spatial index for platforms. Physics engine queries tiles and other
+    #: platforms from this index instead of checking the whole list every
+    #: frame.
+    platform_index = lazy(lambda _: PlatformIndex(
+        _.tilemap, 'platforms', 64 * _.scaling,
+        merge=_.merge_collision_tiles))
+
+    #: Collectible items
+    items = lazy(lambda _: ItemLayer(64 * _.scaling))
+
     #: Decorations
     background_decorations = lazy(lambda _: arcade.SpriteList())
     foreground_decorations = lazy(lambda _: arcade.SpriteList())
 
-    #: Geometric properties
+    #: Size of level chunks, in tiles. If given, the sprite lists above only
+    #: hold the elements of chunks near the viewport, while the remaining
+    #: chunks are stored in a compact form. Platforms that are not tiles are
+    #: kept in the platform_index as light-weight boxes, so physics is not
+    #: affected. If None, only tiles are loaded and unloaded in chunks of the
+    #: tile map, while the other elements are always kept as sprites.
+    chunk_size = None
+
+    #: Chunks within this distance from the viewport are loaded (in pixels)
+    chunk_margin = 256
+
     @lazy
-    def scene_horizontal_end(self):
-        return max(max(x.right for x in self.platforms), self.width)
+    def chunks(self):
+        tilemap = self.tilemap
+        chunks = ChunkGrid(tilemap.chunk_size * tilemap.tile_size,
+                           tilemap, self._make_tile_sprite)
+        chunks.set_region(*self.get_chunk_region())
+        return chunks
+
+    #: If True, only draw the static sprites that overlap the viewport. The
+    #: visible sprites are recomputed when the viewport moves to a different
+    #: cell of a grid with the given cell size (in pixels).
+    culling = True
+    culling_cell_size = 256
 
     @lazy
+    def culled_layers(self):
+        size = self.culling_cell_size * self.scaling
+        layers = {layer: CulledLayer(getattr(self, layer), size)
+                  for layer in LAYERS}
+        layers['items'] = CulledLayer(self.items.sprites, size)
+        return layers
+
+    #: Geometric properties. The bounds of platforms are updated
+    #: incrementally, so they remain valid when platforms change at runtime.
+    @property
+    def scene_horizontal_end(self):
+        bounds = self.platform_index.bounds()
+        right = 0 if bounds is None else bounds[2]
+        return max(right, self.width)
+
+    @property
     def scene_vertical_end(self):
-        return max(max(x.top for x in self.platforms), self.height) + 128
+        bounds = self.platform_index.bounds()
+        top = 0 if bounds is None else bounds[3]
+        return max(top, self.height) + 128
 
     #
     # Overrides
     #
     def draw_platforms(self):
-        self.background_decorations.draw()
-        self.platforms.draw()
+        if self.culling:
+            layers = self.culled_layers
+            if layers['platforms'].cells is None:
+                self.update_culling()
+            layers['background_decorations'].draw()
+            layers['platforms'].draw()
+        else:
+            self.background_decorations.draw()
+            self.platforms.draw()
 
     def draw_foreground_decorations(self):
-        self.foreground_decorations.draw()
+        if self.culling:
+            self.culled_layers['foreground_decorations'].draw()
+        else:
+            self.foreground_decorations.draw()
+
+    def draw_items(self):
+        if self.culling:
+            layer = self.culled_layers['items']
+            if layer.cells is None:
+                self.update_culling()
+            layer.draw()
+        else:
+            self.items.draw()
 
     def draw_elements(self):
         self.draw_platforms()
+        self.draw_items()
         super().draw_elements()
 
+    def update_items(self, dt):
+        """
+        Collect all items touched by the player.
+        """
+        player = self.__dict__.get('player')
+        if player is None or not self.items:
+            return
+        for item in self.items.collide(player):
+            self.remove_item(item)
+            self.on_item_collected(item)
+
+    def update_elements(self, dt):
+        super().update_elements(dt)
+        self.update_items(dt)
+
+    def on_item_collected(self, item):
+        """
+        Hook called after the player collects an item. The item was already
+        removed from the game.
+        """
+
+    def on_viewport_changed(self):
+        super().on_viewport_changed()
+        self.update_chunks()
+        self.update_culling()
+
+    #
+    # Chunks and culling
+    #
+    def get_viewport_region(self):
+        """
+        Return the (left, bottom, right, top) region shown on screen.
+        """
+        x = getattr(self, 'viewport_horizontal_start', 0)
+        y = getattr(self, 'viewport_vertical_start', 0)
+        return x, y, x + self.width, y + self.height
+
+    def get_chunk_region(self):
+        """
+        Return the (left, bottom, right, top) region in which chunks should
+        be loaded.
+        """
+        left, bottom, right, top = self.get_viewport_region()
+        margin = self.chunk_margin
+        return left - margin, bottom - margin, right + margin, top + margin
+
+    def update_culling(self):
+        """
+        Recompute the visible sprites of each layer.
+        """
+        if not self.culling:
+            return
+        region = self.get_viewport_region()
+        for layer in self.culled_layers.values():
+            layer.set_viewport(*region)
+
+    def update_chunks(self):
+        """
+        Load chunks near the viewport and unload the distant ones.
+        """
+        chunks = self.chunks
+        if chunks.set_region(*self.get_chunk_region()):
+            self.__reset_layers()
+
+    def __reset_layers(self):
+        chunks = self.chunks
+        static = self.static_sprites if self.chunk_size is None else None
+        for layer in LAYERS:
+            sprites = chunks.sprites(layer)
+            if static is not None:
+                sprites = static[layer] + sprites
+            reset_sprite_list(getattr(self, layer), sprites)
+            if self.culling:
+                self.culled_layers[layer].rebuild()
+
+    #
+    # Saving and loading levels
+    #
+    def save_level(self, path):
+        """
+        Save tiles, objects and the player initial tile to the given path.
+
+        Levels are saved in a compact binary format, unless path ends with
+        .json.
+        """
+        data = LevelData.from_tilemap(
+            self.tilemap, list(self.level_objects.values()),
+            getattr(self, 'player_initial_tile', None))
+        data.save(path)
+
+    def load_level(self, path):
+        """
+        Add all elements of a level saved with save_level() to the world.
+
+        Accepts a path or a :class:`fgarcade.level.LevelData` instance.
+        """
+        data = path if isinstance(path, LevelData) else LevelData.load(path)
+        tilemap = self.tilemap
+        if data.tile_size != tilemap.tile_size:
+            raise ValueError('level was saved with a different scaling')
+
+        # Write all tiles in bulk, keeping their relative order
+        tiles = data.tiles
+        offset = tilemap.next_serial()
+        serial = tiles['serial'].astype(np.int64) + offset
+        palette = [tilemap.tile_type(*x) for x in data.palette]
+        palette = np.array([0, *palette], dtype=np.uint16)
+        masks = [tiles['layer'] == idx for idx in range(len(data.layers))]
+        for layer, mask in zip(data.layers, masks):
+            tilemap.set_many(layer, tiles['i'][mask], tiles['j'][mask],
+                             palette[tiles['tile'][mask]], tiles['role'][mask],
+                             serial[mask])
+
+        for obj_serial, layer, name, x, y, role in data.objects:
+            sprite = sprite_from_texture(self._tile_texture(name),
+                                         center_x=x, center_y=y)
+            sprite.role = Role(role)
+            if layer == 'items':
+                self.__add_item(sprite, name, obj_serial + offset)
+            else:
+                self.__register(sprite, layer, name, obj_serial + offset)
+
+        # Sprites of tiles are created by the chunks near the viewport
+        self.chunks.reload()
+        self.__reset_layers()
+
+        # Move player
+        tile = data.player_initial_tile
+        if tile is not None and hasattr(self, 'player_initial_tile'):
+            self.player_initial_tile = tile
+            if 'player' in self.__dict__:
+                x, y = tile
+                self.player.position = (int(64 * x + 32), int(64 * y + 32))
+        return data
+
+    def load_tiled(self, path):
+        """
+        Add the tile and object layers of a map created with the Tiled editor
+        (.tmx or .json) to the world.
+
+        Elements go to platforms, background_decorations or
+        foreground_decorations according to their roles. Roles are read from
+        the "role" property of tiles or layers (e.g., "platform", "ramp_up")
+        or, if it is not set, from layer names such as "background".
+        """
+        data, textures = read_tiled(path, self.tilemap.tile_size)
+        self.tile_textures.update(textures)
+        return self.load_level(data)
+
     def draw_foreground_elements(self):
         super().draw_foreground_elements()
         self.draw_foreground_decorations()
@@ -90,13 +337,12 @@ class HasPlatformsMixin(GameWindow):
         kwargs_.pop('smooth_ends', None)
         role_fill, role_top = roles
 
-        new = partial(self._get_tile, role=role_fill, **kwargs_)
         if height > 1:
             x, y = coords
             for j in range(height - 1):
                 for i in range(size):
-                    pos = ((x + i) * 64 + 32, (y - j) * 64 - 32)
-                    self.__append(new('e1', position=pos))
+                    self.__set_tile(x + i, y - j - 1, 'e1', role_fill,
+                                    **kwargs_)
 
         return self.create_platform(
             size, coords, right=endr, left=endl, middle='g', single='gs',
@@ -128,30 +374,26 @@ class HasPlatformsMixin(GameWindow):
             middle ({'p'}):
                 Sprite used at each position on the platform.
         """
-        scale = self.scaling
         lst = []
         x, y = coords
-        x = (x * 64 + 32) * scale
-        y = (y * 64 + 32) * scale
-        dx = 64 * scale
-        add = lambda x, **kwargs: lst.append(self._get_tile(x, role=role, **kwargs))
+        add = lambda kind, i: \
+            lst.append(self.__set_tile(x + i, y, kind, role, **kwargs))
 
         if size <= 0:
             raise ValueError('size must be positive')
         elif size == 1:
-            add(single if smooth_ends else middle, position=(x, y))
+            add(single if smooth_ends else middle, 0)
         elif size == 2:
-            add(left if smooth_ends else middle, position=(x, y))
-            add(right if smooth_ends else middle, position=(x + dx, y))
+            add(left if smooth_ends else middle, 0)
+            add(right if smooth_ends else middle, 1)
         else:
-            add(left if smooth_ends else middle, position=(x, y))
+            add(left if smooth_ends else middle, 0)
             for n in range(1, size - 1):
-                add(middle, position=(x + n * dx, y))
-            pos = (x + (size - 1) * dx, y)
-            add(right if smooth_ends else middle, position=pos)
+                add(middle, n)
+            add(right if smooth_ends else middle, size - 1)
 
-        self.__extend(lst)
-        return lst
+        # Tiles in unloaded chunks do not have sprites
+        return [sprite for sprite in lst if sprite is not None]
 
     def create_ramp(self, direction, size, coords=(0, 0), fill=True, **kwargs):
         """
@@ -181,21 +423,24 @@ class HasPlatformsMixin(GameWindow):
             raise TypeError("direction must be either 'up' or 'down'")
         bottom = 'e1'
         x, y = coords
-        new = partial(self._get_tile, **kwargs)
+        role = kwargs.pop('role', None)
+        background = 'background_decorations'
+
+        # Ramps going down start half a tile below the given coordinates
+        if u == -1:
+            y -= 1
 
         for i in range(size):
-            tile = new(top, position=(x * 64 + 32, y * 64 + 32 * u))
-            self.platforms.append(tile)
+            self.__set_tile(x, y, top, role, layer='platforms', **kwargs)
 
             if i != skip:
-                tile = new(bottom, position=(x * 64 + 32, (y - 1) * 64 + 32 * u))
-                self.background_decorations.append(tile)
+                self.__set_tile(x, y - 1, bottom, role, layer=background,
+                                **kwargs)
 
             if fill:
                 for j in range(0, skip + u * i - 1):
-                    pos = (x * 64 + 32, (y - j - 2) * 64 + u * 32)
-                    tile = new('e1', role=Role.BACKGROUND, position=pos)
-                    self.background_decorations.append(tile)
+                    self.__set_tile(x, y - j - 2, 'e1', Role.BACKGROUND,
+                                    layer=background, **kwargs)
             x += 1
             y += u
 
@@ -220,11 +465,12 @@ class HasPlatformsMixin(GameWindow):
         """
         Create a new block at given coordinates.
         """
-        sprite = get_sprite(f'other/block/{name}',
+        name = f'other/block/{name}'
+        sprite = get_sprite(name,
                             scale=self.scaling,
                             position=self.tile_to_position(*coords),
                             role=role)
-        self.__append(sprite)
+        self.__append(sprite, name=name)
 
     def create_arrow(self, name, coords=(0, 0), role=Role.BACKGROUND):
         """
@@ -233,11 +479,50 @@ class HasPlatformsMixin(GameWindow):
         x, y = coords
         x += 0.5
         y += 0.4
-        sprite = get_sprite(f'other/arrows/{name}',
+        name = f'other/arrows/{name}'
+        sprite = get_sprite(name,
                             scale=self.scaling,
                             position=self.tile_to_position(x, y),
                             role=role)
-        self.__append(sprite)
+        self.__append(sprite, name=name)
+
+    def create_item(self, name, coords=(0, 0)):
+        """
+        Create a collectible item (e.g., 'yellowGem', 'keyRed') centered at
+        the given tile.
+        """
+        name = f'other/items/{name}'
+        sprite = get_sprite(name,
+                            scale=self.scaling,
+                            position=self.tilemap.position(*coords),
+                            role=Role.OBJECT)
+        self.__add_item(sprite, name)
+        return sprite
+
+    def remove_item(self, item):
+        """
+        Remove item from game. Removed items are not saved by save_level().
+        """
+        culled = self.culled_layers['items'] if self.culling else None
+        self.items.remove(item)
+        if culled is not None:
+            culled.remove(item)
+        self.level_objects.pop(item.serial, None)
+
+    def remove_tile(self, coords, layer='platforms'):
+        """
+        Remove the tile at the given coordinates.
+
+        Raise a KeyError if there is no tile in the cell.
+        """
+        i, j = coords
+        tilemap = self.tilemap
+        key = self.chunks.chunk_key(*tilemap.position(i, j))
+        chunk = self.chunks.get_chunk(key)
+        tilemap.remove(layer, i, j)
+        sprite = chunk.remove_tile(layer, i, j) if chunk.loaded else None
+        if sprite is not None:
+            self.__hide(sprite, layer)
 
     def create_fence(self, name='full', coords=(0, 0), role=Role.FOREGROUND):
         return self.create_object(f'other/fence/{name}', coords, role)
@@ -254,7 +539,7 @@ class HasPlatformsMixin(GameWindow):
         x = int(x + 32)
         y = int(y + sprite.height / 2)
         sprite.position = (x, y)
-        self.__append(sprite)
+        self.__append(sprite, name=name)
         return sprite
 
     #
@@ -263,23 +548,108 @@ class HasPlatformsMixin(GameWindow):
     def tile_to_position(self, i, j):
         return 64 * i, 64 * j
 
-    def _get_tile(self, kind, color=None, scale=None, **kwargs):
+    def _tile_texture(self, kind, color=None):
+        try:
+            return self.tile_textures[kind, color]
+        except KeyError:
+            name = kind if color is None else f'tile/{color}/{kind}'
+            return get_texture(name, scale=self.scaling)
+
+    def _make_tile_sprite(self, i, j, kind, color, role):
+        x, y = self.tilemap.position(i, j)
+        sprite = sprite_from_texture(self._tile_texture(kind, color),
+                                     center_x=x, center_y=y)
+        sprite.role = role
+        return sprite
+
+    def __set_tile(self, i, j, kind, role=None, color=None, layer=None):
+        if role is None:
+            role = Role.OBJECT
         if color is None:
             color = self.world_theme
-        if scale is None:
-            scale = self.scaling
-        return get_tile(kind, color, scale=scale, **kwargs)
-
-    def __append(self, obj, which=None):
-        if which:
-            which.append(obj)
-        elif getattr(obj, 'role', None) == Role.BACKGROUND:
-            self.background_decorations.append(obj)
-        elif getattr(obj, 'role', None) == Role.FOREGROUND:
-            self.foreground_decorations.append(obj)
+        if layer is None:
+            layer = layer_for_role(role)
+
+        tilemap = self.tilemap
+        scale = self.scaling
+        texture = self._tile_texture(kind, color)
+        tile_type = tilemap.tile_type(kind, color, texture.width * scale,
+                                      texture.height * scale)
+
+        # Fetch chunk before setting the tile, since chunks that are created
+        # loaded read their tiles from the tile map.
+        key = self.chunks.chunk_key(*tilemap.position(i, j))
+        chunk = self.chunks.get_chunk(key)
+        tilemap.set(layer, i, j, tile_type, role)
+        if not chunk.loaded:
+            return None
+        sprite = self._make_tile_sprite(i, j, kind, color, role)
+        old = chunk.add_tile(layer, i, j, sprite)
+
+        if old is not None:
+            self.__hide(old, layer)
+        self.__show(sprite, layer)
+        return sprite
+
+    def __append(self, obj, layer=None, name=None):
+        if layer is None:
+            layer = layer_for_role(getattr(obj, 'role', None))
+        if self.__register(obj, layer, name):
+            self.__show(obj, layer)
+
+    def __add_item(self, sprite, name, serial=None):
+        if serial is None:
+            serial = self.tilemap.next_serial()
+        sprite.name = name
+        sprite.serial = serial
+        x, y = sprite.position
+        self.level_objects[serial] = (serial, 'items', name, x, y, Role.OBJECT)
+        self.items.add(sprite)
+        if self.culling:
+            self.culled_layers['items'].add(sprite)
+
+    def __register(self, obj, layer, name=None, serial=None):
+        # Register object in the index and chunks and return True if it must
+        # be displayed.
+        if serial is None:
+            serial = self.tilemap.next_serial()
+        if name is not None:
+            x, y = obj.position
+            role = getattr(obj, 'role', Role.OBJECT)
+            self.level_objects[serial] = (serial, layer, name, x, y, role)
+
+        if self.chunk_size is None:
+            if layer == 'platforms':
+                self.platform_index.add(obj, serial)
+            self.static_sprites[layer].append(obj)
+            return True
         else:
-            self.platforms.append(obj)
+            if layer == 'platforms':
+                role = getattr(obj, 'role', Role.OBJECT)
+                box = Box(obj.left, obj.bottom, obj.right, obj.top, role)
+                self.platform_index.add(box, serial)
+            return self.chunks.add(layer, obj)
+
+    def __show(self, sprite, layer):
+        getattr(self, layer).append(sprite)
+        if self.culling:
+            self.culled_layers[layer].add(sprite)
+
+    def __hide(self, sprite, layer):
+        getattr(self, layer).remove(sprite)
+        if self.culling:
+            self.culled_layers[layer].remove(sprite)
+
+
+def layer_for_role(role):
+    """
+    Return the name of the sprite list that holds elements of the given role.
+    """
+    if role == Role.BACKGROUND:
+        return 'background_decorations'
+    elif role == Role.FOREGROUND:
+        return 'foreground_decorations'
+    return 'platforms'
+
 
-    def __extend(self, objs, which=None):
-        for obj in objs:
-            self.__append(obj, which)
+LAYERS = ('background_decorations', 'platforms', 'foreground_decorations')
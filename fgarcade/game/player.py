@@ -2,9 +2,10 @@ from sidekick import record, lazy
 
 import arcade
 from .base import GameWindow
-from ..assets import get_sprite_path
+from ..animation import Animator, animation_textures, get_animation
+from ..animation import RIGHT, LEFT, UP, DOWN
 from ..enums import Command
-from ..sprites import AnimatedWalkingSprite
+from ..sprites import AnimatedSprite
 
 
 class HasPlayerMixin(GameWindow):
@@ -21,12 +22,19 @@ class HasPlayerMixin(GameWindow):
     #: Initial player position (measured in tiles)
     player_initial_tile = 1, 1
 
+    #: Player position in the beginning of the last simulation step. Used to
+    #: interpolate rendering when the game runs with a fixed timestep.
+    player_previous_position = None
+
     #: Dummy physics engine
     physics_engine = record(can_jump=lambda: True, update=lambda *args: None)
 
     #: Default player class
     player_class = lazy(lambda _: Player)
 
+    #: Updates all animated sprites in a single pass
+    animator = lazy(lambda _: Animator())
+
     @lazy
     def player(self):
         x, y = self.player_initial_tile
@@ -34,6 +42,7 @@ class HasPlayerMixin(GameWindow):
         player = self.player_class(self.player_theme, scaling=self.scaling,
                                    center_x=x, center_y=y)
         self.__dict__['player'] = player
+        self.animator.add(player)
         self.on_player_init(player)
         return player
 
@@ -49,6 +58,13 @@ class HasPlayerMixin(GameWindow):
     #
     # Hooks and methods overrides
     #
+    def get_preloaded_textures(self):
+        names = super().get_preloaded_textures()
+        texture_names = getattr(self.player_class, 'texture_names', None)
+        if texture_names is not None:
+            names.extend(texture_names(self.player_theme))
+        return names
+
     def get_viewport_focus(self):
         player = self.player
         return player.left, player.bottom, player.right, player.top
@@ -57,10 +73,11 @@ class HasPlayerMixin(GameWindow):
         """
         Update player element after a time increment of dt.
         """
+        self.player_previous_position = tuple(self.player.position)
         self.player.update_clock(dt)
         self.player.update_actions(self.commands, self.physics_engine)
         self.player.update()
-        self.player.update_animation()
+        self.animator.update(dt)
 
     def update_elements(self, dt):
         super().update_elements(dt)
@@ -70,13 +87,23 @@ class HasPlayerMixin(GameWindow):
         """
         Draw player on screen.
         """
-        return self.player.draw_sprites()
+        player = self.player
+        previous = self.player_previous_position
+        if not self.fixed_timestep or previous is None:
+            return player.draw_sprites()
+
+        position = tuple(player.position)
+        player.position = self.interpolate(previous, position)
+        try:
+            return player.draw_sprites()
+        finally:
+            player.position = position
 
     def draw_elements(self):
         super().draw_elements()
         self.draw_player()
 
-class Player(AnimatedWalkingSprite):
+class Player(AnimatedSprite):
     """
     Represents a simple player.
     """
@@ -88,34 +115,29 @@ class Player(AnimatedWalkingSprite):
     jump_cooldown = 0.125
     last_time_jumped = -float('inf')
 
+    #: Movement constants, in pixels per step. Acceleration is reduced while
+    #: the player is in the air.
+    max_speed = 4.5
+    acceleration = 1.25
+    air_acceleration = 0.5
+    jump_speed = 10
+
     #: Commands bound to movement actions such as go left, right and jump
     command_left = Command.LEFT
     command_right = Command.RIGHT
     command_jump = Command.UP
 
+    #: Name of animation spec in fgarcade.animation.ANIMATIONS
+    animation_name = 'walking'
+
     def __init__(self, theme, scaling=1.0, center_x=0, center_y=0, **kwargs):
         self.theme = theme
         self.scaling = scaling
 
-        load = self._load
-        mirror = lambda x: load(x, mirrored=True)
-
-        # Create animated sprite
-        super().__init__(
-            stand_left=mirror('walk1'),
-            stand_right=load('walk1'),
-            left=[mirror(f'walk{i}') for i in (2, 3, 2, 1)],
-            right=[load(f'walk{i}') for i in (2, 3, 2, 1)],
-            up=[load(f'up{i}') for i in (2,)],
-            down=[load('fall')],
-            step=20,
-        )
-
-        # Move it to correct position
-        self.center_x = center_x
-        self.center_y = center_y
-        self.last_texture_change_center_x = center_x
-        self.last_texture_change_center_y = center_y
+        # Animations are shared by all players with the same theme
+        template = f'player/{theme}/{{}}'
+        animation = get_animation(self.animation_name, template, scaling)
+        super().__init__(animation, center_x=center_x, center_y=center_y)
 
         # Add to sprite list
         self.sprite_list = arcade.SpriteList()
@@ -128,20 +150,52 @@ class Player(AnimatedWalkingSprite):
             else:
                 raise TypeError(f'invalid argument: {k}')
 
-    def _load(self, which, mirrored=False):
-        path = get_sprite_path(f"player/{self.theme}/{which}")
-        return arcade.load_texture(path, scale=self.scaling, mirrored=mirrored)
+    @classmethod
+    def texture_names(cls, theme):
+        """
+        Return the list of (name, mirrored) textures used by a player with
+        the given theme.
+        """
+        return animation_textures(cls.animation_name, f'player/{theme}/{{}}')
 
     def draw_sprites(self):
         return self.sprite_list.draw()
 
+    #
+    # Textures of the old AnimatedWalkingSprite base class. They are read
+    # from the clips of the shared animation and cannot be reassigned.
+    #
+    @property
+    def stand_right_texture(self):
+        return self.animation.clips[RIGHT].entry
+
+    @property
+    def stand_left_texture(self):
+        return self.animation.clips[LEFT].entry
+
+    @property
+    def walk_right_textures(self):
+        return list(self.animation.clips[RIGHT].frames)
+
+    @property
+    def walk_left_textures(self):
+        return list(self.animation.clips[LEFT].frames)
+
+    @property
+    def walk_up_textures(self):
+        return list(self.animation.clips[UP].frames)
+
+    @property
+    def walk_down_textures(self):
+        return list(self.animation.clips[DOWN].frames)
+
+    @property
+    def texture_change_distance(self):
+        return self.animation.clips[RIGHT].step
+
     def update_clock(self, dt):
         self.time += dt
 
-    def update_animation(self):
-        super().update_animation()
-        self.sprite_list.update_texture(self)
-
     def update_actions(self, commands, physics):
         """
         Update internal state from given commands.
@@ -156,9 +210,9 @@ class Player(AnimatedWalkingSprite):
         if abs(change_y) > 1:
             self.last_time_jumped = self.time
 
-        max_speed = 4.5
-        delta = 1.25 if can_jump else 0.5
-        jump = 10
+        max_speed = self.max_speed
+        delta = self.acceleration if can_jump else self.air_acceleration
+        jump = self.jump_speed
         go_left = commands & self.command_left
         go_right = commands & self.command_right
         change_x *= 0.95
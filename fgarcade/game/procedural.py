@@ -0,0 +1,70 @@
+from sidekick import lazy
+
+from .base import GameWindow
+from ..procedural import KINDS, JumpModel, LevelGenerator
+
+
+class HasProceduralLevelMixin(GameWindow):
+    """
+    Mixin that generates an endless level ahead of the camera.
+
+    It must be combined with the platform, player and camera mixins, usually
+    by subclassing :class:`fgarcade.Platformer`. New columns are generated in
+    batches and loaded in bulk with load_level(). Setting a chunk_size is
+    recommended, since the level never stops growing.
+    """
+
+    #: Seed of the level generator. The same seed produces the same level.
+    level_seed = None
+
+    #: Columns are generated until this distance (in pixels) ahead of the
+    #: right side of the viewport
+    generate_ahead = 1024
+
+    #: Number of columns generated at a time
+    generate_columns = 32
+
+    @lazy
+    def level_generator(self):
+        tilemap = self.tilemap
+        player = self.player_class
+        jump = JumpModel(player.jump_speed, player.max_speed,
+                         self.gravity_constant, tilemap.tile_size)
+        palette = []
+        for kind in KINDS:
+            texture = self._tile_texture(kind, self.world_theme)
+            palette.append((kind, self.world_theme,
+                            texture.width * self.scaling,
+                            texture.height * self.scaling))
+        i, j = self.player_initial_tile
+        return LevelGenerator(self.level_seed, jump, height=max(j - 1, 0),
+                              start=i + 8, palette=palette,
+                              tile_size=tilemap.tile_size)
+
+    def generate_level(self, columns=None):
+        """
+        Generate the next columns of the level and add them to the world.
+        """
+        columns = self.generate_columns if columns is None else columns
+        return self.load_level(self.level_generator.level_data(columns))
+
+    def update_level_generation(self):
+        """
+        Generate columns until the level extends generate_ahead pixels past
+        the viewport.
+        """
+        _, _, right, _ = self.get_viewport_region()
+        size = self.tilemap.tile_size
+        while self.level_generator.column * size < right + self.generate_ahead:
+            self.generate_level()
+
+    #
+    # Hooks and methods overrides
+    #
+    def setup(self):
+        super().setup()
+        self.update_level_generation()
+
+    def on_viewport_changed(self):
+        super().on_viewport_changed()
+        self.update_level_generation()
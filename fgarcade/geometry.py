@@ -0,0 +1,143 @@
+"""
+Collision geometry that merges adjacent tiles into larger rectangles.
+"""
+from .collision import Box, SpatialGrid
+from .enums import Role
+
+#: Roles of tiles that can be merged. Ramps have a different collision
+#: response and are always kept as individual tiles.
+MERGED_ROLES = frozenset({Role.OBJECT, Role.PLATFORM})
+
+
+def merge_boxes(entries, roles=MERGED_ROLES):
+    """
+    Merge (serial, box) pairs into the smallest set of rectangles.
+
+    Boxes with the same role, bottom and top that touch horizontally are
+    joined in runs, and then runs with the same role, left and right that
+    touch vertically are joined in rectangles. Boxes with roles not in
+    roles are returned unchanged. Each rectangle takes the smallest serial of
+    its boxes and the result is sorted by serial.
+
+    >>> ground = [(i, Box(64 * i, 0, 64 * i + 64, 64, Role.OBJECT))
+    ...           for i in range(4)]
+    >>> wall = [(3 + j, Box(192, 64 * j, 256, 64 * j + 64, Role.OBJECT))
+    ...         for j in range(1, 3)]
+    >>> for serial, box in merge_boxes(ground + wall):
+    ...     print(serial, box.left, box.bottom, box.right, box.top)
+    0 0 0 256 64
+    4 192 64 256 192
+    """
+    result = []
+    rows = {}
+    for serial, box in entries:
+        if box.role in roles:
+            key = (box.role, box.bottom, box.top)
+            rows.setdefault(key, []).append((box.left, box.right, serial))
+        else:
+            result.append((serial, box))
+
+    # Join boxes in horizontal runs
+    columns = {}
+    for (role, bottom, top), row in rows.items():
+        row.sort()
+        left, right, serial = row[0]
+        for l, r, s in row[1:]:
+            if l == right:
+                right, serial = r, min(serial, s)
+            else:
+                key = (role, left, right)
+                columns.setdefault(key, []).append((bottom, top, serial))
+                left, right, serial = l, r, s
+        key = (role, left, right)
+        columns.setdefault(key, []).append((bottom, top, serial))
+
+    # Join runs with the same horizontal extent in rectangles
+    for (role, left, right), column in columns.items():
+        column.sort()
+        bottom, top, serial = column[0]
+        for b, t, s in column[1:]:
+            if b == top:
+                top, serial = t, min(serial, s)
+            else:
+                result.append((serial, Box(left, bottom, right, top, role)))
+                bottom, top, serial = b, t, s
+        result.append((serial, Box(left, bottom, right, top, role)))
+
+    result.sort(key=lambda x: x[0])
+    return result
+
+
+class CollisionGeometry:
+    """
+    Merged collision rectangles for a layer of a TileMap.
+
+    Rectangles never cross the boundaries of tilemap chunks, so a change in
+    a tile only rebuilds the rectangles of its chunk. Changes are detected
+    from the chunk versions and applied before each query.
+
+    It implements the query interface of :class:`fgarcade.collision.SpatialGrid`.
+
+    Args:
+        tilemap (TileMap):
+            Source of tiles.
+        layer (str):
+            Name of layer.
+        cell_size (float):
+            Cell size of the spatial grid that stores the rectangles.
+    """
+
+    def __init__(self, tilemap, layer='platforms', cell_size=64):
+        self.tilemap = tilemap
+        self.layer = layer
+        self.grid = SpatialGrid(cell_size)
+        self._chunks = {}
+        self._version = None
+
+    def __len__(self):
+        self.update()
+        return len(self.grid)
+
+    def __iter__(self):
+        self.update()
+        return iter(self.grid)
+
+    def update(self):
+        """
+        Rebuild rectangles of chunks that changed since the last update.
+        """
+        tilemap = self.tilemap
+        if tilemap.version == self._version:
+            return
+        self._version = tilemap.version
+
+        grid = self.grid
+        chunks = tilemap.layers.get(self.layer, {})
+        for key in list(self._chunks):
+            if key not in chunks:
+                for _, box in self._chunks.pop(key)[1]:
+                    grid.remove(box)
+        for key, chunk in chunks.items():
+            version, entries = self._chunks.get(key, (None, ()))
+            if version == chunk.version:
+                continue
+            for _, box in entries:
+                grid.remove(box)
+            entries = merge_boxes(tilemap.chunk_boxes(self.layer, key))
+            for serial, box in entries:
+                grid.add(box, serial)
+            self._chunks[key] = (chunk.version, entries)
+
+    def entries(self, left, bottom, right, top):
+        """
+        Return a list of (serial, rect) pairs for rectangles that overlap the
+        given region.
+        """
+        self.update()
+        return self.grid.entries(left, bottom, right, top)
+
+    def query(self, left, bottom, right, top):
+        """
+        Return a list of rectangles that overlap the given region.
+        """
+        return [box for _, box in self.entries(left, bottom, right, top)]
@@ -0,0 +1,129 @@
+"""
+Collectible items, such as coins, gems and keys.
+"""
+from math import ceil, floor
+
+import arcade
+from .fix import swap_remove_sprite
+
+
+class ItemLayer:
+    """
+    Sprite list and spatial hash of collectible items.
+
+    Items are binned by the grid cell that contains their centers and queries
+    only visit the cells near the requested region, so picking up items costs
+    the same in levels with a handful or with tens of thousands of items.
+    Items are removed in constant time from both the hash and the sprite
+    list. Items are considered static: remove and re-add an item if it moves.
+
+    >>> layer = ItemLayer(64)
+    >>> coin = arcade.Sprite(center_x=96, center_y=96)
+    >>> coin.width = coin.height = 32
+    >>> layer.add(coin)
+    >>> layer.query(0, 0, 64, 64), layer.query(64, 64, 128, 128) == [coin]
+    ([], True)
+    >>> layer.remove(coin)
+    >>> len(layer), layer.query(64, 64, 128, 128)
+    (0, [])
+
+    Args:
+        cell_size (float):
+            Size of the grid cells.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.sprites = arcade.SpriteList()
+        self._cells = {}
+        self._keys = {}
+        self._reach = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def __iter__(self):
+        return iter(self.sprites)
+
+    def __contains__(self, item):
+        return id(item) in self._keys
+
+    def add(self, item):
+        """
+        Insert item into the layer.
+        """
+        if id(item) in self._keys:
+            return
+        size = self.cell_size
+        key = (floor(item.center_x / size), floor(item.center_y / size))
+        try:
+            self._cells[key][id(item)] = item
+        except KeyError:
+            self._cells[key] = {id(item): item}
+        self._keys[id(item)] = key
+        self.sprites.append(item)
+
+        radius = max(item.width, item.height) / 2
+        if radius > self._reach * size:
+            self._reach = ceil(radius / size)
+
+    def extend(self, items):
+        """
+        Insert all items in the given sequence.
+        """
+        for item in items:
+            self.add(item)
+
+    def remove(self, item):
+        """
+        Remove item from the layer.
+
+        Raise a ValueError if item is not present.
+        """
+        try:
+            key = self._keys.pop(id(item))
+        except KeyError:
+            raise ValueError('item not in layer')
+        cell = self._cells[key]
+        del cell[id(item)]
+        if not cell:
+            del self._cells[key]
+        swap_remove_sprite(self.sprites, item)
+
+    def clear(self):
+        """
+        Remove all items.
+        """
+        for item in list(self.sprites):
+            self.remove(item)
+
+    def query(self, left, bottom, right, top):
+        """
+        Return a list with all items that overlap the given rectangle.
+        """
+        size = self.cell_size
+        reach = self._reach
+        i0, j0 = floor(left / size) - reach, floor(bottom / size) - reach
+        i1, j1 = floor(right / size) + reach, floor(top / size) + reach
+        cells = self._cells
+        found = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = cells.get((i, j))
+                if cell:
+                    found.extend(cell.values())
+        return [item for item in found
+                if item.left < right and item.right > left
+                and item.bottom < top and item.top > bottom]
+
+    def collide(self, obj):
+        """
+        Return a list of items that collide with the given object.
+        """
+        return self.query(obj.left, obj.bottom, obj.right, obj.top)
+
+    def draw(self):
+        """
+        Draw all items.
+        """
+        self.sprites.draw()
@@ -0,0 +1,185 @@
+"""
+Serialization of the static elements of a level.
+
+Levels can be saved in two formats, chosen by the file extension:
+
+* ``.json``: a human readable file.
+* ``.fgl``: a compact binary file. It starts with a JSON header followed by
+  a single array with all tiles, which is memory-mapped and loaded in one
+  bulk operation.
+"""
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b'FGLEVEL\0'
+VERSION = 1
+HEADER = struct.Struct('<8sII')
+
+#: Record for a tile in binary files
+TILE_DTYPE = np.dtype([
+    ('serial', '<i4'),
+    ('i', '<i4'),
+    ('j', '<i4'),
+    ('tile', '<u2'),
+    ('layer', 'u1'),
+    ('role', 'u1'),
+])
+
+
+class LevelData:
+    """
+    Static content of a level: tiles, free-standing objects and the initial
+    position of the player.
+
+    Args:
+        tiles:
+            Structured array of TILE_DTYPE. Tile types index the palette
+            starting from 1 and layers index the list of layer names.
+        palette:
+            List of (kind, color, width, height) tile types.
+        layers:
+            List of layer names.
+        objects:
+            List of (serial, layer, name, x, y, role) records for elements
+            that are not tiles.
+        player_initial_tile:
+            The (x, y) initial tile of the player, if any.
+        tile_size:
+            Size of tiles, in pixels.
+    """
+
+    def __init__(self, tiles, palette, layers, objects=(),
+                 player_initial_tile=None, tile_size=64):
+        self.tiles = tiles
+        self.palette = [tuple(x) for x in palette]
+        self.layers = list(layers)
+        self.objects = [tuple(x) for x in objects]
+        self.player_initial_tile = player_initial_tile
+        self.tile_size = tile_size
+
+    def __len__(self):
+        return len(self.tiles) + len(self.objects)
+
+    @classmethod
+    def from_tilemap(cls, tilemap, objects=(), player_initial_tile=None):
+        """
+        Create level data from a TileMap and a list of object records.
+        """
+        layers = list(tilemap.layers)
+        parts = []
+        for idx, layer in enumerate(layers):
+            serial, i, j, tile, role = tilemap.arrays(layer)
+            part = np.zeros(len(serial), dtype=TILE_DTYPE)
+            part['serial'] = serial
+            part['i'] = i
+            part['j'] = j
+            part['tile'] = tile
+            part['layer'] = idx
+            part['role'] = role
+            parts.append(part)
+        tiles = np.concatenate(parts) if parts else np.zeros(0, TILE_DTYPE)
+        return cls(tiles, tilemap.palette, layers, objects,
+                   player_initial_tile, tilemap.tile_size)
+
+    def header(self):
+        """
+        Return a JSON-compatible dictionary with everything but the tiles.
+        """
+        tile = self.player_initial_tile
+        return {
+            'version': VERSION,
+            'tile_size': self.tile_size,
+            'player_initial_tile': None if tile is None else list(tile),
+            'palette': [list(x) for x in self.palette],
+            'layers': self.layers,
+            'objects': [[int(serial), layer, name, x, y, int(role)]
+                        for serial, layer, name, x, y, role in self.objects],
+        }
+
+    @classmethod
+    def _from_header(cls, header, tiles):
+        if header.get('version') != VERSION:
+            raise ValueError(f'unsupported level version: {header.get("version")}')
+        tile = header['player_initial_tile']
+        return cls(tiles, header['palette'], header['layers'],
+                   header['objects'], None if tile is None else tuple(tile),
+                   header['tile_size'])
+
+    #
+    # JSON
+    #
+    def to_json(self):
+        """
+        Serialize level to a JSON string.
+        """
+        data = self.header()
+        data['tiles'] = {name: self.tiles[name].tolist()
+                         for name in TILE_DTYPE.names}
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Load level from a JSON string.
+        """
+        data = json.loads(data)
+        columns = data.pop('tiles')
+        tiles = np.zeros(len(columns['serial']), dtype=TILE_DTYPE)
+        for name in TILE_DTYPE.names:
+            tiles[name] = columns[name]
+        return cls._from_header(data, tiles)
+
+    #
+    # Binary
+    #
+    def to_bytes(self):
+        """
+        Serialize level to the binary format.
+        """
+        header = json.dumps(self.header()).encode('utf8')
+        header += b' ' * (-(HEADER.size + len(header)) % 8)
+        tiles = np.ascontiguousarray(self.tiles, dtype=TILE_DTYPE)
+        return (HEADER.pack(MAGIC, VERSION, len(header)) + header +
+                tiles.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Load level from a buffer with data in the binary format.
+
+        Tiles are a view into the given buffer, hence no copy is made.
+        """
+        magic, version, size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('not a level file')
+        header = json.loads(bytes(data[HEADER.size:HEADER.size + size]))
+        tiles = np.frombuffer(data, dtype=TILE_DTYPE,
+                              offset=HEADER.size + size)
+        return cls._from_header(header, tiles)
+
+    #
+    # Files
+    #
+    def save(self, path):
+        """
+        Save level to path. Uses the binary format, unless path ends with
+        .json.
+        """
+        path = Path(path)
+        if path.suffix == '.json':
+            path.write_text(self.to_json())
+        else:
+            path.write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load level from path. Binary files are memory-mapped.
+        """
+        path = Path(path)
+        if path.suffix == '.json':
+            return cls.from_json(path.read_text())
+        return cls.from_bytes(np.memmap(str(path), dtype=np.uint8, mode='r'))
@@ -0,0 +1,245 @@
+"""
+Background layers that scroll with the camera.
+"""
+from math import ceil, floor
+
+import PIL.Image
+
+import arcade
+
+
+class BakedLayer:
+    """
+    An image repeated across the screen and baked into a single texture.
+
+    The layer is drawn as a single sprite a little larger than the screen.
+    Scrolling moves this sprite by the layer offset modulo the size of the
+    image, so the cost of updates and drawing does not depend on the size
+    of the level.
+
+    Args:
+        image:
+            Path to image file.
+        width, height:
+            Size of the screen area the layer must cover.
+        ratio (float):
+            How much the layer moves relative to the world. 0 keeps the
+            layer fixed on screen and 1 moves it together with the world.
+        repeat ({'x', 'y', 'xy', None}):
+            Directions in which the image is repeated.
+        left, bottom:
+            Position of the image relative to the bottom left corner of the
+            screen when the viewport is at the origin.
+    """
+
+    def __init__(self, image, width, height, ratio=0.0, repeat='x',
+                 left=0, bottom=0):
+        self.image = str(image)
+        self.ratio = ratio
+        self.repeat = repeat or ''
+        self.left = left
+        self.bottom = bottom
+
+        tile = PIL.Image.open(self.image)
+        tile.load()
+        self.tile_width, self.tile_height = tile.size
+        nx = ny = 1
+        if 'x' in self.repeat:
+            nx = ceil(width / self.tile_width) + 1
+        if 'y' in self.repeat:
+            ny = ceil(height / self.tile_height) + 1
+
+        baked = PIL.Image.new(tile.mode, (nx * self.tile_width,
+                                          ny * self.tile_height))
+        for i in range(nx):
+            for j in range(ny):
+                baked.paste(tile, (i * self.tile_width, j * self.tile_height))
+        texture = arcade.Texture(f'{self.image}-baked-{nx}x{ny}', baked)
+        self.sprite = arcade.Sprite()
+        self.sprite.textures = [texture]
+        self.sprite.texture = texture
+        self.sprites = arcade.SpriteList(use_spatial_hash=False)
+        self.sprites.append(self.sprite)
+        self.update(0, 0)
+
+    def update(self, viewport_x, viewport_y):
+        """
+        Update layer position for a viewport with the given bottom left
+        corner.
+        """
+        x = self.left - viewport_x * self.ratio
+        y = self.bottom - viewport_y * self.ratio
+        if 'x' in self.repeat:
+            x %= self.tile_width
+            x -= self.tile_width if x > 0 else 0
+        if 'y' in self.repeat:
+            y %= self.tile_height
+            y -= self.tile_height if y > 0 else 0
+
+        sprite = self.sprite
+        sprite.center_x = round(viewport_x + x) + sprite.width / 2
+        sprite.center_y = round(viewport_y + y) + sprite.height / 2
+
+    def draw(self):
+        """
+        Draw layer.
+        """
+        self.sprites.draw()
+
+
+class SpriteLayer:
+    """
+    A sprite list that scrolls with the given ratio.
+
+    Sprites are never moved. Instead, the layer stores the offset for the
+    current viewport and shifts the projection while drawing.
+
+    Args:
+        sprites (SpriteList):
+            Sprites in layer. Positions are relative to the bottom left
+            corner of the screen when the viewport is at the origin.
+        ratio (float):
+            How much the layer moves relative to the world. 0 keeps the
+            layer fixed on screen and 1 moves it together with the world.
+        repeat ({'x', 'y', 'xy', None}):
+            Directions in which the layer is repeated.
+        period (float, float):
+            Horizontal and vertical distance between repetitions of the layer.
+            Required if repeat is given.
+    """
+
+    def __init__(self, sprites, ratio=0.0, repeat=None, period=None):
+        self.sprites = sprites
+        self.ratio = ratio
+        self.repeat = repeat or ''
+        self.period = period
+        self.offset = (0, 0)
+        self.viewport = (0, 0)
+        if self.repeat and period is None:
+            raise ValueError('period is required for repeating layers')
+
+    def update(self, viewport_x, viewport_y):
+        """
+        Update layer offset for a viewport with the given bottom left corner.
+        """
+        self.viewport = (viewport_x, viewport_y)
+        self.offset = (viewport_x * self.ratio, viewport_y * self.ratio)
+
+    def draw(self):
+        """
+        Draw layer.
+        """
+        left, right, bottom, top = arcade.get_viewport()
+        width, height = right - left, top - bottom
+        x, y = self.offset
+        xs = repetitions(x, width, self.period[0]) if 'x' in self.repeat else [x]
+        ys = repetitions(y, height, self.period[1]) if 'y' in self.repeat else [y]
+        try:
+            for dx in xs:
+                for dy in ys:
+                    arcade.set_viewport(dx, dx + width, dy, dy + height)
+                    self.sprites.draw()
+        finally:
+            arcade.set_viewport(left, right, bottom, top)
+
+
+def repetitions(offset, size, period):
+    """
+    Return the viewport starts that draw all copies of a layer repeating with
+    the given period that are visible in the range [offset, offset + size].
+
+    >>> repetitions(150, 100, 100)
+    [50, -50]
+    """
+    first = floor(offset / period)
+    last = floor((offset + size) / period)
+    return [offset - k * period for k in range(first, last + 1)]
+
+
+class ParallaxLayers:
+    """
+    A collection of layers that scroll at different rates.
+
+    Layers only store an offset when the viewport changes, so updates cost
+    O(layers), regardless of how many sprites each layer has.
+
+    Args:
+        width, height:
+            Size of the screen.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.background = []
+        self.foreground = []
+
+    def __len__(self):
+        return len(self.background) + len(self.foreground)
+
+    def __iter__(self):
+        yield from self.background
+        yield from self.foreground
+
+    def add(self, layer, foreground=False):
+        """
+        Register a layer. Layers are drawn in the order they are added.
+
+        Background layers are drawn behind the game world, and foreground
+        layers in front of it.
+        """
+        (self.foreground if foreground else self.background).append(layer)
+        return layer
+
+    def add_image(self, image, ratio=0.0, repeat='x', left=0, bottom=0,
+                  foreground=False):
+        """
+        Add a layer with an image repeated across the screen.
+
+        See :class:`BakedLayer` for the meaning of arguments.
+        """
+        layer = BakedLayer(image, self.width, self.height, ratio, repeat,
+                           left, bottom)
+        return self.add(layer, foreground)
+
+    def add_sprites(self, sprites, ratio=0.0, repeat=None, period=None,
+                    foreground=False):
+        """
+        Add a layer with a list of sprites.
+
+        See :class:`SpriteLayer` for the meaning of arguments.
+        """
+        layer = SpriteLayer(sprites, ratio, repeat, period)
+        return self.add(layer, foreground)
+
+    def remove(self, layer):
+        """
+        Remove layer.
+        """
+        if layer in self.background:
+            self.background.remove(layer)
+        else:
+            self.foreground.remove(layer)
+
+    def update(self, viewport_x, viewport_y):
+        """
+        Update all layers for a viewport with the given bottom left corner.
+        """
+        for layer in self.background:
+            layer.update(viewport_x, viewport_y)
+        for layer in self.foreground:
+            layer.update(viewport_x, viewport_y)
+
+    def draw_background(self):
+        """
+        Draw layers behind the world.
+        """
+        for layer in self.background:
+            layer.draw()
+
+    def draw_foreground(self):
+        """
+        Draw layers in front of the world.
+        """
+        for layer in self.foreground:
+            layer.draw()
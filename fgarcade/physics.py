@@ -1,30 +1,49 @@
 from math import sqrt
 
 import arcade
+from fgarcade.collision import SpatialGrid, arcade_edge
 from fgarcade.enums import Role
 
+#: Maximum speed of bodies, in pixels per step
+MAX_SPEED = 10
+
+#: Fraction of the penetration into platforms recovered each step
+RECOVER = 0.666
+
 
 class PhysicsEnginePlatformer(arcade.PhysicsEnginePlatformer):
     """
     This class is responsible for move everything and take care of collisions.
     """
 
+    #: Maximum speed of the player
+    max_speed = MAX_SPEED
+
+    #: Fraction of penetration recovered each step
+    recover = RECOVER
+
     def __init__(self, world):
         gravity = getattr(world, 'gravity_constant', 0.5)
         super().__init__(world.player, world.platforms, gravity)
 
+        # Static platforms are queried from a spatial index so the cost of
+        # collision checks does not grow with the size of the level.
+        index = getattr(world, 'platform_index', None)
+        if index is None:
+            index = SpatialGrid.from_objects(world.platforms)
+        self.platform_index = index
+
     def can_jump(self) -> bool:
         """
         Method that looks to see if there is a floor under
         the player_sprite. If there is a floor, the player can jump
         and we return a True.
         """
-        self.player_sprite.center_y -= 2
-        bottom = self.player_sprite.bottom
-        top = self.player_sprite.top
-        hit_list = arcade.check_for_collision_with_list(self.player_sprite,
-                                                        self.platforms)
-        self.player_sprite.center_y += 2
+        player = self.player_sprite
+        bottom = player.bottom - 2
+        top = player.top - 2
+        hit_list = self.platform_index.query(player.left, bottom,
+                                             player.right, top)
 
         for other in hit_list:
             if bottom < other.top and top > other.center_y:
@@ -36,81 +55,175 @@ class PhysicsEnginePlatformer(arcade.PhysicsEnginePlatformer):
         """
         Move everything and resolve collisions.
         """
-        max_speed = 10
-        check_for_collision_with_list = arcade.check_for_collision_with_list
         player = self.player_sprite
+        move_body(player, self.gravity_constant, self.max_speed)
+        push_out(player, self.platform_index.collide(player), self.recover)
+
+
+class Body:
+    """
+    A box with position and velocity that can be simulated by
+    :func:`move_body` and :func:`push_out` without creating a sprite.
+
+    Edges are computed and assigned with the same rounding as arcade
+    sprites, hence a body follows the same trajectory of a sprite with the
+    same dimensions.
+
+    >>> body = Body(32.0, 40.0, width=39, height=48)
+    >>> body.left, body.bottom
+    (12.5, 16.0)
+    >>> body.bottom = 64
+    >>> body.center_y
+    88.0
+    """
+
+    __slots__ = ('center_x', 'center_y', 'change_x', 'change_y',
+                 'half_width', 'half_height')
+
+    def __init__(self, center_x=0.0, center_y=0.0, change_x=0.0,
+                 change_y=0.0, width=0.0, height=0.0):
+        self.center_x = center_x
+        self.center_y = center_y
+        self.change_x = change_x
+        self.change_y = change_y
+        self.half_width = width / 2
+        self.half_height = height / 2
+
+    @property
+    def left(self):
+        return arcade_edge(self.center_x, self.half_width)[0]
+
+    @left.setter
+    def left(self, value):
+        self.center_x += value - self.left
+
+    @property
+    def right(self):
+        return arcade_edge(self.center_x, self.half_width)[1]
+
+    @right.setter
+    def right(self, value):
+        self.center_x -= self.right - value
 
-        # Add gravity and move
-        player.change_y -= self.gravity_constant
-        speed = sqrt(player.change_x ** 2 + player.change_y ** 2)
-        if speed > max_speed:
-            ratio = max_speed / speed
-            player.change_x *= ratio
-            player.change_y *= ratio
-
-        player.center_y += player.change_y
-        player.center_x += player.change_x
-
-        # Check for wall hit
-        hit_list = check_for_collision_with_list(player, self.platforms)
-        recover = 0.666
-        min_shadow_x = 12
-        min_shadow_y = 6
-
-        for hit in hit_list:
-            shadow_x = min(player.right, hit.right) - \
-                       max(player.left, hit.left)
-            shadow_y = min(player.top, hit.top) - \
-                       max(player.bottom, hit.bottom)
-            role = getattr(hit, 'role', Role.OBJECT)
-            collision_role = Role.OBJECT
-
-            shift_y = 0
-            if role == Role.RAMP_DOWN:
-                shift_y = player.center_x - hit.left
-            elif role == Role.RAMP_UP:
-                shift_y = max(player.center_x - hit.left, 0) - 64
-
-            # Falling down...
-            if (player.change_y < 0
-                    and player.bottom < hit.top + shift_y < player.center_y
-                    and shadow_x > min_shadow_x
-                    and shadow_y < 24 + abs(shift_y)):
-                player.bottom += max(recover *
-                                     (hit.top + shift_y - player.bottom), 0.5)
-                player.change_y = 0
-
-            # Going up...
-            elif (player.change_y > 0
-                  and role == collision_role
-                  and player.top > hit.bottom > player.center_y
-                  and shadow_x > min_shadow_x
-                  and shadow_y < 24):
-                player.top -= max(recover * (player.top - hit.bottom), 0.5)
-                player.change_y = 0
-
-            # Going right...
-            if (player.change_x > 0
-                    and (role == collision_role or role == Role.RAMP_UP)
-                    and player.right > hit.left
-                    and player.center_x < hit.center_x
-                    and shadow_y > min_shadow_y
-                    and shadow_x < 24):
-                if role == Role.RAMP_UP:
-                    player.change_x /= 2
-                    player.change_y += 4 * player.change_y
-                    player.center_y += 64 + shift_y
-                else:
-                    player.right -= max(recover *
-                                        (player.right - hit.left), 0.5)
-                    player.change_x = 0
-
-            # Going left...
-            elif (player.change_x < 0
-                  and role == collision_role
-                  and player.left < hit.right
-                  and player.center_x > hit.center_x
-                  and shadow_y > min_shadow_y
-                  and shadow_x < 24):
-                player.left += max(recover * (hit.right - player.left), 0.5)
-                player.change_x = 0
+    @property
+    def bottom(self):
+        return arcade_edge(self.center_y, self.half_height)[0]
+
+    @bottom.setter
+    def bottom(self, value):
+        self.center_y -= self.bottom - value
+
+    @property
+    def top(self):
+        return arcade_edge(self.center_y, self.half_height)[1]
+
+    @top.setter
+    def top(self, value):
+        self.center_y -= self.top - value
+
+    def edges(self):
+        """
+        Return the (left, bottom, right, top) edges of body.
+        """
+        left, right = arcade_edge(self.center_x, self.half_width)
+        bottom, top = arcade_edge(self.center_y, self.half_height)
+        return left, bottom, right, top
+
+
+def move_body(body, gravity_constant, max_speed=MAX_SPEED):
+    """
+    Add gravity to the velocity of body, limit its speed and move it.
+
+    Args:
+        body:
+            A sprite or :class:`Body`.
+        gravity_constant (float):
+            Gravity acceleration per step.
+        max_speed (float):
+            Maximum speed of body.
+    """
+    body.change_y -= gravity_constant
+    speed = sqrt(body.change_x ** 2 + body.change_y ** 2)
+    if speed > max_speed:
+        ratio = max_speed / speed
+        body.change_x *= ratio
+        body.change_y *= ratio
+
+    body.center_y += body.change_y
+    body.center_x += body.change_x
+
+
+def push_out(body, hits, recover=RECOVER):
+    """
+    Push body out of the platforms it overlaps.
+
+    Bodies land on floors and ramps, hit their heads on solid platforms,
+    climb ramps and stop at walls. Only a fraction of the penetration into
+    each platform is recovered, so bodies settle smoothly. Platforms with
+    other roles than OBJECT are one-way: bodies only land on them.
+
+    Args:
+        body:
+            A sprite or :class:`Body`.
+        hits:
+            Platforms overlapping body, in the order they are resolved.
+        recover (float):
+            Fraction of the penetration recovered each step.
+    """
+    min_shadow_x = 12
+    min_shadow_y = 6
+
+    for hit in hits:
+        left, bottom, right, top = body.left, body.bottom, body.right, body.top
+        shadow_x = min(right, hit.right) - max(left, hit.left)
+        shadow_y = min(top, hit.top) - max(bottom, hit.bottom)
+        role = getattr(hit, 'role', Role.OBJECT)
+        collision_role = Role.OBJECT
+
+        shift_y = 0
+        if role == Role.RAMP_DOWN:
+            shift_y = body.center_x - hit.left
+        elif role == Role.RAMP_UP:
+            shift_y = max(body.center_x - hit.left, 0) - 64
+
+        # Falling down...
+        if (body.change_y < 0
+                and bottom < hit.top + shift_y < body.center_y
+                and shadow_x > min_shadow_x
+                and shadow_y < 24 + abs(shift_y)):
+            body.bottom += max(recover * (hit.top + shift_y - bottom), 0.5)
+            body.change_y = 0
+
+        # Going up...
+        elif (body.change_y > 0
+              and role == collision_role
+              and top > hit.bottom > body.center_y
+              and shadow_x > min_shadow_x
+              and shadow_y < 24):
+            body.top -= max(recover * (top - hit.bottom), 0.5)
+            body.change_y = 0
+
+        # Going right...
+        if (body.change_x > 0
+                and (role == collision_role or role == Role.RAMP_UP)
+                and right > hit.left
+                and body.center_x < hit.center_x
+                and shadow_y > min_shadow_y
+                and shadow_x < 24):
+            if role == Role.RAMP_UP:
+                body.change_x /= 2
+                body.change_y += 4 * body.change_y
+                body.center_y += 64 + shift_y
+            else:
+                body.right -= max(recover * (right - hit.left), 0.5)
+                body.change_x = 0
+
+        # Going left...
+        elif (body.change_x < 0
+              and role == collision_role
+              and left < hit.right
+              and body.center_x > hit.center_x
+              and shadow_y > min_shadow_y
+              and shadow_x < 24):
+            body.left += max(recover * (hit.right - left), 0.5)
+            body.change_x = 0
@@ -0,0 +1,356 @@
+"""
+Seeded procedural generation of endless platformer levels.
+
+The terrain is described as a sequence of columns with the row of the ground
+surface, or a gap. Batches of columns are converted to arrays of tiles in a
+few vectorized operations and loaded in bulk into the world, without
+creating tiles one by one. Gaps, steps and floating platforms are only
+created if the player can reach them, according to a :class:`JumpModel`.
+"""
+from math import sqrt
+
+import numpy as np
+
+from .enums import Role
+from .level import LevelData, TILE_DTYPE
+
+#: Tile kinds used by generated levels
+KINDS = ('g', 'gl', 'gr', 'gs', 'e1', 'p', 'pl', 'pr', 'ps')
+G, GL, GR, GS, E1, P, PL, PR, PS = range(1, len(KINDS) + 1)
+
+#: Layers of generated tiles
+LAYERS = ('platforms', 'background_decorations')
+PLATFORMS, BACKGROUND = range(len(LAYERS))
+
+#: Height of columns without ground
+GAP = -1
+
+
+class JumpModel:
+    """
+    Reach of the player's jumps.
+
+    Jumps are simulated with the same discrete steps used by the game: at
+    each step, the player moves once with its current velocity in
+    Player.update() and once more in the physics engine, after gravity is
+    applied and the total speed is limited. The player runs at max_speed
+    during the whole jump. Distances are reduced by a safety factor, since
+    jumps are rarely perfect.
+
+    >>> jump = JumpModel(jump_speed=10, max_speed=4.5, gravity=0.5)
+    >>> jump.max_rise()
+    2
+    >>> [jump.max_gap(rise) for rise in (-2, -1, 0, 1, 2, 3)]
+    [5, 4, 4, 3, 3, -1]
+
+    Args:
+        jump_speed (float):
+            Initial vertical speed of jumps, in pixels per step.
+        max_speed (float):
+            Horizontal speed, in pixels per step.
+        gravity (float):
+            Gravity acceleration per step.
+        tile_size (float):
+            Size of tiles, in pixels.
+        safety (float):
+            Fraction of the ideal jump distances that is considered
+            reachable.
+    """
+
+    #: Number of simulated steps
+    steps = 1000
+
+    #: Maximum total speed enforced by the physics engine
+    speed_limit = 10
+
+    def __init__(self, jump_speed=10, max_speed=4.5, gravity=0.5,
+                 tile_size=64, safety=0.8):
+        self.jump_speed = jump_speed
+        self.max_speed = max_speed
+        self.gravity = gravity
+        self.tile_size = tile_size
+        self.safety = safety
+
+        #: Horizontal and vertical displacement after each step of a jump
+        self.x, self.y = self._simulate()
+
+    def _simulate(self):
+        xs, ys = [], []
+        x = y = 0.0
+        vy = self.jump_speed
+        limit = self.speed_limit
+        for _ in range(self.steps):
+            vx = self.max_speed
+            x, y = x + vx, y + vy
+            vy -= self.gravity
+            speed = sqrt(vx ** 2 + vy ** 2)
+            if speed > limit:
+                vx, vy = vx * limit / speed, vy * limit / speed
+            x, y = x + vx, y + vy
+            xs.append(x)
+            ys.append(y)
+        return np.array(xs), np.array(ys)
+
+    def max_rise(self):
+        """
+        Maximum number of rows the player can climb with a single jump.
+        """
+        peak = max(self.y.max(), 0)
+        return int(peak * self.safety // self.tile_size)
+
+    def max_gap(self, rise=0):
+        """
+        Maximum number of empty columns the player can jump over, landing
+        on a surface the given number of rows above (or below, if negative)
+        the starting surface.
+
+        Return -1 if the surface cannot be reached.
+        """
+        if rise > self.max_rise():
+            return -1
+        steps = np.flatnonzero(self.y >= rise * self.tile_size)
+        if not len(steps):
+            return -1
+        distance = self.x[steps[-1]] * self.safety
+        return int(distance // self.tile_size)
+
+    def can_reach(self, gap, rise=0):
+        """
+        Return True if player can jump over gap columns, landing rise rows
+        above the starting surface.
+        """
+        return 0 <= gap <= self.max_gap(rise)
+
+
+class LevelGenerator:
+    """
+    Seeded generator of endless levels that grow to the right.
+
+    Levels are sequences of segments: runs of ground, gaps, ramps, towers and
+    pits crossed by floating platforms. The same seed always produces the
+    same level, no matter how many columns are generated at a time.
+
+    >>> gen = LevelGenerator(seed=42)
+    >>> tiles = gen.generate(120)
+    >>> other = LevelGenerator(seed=42)
+    >>> parts = np.concatenate([other.generate(40) for _ in range(3)])
+    >>> cells = lambda x: sorted(zip(x['i'].tolist(), x['j'].tolist(),
+    ...                              x['tile'].tolist()))
+    >>> cells(tiles[tiles['i'] < 120]) == cells(parts[parts['i'] < 120])
+    True
+
+    Args:
+        seed (int):
+            Seed of the random number generator.
+        jump (JumpModel):
+            Reach of the player's jumps.
+        height (int):
+            Row of the ground surface in the beginning of the level.
+        min_height, max_height (int):
+            Range of rows of the ground surface.
+        start (int):
+            Number of columns of flat ground in the beginning of the level.
+        palette:
+            List of (kind, color, width, height) tile types for each kind in
+            :data:`KINDS`. Defaults to square tiles of the blue theme.
+        tile_size (float):
+            Size of tiles, in pixels.
+    """
+
+    #: Relative frequency of each segment
+    weights = {'ground': 3, 'gap': 2, 'ramp': 1, 'tower': 1, 'platforms': 1}
+
+    def __init__(self, seed=None, jump=None, height=0, min_height=0,
+                 max_height=8, start=8, palette=None, tile_size=64):
+        self.rng = np.random.default_rng(seed)
+        self.jump = JumpModel(tile_size=tile_size) if jump is None else jump
+        self.height = height
+        self.min_height = min_height
+        self.max_height = max_height
+        self.tile_size = tile_size
+        if palette is None:
+            palette = [(kind, 'blue', tile_size, tile_size) for kind in KINDS]
+        self.palette = [tuple(x) for x in palette]
+        self.segments = list(self.weights)
+        weights = np.array([self.weights[x] for x in self.segments], float)
+        self.probabilities = weights / weights.sum()
+
+        #: Index of the next column to be generated
+        self.column = 0
+
+        #: Serial number of the next tile
+        self.serial = 0
+
+        # Columns generated by segments, but not yet converted to tiles.
+        # Conversion needs the height of the next column.
+        self._heights = []
+        self._solid = []
+        self._platforms = []
+        self._last_height = GAP
+        self._columns([height] * start)
+
+    def generate(self, columns):
+        """
+        Generate at least the given number of columns and return an array of
+        tiles of :data:`fgarcade.level.TILE_DTYPE`.
+
+        Tile types index :attr:`palette` starting from 1 and layers index
+        :data:`LAYERS`.
+        """
+        target = self.column + columns
+        while self.column + len(self._heights) <= target:
+            segment = self.rng.choice(len(self.segments),
+                                      p=self.probabilities)
+            getattr(self, f'_segment_{self.segments[segment]}')()
+        return self._emit(len(self._heights) - 1)
+
+    def level_data(self, columns):
+        """
+        Like generate(), but return a :class:`fgarcade.level.LevelData`.
+        """
+        return LevelData(self.generate(columns), self.palette, LAYERS,
+                         tile_size=self.tile_size)
+
+    #
+    # Segments
+    #
+    def _columns(self, heights, solid=False):
+        self._heights.extend(heights)
+        self._solid.extend([solid] * len(heights))
+
+    def _clamp(self, height):
+        return min(max(height, self.min_height), self.max_height)
+
+    def _landing(self, rise, level):
+        # Choose the row of a surface reached from level and the maximum
+        # gap before it.
+        row = self._clamp(level + rise)
+        gap = self.jump.max_gap(row - level)
+        if gap < 1:
+            row, gap = level, self.jump.max_gap(0)
+        return row, gap
+
+    def _segment_ground(self):
+        size = int(self.rng.integers(3, 9))
+        self._columns([self.height] * size)
+
+    def _segment_gap(self):
+        rng = self.rng
+        rise = int(rng.integers(-2, self.jump.max_rise() + 1))
+        height, max_gap = self._landing(rise, self.height)
+        if max_gap < 1:
+            return self._segment_ground()
+        self._columns([GAP] * int(rng.integers(1, max_gap + 1)))
+        self.height = height
+        self._columns([height] * int(rng.integers(2, 6)))
+
+    def _segment_ramp(self):
+        if self.jump.max_rise() < 1:
+            return self._segment_ground()
+        rng = self.rng
+        size = int(rng.integers(2, 6))
+        step = 1 if rng.random() < 0.5 else -1
+        if not self.min_height <= self.height + step <= self.max_height:
+            step = -step
+        heights = [self._clamp(self.height + step * n)
+                   for n in range(1, size + 1)]
+        self.height = heights[-1]
+        self._columns(heights + [self.height] * 2)
+
+    def _segment_tower(self):
+        rise = self.jump.max_rise()
+        if rise < 1:
+            return self._segment_ground()
+        width = int(self.rng.integers(1, 3))
+        self._columns([self.height] * 2)
+        self._columns([self.height + rise] * width, solid=True)
+        self._columns([self.height] * 2)
+
+    def _segment_platforms(self):
+        rng = self.rng
+        jump = self.jump
+        if jump.max_gap(0) < 1:
+            return self._segment_ground()
+
+        # Platforms are placed relative to the first column of the pit
+        start = self.column + len(self._heights)
+        level = self.height
+        offset = 0
+        for _ in range(int(rng.integers(1, 4))):
+            rise = int(rng.integers(-1, jump.max_rise() + 1))
+            row, max_gap = self._landing(rise, level)
+            offset += int(rng.integers(1, max_gap + 1))
+            size = int(rng.integers(2, 5))
+            self._platforms.append((start + offset, row, size))
+            offset += size
+            level = row
+
+        # Land on the ground after the last platform
+        height, max_gap = self._landing(-int(rng.integers(0, 3)), level)
+        offset += int(rng.integers(1, max_gap + 1))
+        self._columns([GAP] * offset)
+        self.height = height
+        self._columns([height] * int(rng.integers(2, 5)))
+
+    #
+    # Conversion to tiles
+    #
+    def _emit(self, n):
+        heights = np.array(self._heights[:n + 1], dtype=np.int64)
+        solid = np.array(self._solid[:n], dtype=bool)
+        column = np.arange(self.column, self.column + n)
+        height = heights[:n]
+        left = np.r_[self._last_height, heights[:n - 1]]
+        right = heights[1:]
+
+        # Ground surface. Ends are rounded at the sides facing lower columns.
+        ground = height >= 0
+        lower_left = (left < height)[ground]
+        lower_right = (right < height)[ground]
+        kind = np.select([lower_left & lower_right, lower_left, lower_right],
+                         [GS, GL, GR], G)
+        parts = [(column[ground], height[ground], kind, PLATFORMS,
+                  Role.OBJECT)]
+
+        # Fill below the surface. Towers are solid, while regular ground is
+        # just a background.
+        rows = height[ground]
+        total = int(rows.sum())
+        is_solid = np.repeat(solid[ground], rows)
+        parts.append((
+            np.repeat(column[ground], rows),
+            np.arange(total) - np.repeat(np.cumsum(rows) - rows, rows),
+            E1,
+            np.where(is_solid, PLATFORMS, BACKGROUND),
+            np.where(is_solid, Role.OBJECT, Role.BACKGROUND),
+        ))
+
+        # Floating platforms that start in the emitted columns
+        end = self.column + n
+        platforms = [x for x in self._platforms if x[0] < end]
+        self._platforms = [x for x in self._platforms if x[0] >= end]
+        for i, j, size in platforms:
+            if size == 1:
+                kinds = [PS]
+            else:
+                kinds = [PL] + [P] * (size - 2) + [PR]
+            parts.append((np.arange(i, i + size), j, kinds, PLATFORMS,
+                          Role.PLATFORM))
+
+        sizes = [len(part[0]) for part in parts]
+        tiles = np.zeros(sum(sizes), dtype=TILE_DTYPE)
+        start = 0
+        for size, (i, j, tile, layer, role) in zip(sizes, parts):
+            view = tiles[start:start + size]
+            view['i'], view['j'], view['tile'] = i, j, tile
+            view['layer'], view['role'] = layer, role
+            start += size
+        tiles['serial'] = np.arange(self.serial, self.serial + len(tiles))
+
+        self.serial += len(tiles)
+        self.column = end
+        if n:
+            self._last_height = int(height[-1])
+        del self._heights[:n]
+        del self._solid[:n]
+        return tiles
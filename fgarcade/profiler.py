@@ -0,0 +1,318 @@
+"""
+Measure how much of each frame is spent in each hook of a game.
+"""
+import csv
+import json
+import re
+from bisect import bisect_right
+from collections import deque
+from functools import wraps
+from time import perf_counter
+
+import numpy as np
+
+#: Methods that are timed by the profiler
+HOOK_PATTERN = re.compile(
+    r'^(update|step|on_draw|on_viewport_changed|(start|finish)_update|'
+    r'(update|draw)_\w+)$')
+
+#: Upper edges of the frame time histogram bins, in milliseconds. The last
+#: bin counts all frames slower than the last edge.
+HISTOGRAM_EDGES = (1, 2, 4, 8, 12, 16, 20, 25, 33, 50, 100)
+
+# (cls, name) -> [original function, number of attached profilers]
+_patched = {}
+
+
+class HookStats:
+    """
+    Rolling timing statistics for a single hook.
+
+    Args:
+        name (str):
+            Hook name, usually "ClassName.method".
+        window (int):
+            Number of frames used to compute percentiles.
+    """
+
+    def __init__(self, name, window=600):
+        self.name = name
+        self.times = deque(maxlen=window)
+        self.calls = 0
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, value, calls=1):
+        """
+        Register the time (in seconds) spent in the hook during a frame.
+        """
+        self.times.append(value)
+        self.calls += calls
+        self.total += value
+
+    def percentiles(self, *qs):
+        """
+        Return percentiles of the time per frame in the rolling window, in
+        milliseconds.
+        """
+        if not self.times:
+            return tuple(0.0 for _ in qs)
+        values = np.percentile(np.fromiter(self.times, float), qs) * 1000
+        return tuple(values.tolist())
+
+    def summary(self):
+        """
+        Return a dictionary with the statistics of the hook.
+        """
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        n = len(self.times)
+        return {
+            'hook': self.name,
+            'calls': self.calls,
+            'mean': 1000 * sum(self.times) / n if n else 0.0,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99,
+            'max': 1000 * max(self.times) if n else 0.0,
+        }
+
+
+class FrameProfiler:
+    """
+    Time the update and draw hooks of a game window.
+
+    The profiler wraps every update_*/draw_* method in the classes of the
+    game, including each mixin override, and measures the time spent in
+    the method itself, excluding the time spent in other timed hooks called
+    by it (e.g., through super()). Methods are only wrapped while a profiler
+    is attached, so games that do not use it pay nothing.
+
+    Args:
+        window (int):
+            Number of frames used to compute rolling percentiles.
+
+    Attributes:
+        hooks:
+            Map from hook names to :class:`HookStats`.
+        frames:
+            Statistics of the time between consecutive frames.
+    """
+
+    def __init__(self, window=600):
+        self.window = window
+        self.enabled = True
+        self.hooks = {}
+        self.frames = HookStats('frame', window)
+        self.histogram = [0] * (len(HISTOGRAM_EDGES) + 1)
+        self._game = None
+        self._frame = {}
+        self._stack = []
+        self._last_tick = None
+
+    def __getitem__(self, name):
+        return self.hooks[name]
+
+    #
+    # Instrumentation
+    #
+    def attach(self, game):
+        """
+        Start profiling the given game.
+        """
+        if self._game is not None:
+            raise RuntimeError('profiler is already attached to a game')
+        self._game = game
+        for cls in hook_classes(type(game)):
+            for name, func in list(vars(cls).items()):
+                if HOOK_PATTERN.match(name) and callable(func):
+                    _patch(cls, name)
+        game.profiler = self
+
+    def detach(self):
+        """
+        Stop profiling and remove the instrumentation from the game classes.
+        """
+        game, self._game = self._game, None
+        if game is None:
+            return
+        for cls in hook_classes(type(game)):
+            for name in list(vars(cls)):
+                if (cls, name) in _patched:
+                    _unpatch(cls, name)
+        if game.profiler is self:
+            game.profiler = None
+
+    def enter(self):
+        """
+        Called by instrumented hooks when they start.
+        """
+        self._stack.append([perf_counter(), 0.0])
+
+    def exit(self, name):
+        """
+        Called by instrumented hooks when they finish.
+        """
+        start, children = self._stack.pop()
+        elapsed = perf_counter() - start
+        if self._stack:
+            self._stack[-1][1] += elapsed
+        try:
+            entry = self._frame[name]
+            entry[0] += elapsed - children
+            entry[1] += 1
+        except KeyError:
+            self._frame[name] = [elapsed - children, 1]
+
+    def tick(self):
+        """
+        Mark the start of a new frame and commit the timings of the
+        previous one.
+        """
+        now = perf_counter()
+        if self._last_tick is not None:
+            self.add_frame(now - self._last_tick)
+        self._last_tick = now
+
+    def add_frame(self, duration):
+        """
+        Commit the hook timings accumulated since the last frame, which took
+        the given duration in seconds.
+        """
+        hooks = self.hooks
+        for name, (elapsed, calls) in self._frame.items():
+            try:
+                stats = hooks[name]
+            except KeyError:
+                stats = hooks[name] = HookStats(name, self.window)
+            stats.add(elapsed, calls)
+        self._frame.clear()
+        self.frames.add(duration)
+        self.histogram[bisect_right(HISTOGRAM_EDGES, duration * 1000)] += 1
+
+    def reset(self):
+        """
+        Discard all statistics.
+        """
+        self.hooks.clear()
+        self.frames = HookStats('frame', self.window)
+        self.histogram = [0] * (len(HISTOGRAM_EDGES) + 1)
+        self._frame.clear()
+        self._last_tick = None
+
+    #
+    # Reports
+    #
+    def summary(self):
+        """
+        Return a list of dictionaries with statistics for each hook, sorted
+        from the slowest to the fastest p95.
+        """
+        rows = [stats.summary() for stats in self.hooks.values()]
+        rows.sort(key=lambda row: row['p95'], reverse=True)
+        return rows
+
+    def histogram_bins(self):
+        """
+        Return a list of (label, count) pairs with the frame time histogram.
+        """
+        labels = [f'<{x}ms' for x in HISTOGRAM_EDGES]
+        labels.append(f'>={HISTOGRAM_EDGES[-1]}ms')
+        return list(zip(labels, self.histogram))
+
+    def report(self, limit=None):
+        """
+        Return a text report with the frame times and the slowest hooks.
+        """
+        frame = self.frames.summary()
+        lines = ['frame: p50={p50:.2f}ms p95={p95:.2f}ms '
+                 'p99={p99:.2f}ms'.format(**frame)]
+        for row in self.summary()[:limit]:
+            lines.append('{hook}: p50={p50:.2f}ms p95={p95:.2f}ms '
+                         'p99={p99:.2f}ms'.format(**row))
+        return '\n'.join(lines)
+
+    def to_json(self):
+        """
+        Return a JSON string with all statistics.
+        """
+        return json.dumps({
+            'frame': self.frames.summary(),
+            'histogram': dict(self.histogram_bins()),
+            'hooks': self.summary(),
+        })
+
+    def save_csv(self, path):
+        """
+        Save statistics for each hook in a CSV file.
+        """
+        fields = ['hook', 'calls', 'mean', 'p50', 'p95', 'p99', 'max']
+        with open(path, 'w', newline='') as fd:
+            writer = csv.DictWriter(fd, fields)
+            writer.writeheader()
+            writer.writerow(self.frames.summary())
+            writer.writerows(self.summary())
+
+    def save_json(self, path):
+        """
+        Save all statistics in a JSON file.
+        """
+        with open(path, 'w') as fd:
+            fd.write(self.to_json())
+
+    def draw_overlay(self, left, top, limit=8, color=(255, 255, 255),
+                     font_size=10):
+        """
+        Draw report on screen with the top left corner at the given
+        position.
+        """
+        import arcade
+
+        line_height = font_size * 1.5
+        for idx, line in enumerate(self.report(limit).splitlines()):
+            y = top - (idx + 1) * line_height
+            arcade.draw_text(line, left, y, color, font_size)
+
+
+def hook_classes(cls):
+    """
+    Return classes in the MRO that may define instrumented hooks.
+    """
+    import arcade
+
+    return [base for base in cls.__mro__
+            if base not in (object, arcade.Window)
+            and not base.__module__.startswith('pyglet.')]
+
+
+def _patch(cls, name):
+    try:
+        _patched[cls, name][1] += 1
+        return
+    except KeyError:
+        pass
+    func = vars(cls)[name]
+    label = f'{cls.__name__}.{name}'
+
+    @wraps(func)
+    def hook(self, *args, **kwargs):
+        profiler = self.__dict__.get('profiler')
+        if profiler is None or not profiler.enabled:
+            return func(self, *args, **kwargs)
+        profiler.enter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            profiler.exit(label)
+
+    _patched[cls, name] = [func, 1]
+    setattr(cls, name, hook)
+
+
+def _unpatch(cls, name):
+    entry = _patched[cls, name]
+    entry[1] -= 1
+    if entry[1] == 0:
+        setattr(cls, name, entry[0])
+        del _patched[cls, name]
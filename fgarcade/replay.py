@@ -0,0 +1,158 @@
+"""
+Record the commands of a game session and replay them.
+
+Commands are stored as runs of (frames, bitmask) pairs, since players hold
+the same keys for many consecutive frames. Recordings can be saved in a
+compact binary file: a small header followed by a single array with all
+runs.
+"""
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from .enums import Command
+
+MAGIC = b'FGREPLAY'
+VERSION = 1
+HEADER = struct.Struct('<8sIId')
+
+#: Record for a run of repeated commands in binary files
+RUN_DTYPE = np.dtype([
+    ('frames', '<u4'),
+    ('commands', '<u4'),
+])
+
+
+class Recording:
+    """
+    A run-length encoded sequence of per-frame commands.
+
+    >>> rec = Recording(dt=1/60)
+    >>> for cmd in [0, 2, 2, 2, 6, 6, 2]:
+    ...     rec.append(cmd)
+    >>> rec.runs
+    [[1, 0], [3, 2], [2, 6], [1, 2]]
+    >>> len(rec), Recording.from_bytes(rec.to_bytes()) == rec
+    (7, True)
+
+    Args:
+        runs:
+            List of (frames, commands) pairs.
+        dt (float):
+            Duration of each simulation step.
+    """
+
+    def __init__(self, runs=(), dt=1 / 60):
+        self.runs = [[int(n), int(cmd)] for n, cmd in runs]
+        self.dt = dt
+
+    def __len__(self):
+        return sum(n for n, _ in self.runs)
+
+    def __iter__(self):
+        for n, cmd in self.runs:
+            cmd = Command(cmd)
+            for _ in range(n):
+                yield cmd
+
+    def __eq__(self, other):
+        if isinstance(other, Recording):
+            return self.runs == other.runs and self.dt == other.dt
+        return NotImplemented
+
+    def __repr__(self):
+        return f'Recording(<{len(self)} frames>, dt={self.dt!r})'
+
+    def append(self, commands, frames=1):
+        """
+        Append commands held for the given number of frames.
+        """
+        commands = int(commands)
+        runs = self.runs
+        if runs and runs[-1][1] == commands:
+            runs[-1][0] += frames
+        elif frames:
+            runs.append([frames, commands])
+
+    def to_array(self):
+        """
+        Return runs as an array of RUN_DTYPE.
+        """
+        data = np.zeros(len(self.runs), dtype=RUN_DTYPE)
+        if self.runs:
+            data['frames'], data['commands'] = np.array(self.runs).T
+        return data
+
+    def to_bytes(self):
+        """
+        Serialize recording to the binary format.
+        """
+        data = self.to_array()
+        return HEADER.pack(MAGIC, VERSION, len(data), self.dt) + data.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Load recording from a buffer with data in the binary format.
+        """
+        magic, version, size, dt = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('not a replay file')
+        if version != VERSION:
+            raise ValueError(f'unsupported replay version: {version}')
+        runs = np.frombuffer(data, dtype=RUN_DTYPE, count=size,
+                             offset=HEADER.size)
+        return cls(zip(runs['frames'].tolist(), runs['commands'].tolist()), dt)
+
+    def save(self, path):
+        """
+        Save recording to path.
+        """
+        Path(path).write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load recording from path.
+        """
+        return cls.from_bytes(Path(path).read_bytes())
+
+
+def replay(game, recording, callback=None):
+    """
+    Run all steps of a recording in the given game.
+
+    Steps run back to back with the recorded dt, without rendering or
+    waiting for the clock, so replays run at full CPU speed. The game should
+    be created in the same state as the recorded session, usually as a
+    headless game.
+
+    Args:
+        game (GameWindow):
+            Game that receives the commands.
+        recording (Recording):
+            Recorded session.
+        callback:
+            If given, it is called as callback(game, frame) after each step.
+    """
+    game.setup()
+    step = game.step
+    dt = recording.dt
+    profiler = game.profiler
+    frame = 0
+    for n, cmd in recording.runs:
+        game.commands = Command(cmd)
+        if callback is None and profiler is None:
+            for _ in range(n):
+                step(dt)
+            frame += n
+        else:
+            for _ in range(n):
+                if profiler is not None:
+                    profiler.tick()
+                step(dt)
+                if callback is not None:
+                    callback(game, frame)
+                frame += 1
+    return game
@@ -1,6 +1,43 @@
 import arcade
 from arcade import FACE_RIGHT, FACE_DOWN, FACE_UP, FACE_LEFT
 
+from .animation import Animator
+
+
+class AnimatedSprite(arcade.Sprite):
+    """
+    A sprite animated by a shared :class:`fgarcade.animation.Animation`.
+
+    Games usually register animated sprites in an
+    :class:`fgarcade.animation.Animator`, which updates all of them at once.
+
+    Args:
+        animation (Animation):
+            Animation definition. It is not copied, hence many sprites may
+            share the same animation.
+    """
+
+    #: Animator that manages the sprite, if any
+    animator = None
+
+    def __init__(self, animation, **kwargs):
+        super().__init__(**kwargs)
+        self.animation = animation
+        self.texture = animation.initial_texture
+        self.textures = [self.texture]
+        self._own_animator = None
+
+    def update_animation(self, dt=0.0):
+        """
+        Update animation of a sprite that is not managed by a shared
+        animator.
+        """
+        if self.animator is None:
+            self._own_animator = Animator()
+            self._own_animator.add(self)
+        if self.animator is self._own_animator:
+            self.animator.update(dt)
+
 
 class AnimatedWalkingSprite(arcade.Sprite):
     def __init__(self, scale: float = 1,
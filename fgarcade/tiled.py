@@ -0,0 +1,467 @@
+"""
+Import maps created with the Tiled editor (https://www.mapeditor.org).
+
+Both the TMX (XML) and the JSON formats are supported, with tile layers
+encoded as CSV, XML or base64 (optionally compressed with zlib or gzip) and
+object layers with tile objects. Infinite maps and flipped tiles are not
+supported.
+
+Tiles are decoded with numpy and textures are created only once per tile
+type in use. Image based tilesets, such as the theme's spritesheet, are
+decoded once and tiles are cut from them.
+"""
+import base64
+import gzip
+import json
+import zlib
+from pathlib import Path
+from xml.etree import ElementTree
+
+import numpy as np
+import PIL.Image
+
+import arcade
+from .assets import IMAGE_SEARCH_PATHS, EXTENSIONS, get_texture
+from .enums import Role
+from .level import LevelData, TILE_DTYPE
+
+#: Tiled stores flip flags in the upper bits of each gid
+GID_MASK = 0x1FFFFFFF
+
+LAYER_NAMES = ('background_decorations', 'platforms', 'foreground_decorations')
+
+
+def read_tiled(path, tile_size=64):
+    """
+    Read a Tiled map.
+
+    Args:
+        path:
+            Path to a .tmx or .json file.
+        tile_size:
+            Size of tiles in the world. Textures are scaled so tiles of the
+            map fit this size.
+
+    Returns:
+        A (level, textures) tuple with a :class:`fgarcade.level.LevelData`
+        and a dictionary mapping the (kind, None) palette entries of the
+        level to their textures.
+    """
+    path = Path(path)
+    if path.suffix == '.json':
+        tiled = TiledMap.from_json(path)
+    else:
+        tiled = TiledMap.from_tmx(path)
+    return tiled.to_level(tile_size)
+
+
+def parse_role(value, default=Role.OBJECT):
+    """
+    Convert the value of a role property to a Role.
+
+    Accepts role names in any case (e.g. "platform", "RAMP_UP") or integers.
+
+    >>> parse_role('ramp_up')
+    <Role.RAMP_UP: 4>
+    """
+    if value is None:
+        return default
+    if isinstance(value, int) or str(value).isdigit():
+        return Role(int(value))
+    try:
+        return Role[str(value).upper()]
+    except KeyError:
+        raise ValueError(f'invalid role: {value!r}')
+
+
+class Tileset:
+    """
+    A Tiled tileset.
+
+    Tilesets are either collections of images, with one image per tile, or
+    a single image that is split in a grid of tiles.
+    """
+
+    def __init__(self, firstgid, tile_width, tile_height, images=None,
+                 image=None, columns=0, margin=0, spacing=0, properties=None):
+        self.firstgid = firstgid
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.images = images or {}
+        self.image = image
+        self.columns = columns
+        self.margin = margin
+        self.spacing = spacing
+        self.properties = properties or {}
+        self._image_data = None
+
+    @classmethod
+    def from_tmx(cls, node, base):
+        """
+        Read tileset from a <tileset> element. External .tsx files are
+        loaded relative to base.
+        """
+        firstgid = int(node.get('firstgid', 1))
+        source = node.get('source')
+        if source:
+            path = base / source
+            node = ElementTree.parse(str(path)).getroot()
+            base = path.parent
+
+        images = {}
+        properties = {}
+        for tile in node.findall('tile'):
+            idx = int(tile.get('id'))
+            image = tile.find('image')
+            if image is not None:
+                images[idx] = base / image.get('source')
+            props = read_tmx_properties(tile)
+            if props:
+                properties[idx] = props
+
+        image = node.find('image')
+        return cls(firstgid,
+                   int(node.get('tilewidth')), int(node.get('tileheight')),
+                   images=images,
+                   image=None if image is None else base / image.get('source'),
+                   columns=int(node.get('columns', 0)),
+                   margin=int(node.get('margin', 0)),
+                   spacing=int(node.get('spacing', 0)),
+                   properties=properties)
+
+    @classmethod
+    def from_json(cls, data, base):
+        """
+        Read tileset from its JSON representation. External tilesets are
+        loaded relative to base.
+        """
+        firstgid = data.get('firstgid', 1)
+        source = data.get('source')
+        if source:
+            path = base / source
+            if path.suffix == '.tsx':
+                node = ElementTree.parse(str(path)).getroot()
+                node.set('firstgid', str(firstgid))
+                return cls.from_tmx(node, path.parent)
+            data = json.loads(path.read_text())
+            base = path.parent
+
+        images = {}
+        properties = {}
+        for tile in data.get('tiles', ()):
+            if 'image' in tile:
+                images[tile['id']] = base / tile['image']
+            props = read_json_properties(tile)
+            if props:
+                properties[tile['id']] = props
+
+        image = data.get('image')
+        return cls(firstgid, data['tilewidth'], data['tileheight'],
+                   images=images,
+                   image=None if image is None else base / image,
+                   columns=data.get('columns', 0),
+                   margin=data.get('margin', 0),
+                   spacing=data.get('spacing', 0),
+                   properties=properties)
+
+    def texture(self, gid, scale):
+        """
+        Return (kind, texture) for the tile with the given gid.
+
+        Images that are found in the search paths for sprites are loaded by
+        name, through the texture cache.
+        """
+        idx = gid - self.firstgid
+        if idx in self.images:
+            path = self.images[idx]
+            name = sprite_name(path)
+            if name is not None:
+                return name, get_texture(name, scale=scale)
+            image = PIL.Image.open(str(path))
+            image.load()
+            kind = str(path)
+        else:
+            if self._image_data is None:
+                image = PIL.Image.open(str(self.image))
+                image.load()
+                self._image_data = image
+            columns = self.columns or max(
+                1, (self._image_data.width - 2 * self.margin + self.spacing)
+                // (self.tile_width + self.spacing))
+            x = self.margin + (idx % columns) * (self.tile_width + self.spacing)
+            y = self.margin + (idx // columns) * (self.tile_height + self.spacing)
+            image = self._image_data.crop((x, y, x + self.tile_width,
+                                           y + self.tile_height))
+            kind = f'{self.image}#{idx}'
+        texture = arcade.Texture(kind, image)
+        texture.scale = scale
+        return kind, texture
+
+    def role(self, gid):
+        """
+        Return the role property of the given tile, if any.
+        """
+        return self.properties.get(gid - self.firstgid, {}).get('role')
+
+
+class TiledMap:
+    """
+    In-memory representation of the parts of a Tiled map we care about.
+
+    Attributes:
+        width, height:
+            Size of map, in tiles.
+        tile_width, tile_height:
+            Size of tiles, in pixels.
+        tilesets:
+            List of tilesets.
+        tile_layers:
+            List of (name, properties, gids) with the gids of each tile layer
+            as a (height, width) array.
+        object_layers:
+            List of (name, properties, objects) with (gid, x, y, width,
+            height) tuples for each tile object.
+    """
+
+    def __init__(self, width, height, tile_width, tile_height):
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.tilesets = []
+        self.tile_layers = []
+        self.object_layers = []
+
+    @classmethod
+    def from_tmx(cls, path):
+        """
+        Load map from a .tmx file.
+        """
+        path = Path(path)
+        root = ElementTree.parse(str(path)).getroot()
+        if root.get('infinite') == '1':
+            raise ValueError('infinite maps are not supported')
+        new = cls(int(root.get('width')), int(root.get('height')),
+                  int(root.get('tilewidth')), int(root.get('tileheight')))
+        new.tilesets = [Tileset.from_tmx(node, path.parent)
+                        for node in root.findall('tileset')]
+
+        for node in root.iter():
+            if node.tag == 'layer':
+                data = node.find('data')
+                encoding = data.get('encoding')
+                if encoding == 'csv':
+                    gids = np.array(data.text.replace('\n', '').split(','),
+                                    dtype=np.uint32)
+                elif encoding == 'base64':
+                    gids = decode_base64(data.text.strip(),
+                                         data.get('compression'))
+                else:
+                    gids = np.array([int(x.get('gid', 0))
+                                     for x in data.findall('tile')],
+                                    dtype=np.uint32)
+                shape = int(node.get('height')), int(node.get('width'))
+                new.tile_layers.append((node.get('name'),
+                                        read_tmx_properties(node),
+                                        gids.reshape(shape)))
+            elif node.tag == 'objectgroup':
+                objects = [(int(obj.get('gid')),
+                            float(obj.get('x')), float(obj.get('y')),
+                            float(obj.get('width', 0)),
+                            float(obj.get('height', 0)))
+                           for obj in node.findall('object')
+                           if obj.get('gid') is not None]
+                new.object_layers.append((node.get('name'),
+                                          read_tmx_properties(node),
+                                          objects))
+        return new
+
+    @classmethod
+    def from_json(cls, path):
+        """
+        Load map from a Tiled .json file.
+        """
+        path = Path(path)
+        data = json.loads(path.read_text())
+        if data.get('infinite'):
+            raise ValueError('infinite maps are not supported')
+        new = cls(data['width'], data['height'],
+                  data['tilewidth'], data['tileheight'])
+        new.tilesets = [Tileset.from_json(x, path.parent)
+                        for x in data.get('tilesets', ())]
+
+        def visit(layers):
+            for layer in layers:
+                kind = layer['type']
+                if kind == 'group':
+                    visit(layer.get('layers', ()))
+                elif kind == 'tilelayer':
+                    gids = layer['data']
+                    if isinstance(gids, str):
+                        gids = decode_base64(gids, layer.get('compression'))
+                    else:
+                        gids = np.array(gids, dtype=np.uint32)
+                    shape = layer['height'], layer['width']
+                    new.tile_layers.append((layer['name'],
+                                            read_json_properties(layer),
+                                            gids.reshape(shape)))
+                elif kind == 'objectgroup':
+                    objects = [(obj['gid'], obj['x'], obj['y'],
+                                obj.get('width', 0), obj.get('height', 0))
+                               for obj in layer.get('objects', ())
+                               if 'gid' in obj]
+                    new.object_layers.append((layer['name'],
+                                              read_json_properties(layer),
+                                              objects))
+
+        visit(data.get('layers', ()))
+        return new
+
+    def tileset(self, gid):
+        """
+        Return tileset that contains the given gid.
+        """
+        for tileset in reversed(self.tilesets):
+            if gid >= tileset.firstgid:
+                return tileset
+        raise ValueError(f'invalid gid: {gid}')
+
+    def to_level(self, tile_size=64):
+        """
+        Convert map to a (level, textures) tuple. See :func:`read_tiled`.
+        """
+        scale = tile_size / self.tile_width
+        palette = []
+        textures = {}
+        roles = {}
+        lookup = {}
+
+        def register(gid):
+            tileset = self.tileset(gid)
+            kind, texture = tileset.texture(gid, scale)
+            textures[kind, None] = texture
+            roles[gid] = tileset.role(gid)
+            palette.append((kind, None, texture.width * scale,
+                            texture.height * scale))
+            lookup[gid] = len(palette)
+            return kind, texture
+
+        # Tile layers
+        parts = []
+        serial = 0
+        for name, props, gids in self.tile_layers:
+            gids = gids & GID_MASK
+            layer_role = parse_role(props.get('role'), role_from_name(name))
+            rows, cols = np.nonzero(gids)
+            found = gids[rows, cols]
+            used = np.unique(found)
+            table = np.zeros(int(used.max(initial=0)) + 1, dtype=np.uint16)
+            role_table = np.full(len(table), layer_role, dtype=np.uint8)
+            for gid in used.tolist():
+                if gid not in lookup:
+                    register(gid)
+                table[gid] = lookup[gid]
+                if roles[gid] is not None:
+                    role_table[gid] = parse_role(roles[gid])
+
+            part = np.zeros(len(found), dtype=TILE_DTYPE)
+            part['serial'] = np.arange(serial, serial + len(found))
+            part['i'] = cols
+            part['j'] = self.height - 1 - rows
+            part['tile'] = table[found]
+            part['role'] = role_table[found]
+            part['layer'] = LAYER_INDEX[role_table[found]]
+            parts.append(part)
+            serial += len(found)
+        tiles = np.concatenate(parts) if parts else np.zeros(0, TILE_DTYPE)
+
+        # Object layers. Tiled anchors tile objects at their bottom left
+        # corner and measures y from the top.
+        objects = []
+        map_height = self.height * self.tile_height
+        for name, props, items in self.object_layers:
+            layer_role = parse_role(props.get('role'), role_from_name(name))
+            for gid, x, y, width, height in items:
+                gid &= GID_MASK
+                if gid not in lookup:
+                    register(gid)
+                kind, _, _, _ = palette[lookup[gid] - 1]
+                role = parse_role(roles[gid], layer_role)
+                x = (x + width / 2) * scale
+                y = (map_height - y + height / 2) * scale
+                objects.append((serial, LAYER_NAMES[LAYER_INDEX[role]], kind,
+                                x, y, role))
+                serial += 1
+
+        level = LevelData(tiles, palette, LAYER_NAMES, objects,
+                          tile_size=tile_size)
+        return level, textures
+
+
+#: Index in LAYER_NAMES of the sprite list for each role
+LAYER_INDEX = np.array([0 if role == Role.BACKGROUND else
+                        2 if role == Role.FOREGROUND else 1
+                        for role in Role], dtype=np.uint8)
+
+
+#
+# Auxiliary functions
+#
+def role_from_name(name):
+    """
+    Guess role from layer name. Layers named after a role (e.g. "background"
+    or "platforms") receive that role.
+    """
+    name = (name or '').upper().rstrip('S')
+    return Role.__members__.get(name, Role.OBJECT)
+
+
+def sprite_name(path):
+    """
+    Return the sprite name for an image in the search paths or None.
+    """
+    path = Path(path).resolve()
+    if path.suffix[1:] not in EXTENSIONS:
+        return None
+    for base in IMAGE_SEARCH_PATHS:
+        try:
+            name = path.relative_to(Path(base).resolve())
+        except ValueError:
+            continue
+        return '/'.join(name.with_suffix('').parts)
+    return None
+
+
+def decode_base64(data, compression=None):
+    """
+    Decode a base64 encoded array of gids.
+    """
+    data = base64.b64decode(data)
+    if compression == 'zlib':
+        data = zlib.decompress(data)
+    elif compression == 'gzip':
+        data = gzip.decompress(data)
+    elif compression:
+        raise ValueError(f'unsupported compression: {compression}')
+    return np.frombuffer(data, dtype='<u4').astype(np.uint32)
+
+
+def read_tmx_properties(node):
+    """
+    Read <properties> of a TMX element into a dictionary.
+    """
+    props = node.find('properties')
+    if props is None:
+        return {}
+    return {prop.get('name'): prop.get('value', prop.text)
+            for prop in props.findall('property')}
+
+
+def read_json_properties(data):
+    """
+    Read properties of a Tiled JSON object into a dictionary.
+    """
+    props = data.get('properties', {})
+    if isinstance(props, dict):
+        return props
+    return {prop['name']: prop.get('value') for prop in props}
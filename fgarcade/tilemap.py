@@ -0,0 +1,481 @@
+"""
+Compact storage for the tiles of a level.
+"""
+from math import ceil, floor
+
+import numpy as np
+
+from .collision import Box, Extent, SpatialGrid, arcade_edge
+from .enums import Role
+from .geometry import CollisionGeometry
+
+ROLES = tuple(Role)
+EMPTY = 0
+
+
+class TileMap:
+    """
+    A sparse grid of tiles stored in numpy arrays.
+
+    Each layer is split in square chunks of chunk_size x chunk_size cells
+    that are allocated on demand. A cell stores a reference to the tile type
+    (kind, color and dimensions, stored only once in the palette), the tile
+    role and a serial number that records the order in which tiles were
+    created. This takes a few bytes per tile, instead of a full sprite.
+
+    Tiles are centered in their cells.
+
+    Args:
+        tile_size (float):
+            Size of each cell, in pixels.
+        chunk_size (int):
+            Number of cells in each side of a chunk.
+
+    >>> tiles = TileMap(64)
+    >>> g = tiles.tile_type('g', 'blue', 64, 64)
+    >>> tiles.set('platforms', 0, 0, g, Role.OBJECT)
+    False
+    >>> tiles.get('platforms', 0, 0)
+    ('g', 'blue', <Role.OBJECT: 2>)
+    >>> tiles.query('platforms', 10, 10, 100, 20)
+    [Box(0.0, 0.0, 64.0, 64.0, role=<Role.OBJECT: 2>)]
+    """
+
+    def __init__(self, tile_size=64, chunk_size=32):
+        self.tile_size = tile_size
+        self.chunk_size = chunk_size
+        self.layers = {}
+        self.extents = {}
+        self.palette = []
+        self._palette_index = {}
+        self._reach = 0
+        self._serial = 0
+        self._count = 0
+
+        #: Incremented whenever a tile changes. Each chunk also keeps its
+        #: own version.
+        self.version = 0
+
+    def __len__(self):
+        return self._count
+
+    def next_serial(self):
+        """
+        Return a new serial number.
+        """
+        serial = self._serial
+        self._serial += 1
+        return serial
+
+    def tile_type(self, kind, color, width=None, height=None):
+        """
+        Return the id of the tile type with the given kind and color,
+        registering it in the palette if necessary.
+
+        Width and height default to the tile size.
+        """
+        width = self.tile_size if width is None else width
+        height = self.tile_size if height is None else height
+        key = (kind, color, width, height)
+        try:
+            return self._palette_index[key]
+        except KeyError:
+            pass
+        self.palette.append(key)
+        idx = self._palette_index[key] = len(self.palette)
+
+        # Tiles larger than a cell overlap its neighbors
+        overflow = max(width, height) / 2 - self.tile_size / 2
+        self._reach = max(self._reach, ceil(overflow / self.tile_size))
+        return idx
+
+    #
+    # Cell access
+    #
+    def _chunk(self, layer, i, j, create=False):
+        n = self.chunk_size
+        key = (i // n, j // n)
+        chunks = self.layers.get(layer)
+        if chunks is None:
+            if not create:
+                return None
+            chunks = self.layers[layer] = {}
+        try:
+            return chunks[key]
+        except KeyError:
+            if not create:
+                return None
+            chunk = chunks[key] = TileChunk(n)
+            return chunk
+
+    def set(self, layer, i, j, tile_type, role, serial=None):
+        """
+        Put tile of the given type at cell (i, j) of layer.
+
+        Return True if it replaces an existing tile.
+        """
+        chunk = self._chunk(layer, i, j, create=True)
+        n = self.chunk_size
+        x, y = i % n, j % n
+        replaced = bool(chunk.tile[y, x])
+        extent = self._extent(layer)
+        if replaced:
+            box = self._box(layer, i, j)[1]
+            extent.remove(box.left, box.bottom, box.right, box.top)
+        chunk.tile[y, x] = tile_type
+        chunk.role[y, x] = role
+        chunk.serial[y, x] = self.next_serial() if serial is None else serial
+        if serial is not None:
+            self._serial = max(self._serial, serial + 1)
+        if not replaced:
+            self._count += 1
+        box = self._box(layer, i, j)[1]
+        extent.add(box.left, box.bottom, box.right, box.top)
+        self._touch(chunk)
+        return replaced
+
+    def _touch(self, chunk):
+        self.version += 1
+        chunk.version += 1
+
+    def _extent(self, layer):
+        try:
+            return self.extents[layer]
+        except KeyError:
+            extent = self.extents[layer] = Extent()
+            return extent
+
+    def get(self, layer, i, j):
+        """
+        Return (kind, color, role) of tile at cell (i, j) or None if cell is
+        empty.
+        """
+        chunk = self._chunk(layer, i, j)
+        if chunk is None:
+            return None
+        n = self.chunk_size
+        x, y = i % n, j % n
+        tile = chunk.tile[y, x]
+        if tile == EMPTY:
+            return None
+        kind, color, _, _ = self.palette[tile - 1]
+        return kind, color, ROLES[chunk.role[y, x]]
+
+    def remove(self, layer, i, j):
+        """
+        Remove tile from cell (i, j).
+
+        Raise a KeyError if cell is empty.
+        """
+        chunk = self._chunk(layer, i, j)
+        n = self.chunk_size
+        if chunk is None or chunk.tile[j % n, i % n] == EMPTY:
+            raise KeyError((layer, i, j))
+        box = self._box(layer, i, j)[1]
+        self._extent(layer).remove(box.left, box.bottom, box.right, box.top)
+        chunk.tile[j % n, i % n] = EMPTY
+        self._count -= 1
+        self._touch(chunk)
+
+    def set_many(self, layer, i, j, tile_type, role, serial):
+        """
+        Put many tiles at once. All arguments, except layer, are arrays of
+        the same size.
+        """
+        i, j = np.asarray(i, dtype=np.int64), np.asarray(j, dtype=np.int64)
+        tile_type, role = np.asarray(tile_type), np.asarray(role)
+        serial = np.asarray(serial)
+        if len(i) == 0:
+            return
+
+        n = self.chunk_size
+        ci, cj = i // n, j // n
+        extent = self._extent(layer)
+        keys, inverse = np.unique(np.stack([ci, cj], axis=1), axis=0,
+                                  return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(keys)))
+        start = 0
+        for (a, b), end in zip(keys.tolist(), bounds.tolist()):
+            idx = order[start:end]
+            start = end
+            chunk = self._chunk(layer, a * n, b * n, create=True)
+            x, y = i[idx] - a * n, j[idx] - b * n
+            old = chunk.tile[y, x]
+            replaced = old != EMPTY
+            self._count += int(np.count_nonzero(~replaced))
+            if replaced.any():
+                extent.update(*self._edges(i[idx][replaced], j[idx][replaced],
+                                           old[replaced]), sign=-1)
+            chunk.tile[y, x] = tile_type[idx]
+            chunk.role[y, x] = role[idx]
+            chunk.serial[y, x] = serial[idx]
+            self._touch(chunk)
+        extent.update(*self._edges(i, j, tile_type))
+        self._serial = max(self._serial, int(serial.max()) + 1)
+
+    def arrays(self, layer, chunk_key=None):
+        """
+        Return a tuple of arrays (serial, i, j, tile_type, role) with all
+        tiles in layer sorted by serial.
+
+        If chunk_key is given, restrict to tiles of the given chunk.
+        """
+        chunks = self.layers.get(layer, {})
+        if chunk_key is not None:
+            chunks = {chunk_key: chunks[chunk_key]} if chunk_key in chunks else {}
+
+        n = self.chunk_size
+        data = [(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64),
+                 np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint16),
+                 np.zeros(0, dtype=np.uint8))]
+        for (ci, cj), chunk in chunks.items():
+            y, x = np.nonzero(chunk.tile)
+            data.append((chunk.serial[y, x], x + ci * n, y + cj * n,
+                         chunk.tile[y, x], chunk.role[y, x]))
+
+        arrays = tuple(map(np.concatenate, zip(*data)))
+        order = np.argsort(arrays[0], kind='stable')
+        return tuple(x[order] for x in arrays)
+
+    def tiles(self, layer, chunk_key=None):
+        """
+        Iterate over (i, j, kind, color, role) for all tiles in layer, in the
+        order they were created.
+
+        If chunk_key is given, restrict to tiles of the given chunk.
+        """
+        _, i, j, tile, role = self.arrays(layer, chunk_key)
+        palette = self.palette
+        for i, j, tile, role in zip(i.tolist(), j.tolist(), tile.tolist(),
+                                    role.tolist()):
+            kind, color, _, _ = palette[tile - 1]
+            yield i, j, kind, color, ROLES[role]
+
+    def count(self, layer):
+        """
+        Return the number of tiles in layer.
+        """
+        chunks = self.layers.get(layer, {}).values()
+        return sum(int(np.count_nonzero(chunk.tile)) for chunk in chunks)
+
+    def chunk_keys(self, layer):
+        """
+        Return a list with the keys of all allocated chunks in layer.
+        """
+        return list(self.layers.get(layer, ()))
+
+    #
+    # Geometry
+    #
+    def position(self, i, j):
+        """
+        Return the center of cell (i, j).
+        """
+        size = self.tile_size
+        return (i + 0.5) * size, (j + 0.5) * size
+
+    def bounds(self, layer):
+        """
+        Return the (left, bottom, right, top) bounds of all tiles in layer or
+        None if layer is empty.
+
+        Bounds are updated incrementally as tiles change.
+        """
+        extent = self.extents.get(layer)
+        return None if extent is None else extent.bounds
+
+    def _edges(self, i, j, tile_type):
+        # Vectorized version of the edges computed by _box()
+        sizes = np.array([(w, h) for _, _, w, h in self.palette], dtype=float)
+        width, height = sizes.reshape(-1, 2)[np.asarray(tile_type) - 1].T
+        cx, cy = (i + 0.5) * self.tile_size, (j + 0.5) * self.tile_size
+        left, right = arcade_edge(cx, width / 2)
+        bottom, top = arcade_edge(cy, height / 2)
+        return left, bottom, right, top
+
+    def box(self, layer, i, j):
+        """
+        Return the bounding box of the tile at (i, j) or None if cell is
+        empty.
+        """
+        return self._box(layer, i, j)[1]
+
+    def _box(self, layer, i, j):
+        chunk = self._chunk(layer, i, j)
+        if chunk is None:
+            return None, None
+        n = self.chunk_size
+        x, y = i % n, j % n
+        tile = chunk.tile[y, x]
+        if tile == EMPTY:
+            return None, None
+        _, _, width, height = self.palette[tile - 1]
+        cx, cy = self.position(i, j)
+
+        left, right = arcade_edge(cx, width / 2)
+        bottom, top = arcade_edge(cy, height / 2)
+        box = Box(left, bottom, right, top, ROLES[chunk.role[y, x]])
+        return int(chunk.serial[y, x]), box
+
+    def entries(self, layer, left, bottom, right, top):
+        """
+        Return a list of (serial, box) pairs for all tiles in layer that
+        overlap the given rectangle.
+        """
+        size = self.tile_size
+        reach = self._reach
+        i0, j0 = floor(left / size) - reach, floor(bottom / size) - reach
+        i1, j1 = ceil(right / size) + reach, ceil(top / size) + reach
+        found = []
+        for i in range(i0, i1):
+            for j in range(j0, j1):
+                serial, box = self._box(layer, i, j)
+                if (box is not None
+                        and box.left < right and box.right > left
+                        and box.bottom < top and box.top > bottom):
+                    found.append((serial, box))
+        found.sort(key=lambda x: x[0])
+        return found
+
+    def query(self, layer, left, bottom, right, top):
+        """
+        Return a list of boxes for the tiles that overlap the given
+        rectangle.
+        """
+        return [box for _, box in self.entries(layer, left, bottom, right, top)]
+
+    def chunk_boxes(self, layer, chunk_key):
+        """
+        Return a list of (serial, box) pairs for all tiles in a chunk of
+        layer.
+        """
+        _, i, j, _, _ = self.arrays(layer, chunk_key)
+        box = self._box
+        return [box(layer, i, j) for i, j in zip(i.tolist(), j.tolist())]
+
+
+class TileChunk:
+    """
+    Arrays that hold a square block of cells of a TileMap.
+    """
+
+    __slots__ = ('tile', 'role', 'serial', 'version')
+
+    def __init__(self, size):
+        self.tile = np.zeros((size, size), dtype=np.uint16)
+        self.role = np.zeros((size, size), dtype=np.uint8)
+        self.serial = np.zeros((size, size), dtype=np.int32)
+        self.version = 0
+
+
+class PlatformIndex:
+    """
+    Collision index that combines a layer of a TileMap with a spatial grid for
+    free-standing objects.
+
+    It implements the query interface of :class:`fgarcade.collision.SpatialGrid`.
+    Tiles and objects share the same serial numbers, so results come in the
+    order elements were created.
+
+    If merge is True, queries return the rectangles of a
+    :class:`fgarcade.geometry.CollisionGeometry` instead of individual tiles,
+    so a region covered by many solid tiles produces a single collision.
+    Iteration always yields the individual tiles, while :meth:`boxes` returns
+    the same shapes seen by queries.
+    """
+
+    def __init__(self, tilemap, layer='platforms', cell_size=64, merge=False):
+        self.tilemap = tilemap
+        self.layer = layer
+        self.objects = SpatialGrid(cell_size)
+        self.extent = Extent()
+        self.geometry = None
+        if merge:
+            self.geometry = CollisionGeometry(tilemap, layer, cell_size)
+
+    def __len__(self):
+        return self.tilemap.count(self.layer) + len(self.objects)
+
+    def __iter__(self):
+        tilemap, layer = self.tilemap, self.layer
+        items = [tilemap._box(layer, i, j)
+                 for i, j, *_ in tilemap.tiles(layer)]
+        items.extend(self.objects.items())
+        items.sort(key=lambda x: x[0])
+        return (obj for _, obj in items)
+
+    def __contains__(self, obj):
+        return obj in self.objects
+
+    def add(self, obj, serial=None):
+        """
+        Insert free-standing object into the index.
+        """
+        if obj not in self.objects:
+            if serial is None:
+                serial = self.tilemap.next_serial()
+            self.objects.add(obj, serial)
+            self.extent.add(obj.left, obj.bottom, obj.right, obj.top)
+
+    def remove(self, obj):
+        """
+        Remove object from index.
+        """
+        self.objects.remove(obj)
+        self.extent.remove(obj.left, obj.bottom, obj.right, obj.top)
+
+    def bounds(self):
+        """
+        Return the (left, bottom, right, top) bounds of all tiles and objects
+        or None if index is empty.
+        """
+        found = [self.tilemap.bounds(self.layer), self.extent.bounds]
+        found = [x for x in found if x is not None]
+        if not found:
+            return None
+        left, bottom, right, top = zip(*found)
+        return min(left), min(bottom), max(right), max(top)
+
+    def boxes(self):
+        """
+        Return a list with all collision shapes in the index: merged
+        rectangles (or tiles, if merge is disabled) and objects.
+
+        These are the shapes returned by queries, so engines built from this
+        list collide exactly like engines that query the index.
+        """
+        if self.geometry is None:
+            return list(self)
+        self.geometry.update()
+        items = self.geometry.grid.items()
+        items.extend(self.objects.items())
+        items.sort(key=lambda x: x[0])
+        return [obj for _, obj in items]
+
+    def query(self, left, bottom, right, top):
+        """
+        Return a list with all tiles and objects that overlap the given
+        rectangle.
+        """
+        if self.geometry is None:
+            tiles = self.tilemap.entries(self.layer, left, bottom, right, top)
+        else:
+            tiles = self.geometry.entries(left, bottom, right, top)
+        objects = self.objects
+        objects = objects.entries(left, bottom, right, top) if objects else []
+        if not objects:
+            return [box for _, box in tiles]
+        if not tiles:
+            return [obj for _, obj in objects]
+        found = tiles + objects
+        found.sort(key=lambda x: x[0])
+        return [obj for _, obj in found]
+
+    def collide(self, obj):
+        """
+        Return a list of tiles and objects that collide with the given object.
+        """
+        hits = self.query(obj.left, obj.bottom, obj.right, obj.top)
+        return [x for x in hits if x is not obj]
@@ -12,14 +12,17 @@ def run(window, title=None, width=None, height=None):
     window.run()
 
 
-def create_platformer(title='FGArcade Game', width=800, height=600):
+def create_platformer(title='FGArcade Game', width=800, height=600, **kwargs):
     """
     Crete a new Window class for a platformer game.
+
+    Extra keyword arguments are passed to the game constructor. Use
+    ``headless=True`` to create a game that runs without a window.
     """
     from fgarcade.game.platformer import Platformer
 
     def decorator(func):
         game_cls = type('Game', (Platformer,), {'init': func})
-        return game_cls(width, height, title)
+        return game_cls(width, height, title, **kwargs)
 
     return decorator
@@ -0,0 +1,33 @@
+import pytest
+
+import fgarcade as fg
+
+
+class World(fg.Platformer):
+    """
+    Small level with ground, towers, floating platforms and ramps.
+    """
+
+    player_initial_tile = 4, 1
+
+    def init_world(self):
+        self.create_tower(10, 2, coords=(0, 1))
+        self.create_ground(3, coords=(2, 3))
+        self.create_ground(3, coords=(6, 1))
+        self.create_platform(3, coords=(4, 5))
+        self.create_platform(3, coords=(12, 4))
+        self.create_ground(35, coords=(0, 0), smooth_ends=False)
+        self.create_ramp('up', 6, coords=(15, 1))
+        self.create_ground(5, coords=(21, 6), smooth_ends=False, height=6)
+        self.create_ramp('down', 6, coords=(26, 7))
+        self.create_tower(10, coords=(34, 1))
+
+    def init(self):
+        self.init_world()
+
+
+@pytest.fixture
+def world():
+    game = World(headless=True)
+    game.setup()
+    return game
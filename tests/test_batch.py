@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+
+from fgarcade.batch import BatchPhysicsEngine
+from conftest import World
+
+N_BODIES = 20
+N_STEPS = 200
+
+
+def random_bodies(seed=0):
+    rng = random.Random(seed)
+    start = [(rng.uniform(100, 2100), rng.uniform(100, 600))
+             for _ in range(N_BODIES)]
+    speeds = [[rng.choice([-5, 0, 5]) for _ in range(N_STEPS)]
+              for _ in range(N_BODIES)]
+    return start, speeds
+
+
+def scalar_trajectories(world, start, speeds):
+    player, engine = world.player, world.physics_engine
+    result = []
+    for (x, y), vx in zip(start, speeds):
+        player.position = (x, y)
+        player.change_x = player.change_y = 0
+        trajectory = []
+        for speed in vx:
+            player.change_x = speed
+            engine.update()
+            trajectory.append((player.center_x, player.center_y))
+        result.append(trajectory)
+    return np.array(result)
+
+
+def batch_trajectories(world, start, speeds):
+    engine = BatchPhysicsEngine.from_world(world, N_BODIES)
+    engine.center_x[:], engine.center_y[:] = zip(*start)
+    speeds = np.array(speeds, dtype=float)
+    result = []
+    for k in range(N_STEPS):
+        engine.change_x[:] = speeds[:, k]
+        engine.update()
+        result.append(np.stack([engine.center_x, engine.center_y], axis=1))
+    return np.stack(result, axis=1)
+
+
+def test_batch_engine_matches_scalar_engine(world):
+    start, speeds = random_bodies()
+    expected = scalar_trajectories(world, start, speeds)
+    result = batch_trajectories(world, start, speeds)
+    assert np.allclose(result, expected, rtol=0, atol=1e-6)
+
+
+def test_batch_engine_matches_scalar_engine_with_individual_tiles():
+    world = World(headless=True)
+    world.merge_collision_tiles = False
+    world.setup()
+    assert world.platform_index.geometry is None
+    start, speeds = random_bodies(seed=1)
+    expected = scalar_trajectories(world, start, speeds)
+    result = batch_trajectories(world, start, speeds)
+    assert np.allclose(result, expected, rtol=0, atol=1e-6)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from conftest import World
+
+BATCH_SIZES = [0, 10 ** 6]
+
+
+def walk(world, enemy, steps=600):
+    manager = world.enemy_manager
+    positions, directions = [], []
+    for _ in range(steps):
+        manager.update(1 / 60)
+        positions.append(tuple(enemy.position))
+        directions.append(manager.direction[enemy.slot])
+    return np.array(positions), np.array(directions)
+
+
+def turns(directions):
+    return int((np.diff(directions) != 0).sum())
+
+
+def test_despawned_enemies_are_reused(world):
+    manager = world.enemy_manager
+    enemies = [world.create_enemy('walking', (i, 1)) for i in range(4)]
+    slots = len(manager.slots)
+    for enemy in enemies[:2]:
+        world.remove_enemy(enemy)
+    assert len(manager) == 2
+    assert not manager.active[[e.slot for e in enemies[:2]]].any()
+
+    respawned = [world.create_enemy('walking', (i, 1)) for i in range(2)]
+    assert {id(e) for e in respawned} == {id(e) for e in enemies[:2]}
+    assert all(enemy.active for enemy in respawned)
+    assert len(manager.slots) == slots
+    assert len(manager) == 4
+
+
+@pytest.mark.parametrize('batch_size', BATCH_SIZES)
+def test_walkers_turn_at_walls(world, batch_size):
+    # Walker is on the ground, between the tower on the left and a block
+    # that starts at x = 384.
+    world.enemy_manager.batch_size = batch_size
+    enemy = world.create_enemy('walking', (4, 1), direction=1)
+    positions, directions = walk(world, enemy)
+    assert positions[:, 0].max() < 384
+    assert positions[:, 0].min() > 128
+    assert turns(directions) >= 2
+
+
+@pytest.mark.parametrize('batch_size', BATCH_SIZES)
+def test_walkers_turn_at_ledges(world, batch_size):
+    # Floating platform covers 256 < x < 448 and has its top at y = 384
+    world.enemy_manager.batch_size = batch_size
+    enemy = world.create_enemy('walking', (5, 6), direction=1)
+    positions, directions = walk(world, enemy)
+    assert positions[:, 0].min() > 256
+    assert positions[:, 0].max() < 448
+    assert positions[:, 1].min() > 384
+    assert turns(directions) >= 2
+
+
+def walker_trajectories(batch_size, n=40, steps=400):
+    world = World(headless=True)
+    world.setup()
+    manager = world.enemy_manager
+    manager.batch_size = batch_size
+    for k in range(n):
+        kind = ['walking', 'spikey'][k % 2]
+        world.create_enemy(kind, (2 + (7 * k) % 30, 1 + k % 7),
+                           direction=(-1) ** k)
+    trajectories = []
+    for _ in range(steps):
+        manager.update(1 / 60)
+        trajectories.append(np.c_[manager.x, manager.y, manager.direction])
+    return np.array(trajectories)
+
+
+def test_batch_walkers_match_individual_walkers():
+    batch = walker_trajectories(0)
+    individual = walker_trajectories(10 ** 6)
+    assert np.allclose(batch, individual, atol=1e-6)
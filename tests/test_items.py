@@ -0,0 +1,73 @@
+import fgarcade as fg
+
+
+class Level(fg.Platformer):
+    def init(self):
+        self.create_ground(8, (0, 0))
+        for i in range(2, 6):
+            self.create_item('yellowGem', (i, 2))
+
+
+class Saved(fg.Platformer):
+    level_path = None
+
+    def init(self):
+        self.load_level(self.level_path)
+
+
+class Long(fg.Platformer):
+    def init(self):
+        self.create_ground(100, (0, 0))
+        for i in range(100):
+            self.create_item('yellowGem', (i, 2))
+
+
+def item_positions(game):
+    return sorted(tuple(item.position) for item in game.items)
+
+
+def test_save_level_after_pickup(tmp_path):
+    game = Level(headless=True)
+    game.setup()
+    collected = list(game.items)[:2]
+    for item in collected:
+        game.remove_item(item)
+
+    path = tmp_path / 'level.fgl'
+    game.save_level(path)
+    saved = Saved(headless=True, level_path=path)
+    saved.setup()
+    assert len(saved.items) == 2
+    assert item_positions(saved) == item_positions(game)
+
+
+def test_items_loaded_from_level_can_be_collected(tmp_path):
+    game = Level(headless=True)
+    game.setup()
+    game.save_level(tmp_path / 'level.json')
+
+    saved = Saved(headless=True, level_path=tmp_path / 'level.json')
+    saved.setup()
+    saved.remove_item(list(saved.items)[0])
+    saved.save_level(tmp_path / 'again.json')
+    again = Saved(headless=True, level_path=tmp_path / 'again.json')
+    again.setup()
+    assert item_positions(again) == item_positions(saved)
+    assert len(again.items) == 3
+
+
+def test_only_items_near_the_viewport_are_drawn():
+    game = Long(headless=True)
+    game.setup()
+    game.update_culling()
+    visible = game.culled_layers['items'].visible
+    assert 0 < len(visible) < len(game.items)
+    assert all(item.left < 2 * game.width for item in visible)
+
+    item = visible[0]
+    game.remove_item(item)
+    assert item not in visible.sprite_list
+    new = game.create_item('yellowGem', (3, 3))
+    assert new in visible.sprite_list
+    far = game.create_item('yellowGem', (90, 3))
+    assert far not in visible.sprite_list
@@ -0,0 +1,46 @@
+import pytest
+
+from conftest import World
+from fgarcade.enums import Command
+
+SCRIPT = [(Command.RIGHT, 300), (Command.RIGHT | Command.UP, 20),
+          (Command.RIGHT, 280), (Command.LEFT | Command.UP, 20),
+          (Command.LEFT, 200)]
+
+
+class Loaded(World):
+    level_path = None
+
+    def init(self):
+        self.load_level(self.level_path)
+
+
+def trajectory(game):
+    game.setup()
+    positions = []
+    for commands, frames in SCRIPT:
+        game.commands = commands
+        for _ in range(frames):
+            game.simulate(1, 1 / 60)
+            positions.append(tuple(game.player.position))
+    return positions
+
+
+@pytest.mark.parametrize('ext', ['json', 'fgl'])
+@pytest.mark.parametrize('chunk_size', [None, 8])
+def test_saved_level_reproduces_trajectory(tmp_path, ext, chunk_size):
+    game = World(headless=True, chunk_size=chunk_size, chunk_margin=0)
+    expected = trajectory(game)
+    path = tmp_path / ('level.' + ext)
+    game.save_level(path)
+
+    loaded = Loaded(headless=True, level_path=path, chunk_size=chunk_size,
+                    chunk_margin=0)
+    assert trajectory(loaded) == expected
+
+
+def test_chunk_streaming_reproduces_trajectory():
+    expected = trajectory(World(headless=True))
+    game = World(headless=True, chunk_size=8, chunk_margin=0)
+    assert trajectory(game) == expected
+    assert len(game.chunks.loaded) < len(game.chunks)